@@ -3,10 +3,11 @@ from pathlib import Path
 
 import questionary
 
-from opti_query.optipy.definitions import LlmTypes, DbTypes, OptimizationResponse
+from opti_query.optipy.definitions import LlmTypes, DbTypes, OptimizationResponse, QueryBenchmark
 from opti_query.optipy.hanlder import OptiQueryHandler
 from .struct import ProviderManager, AiProvider, Database
 from ..optipy.exceptions import UnsupportedModelName, LlmReachedTryCount
+from ..optipy.utils.neo4j import Neo4jUtils
 
 
 class OptiQueryCliRunner:
@@ -24,6 +25,7 @@ class OptiQueryCliRunner:
                 "Welcome to OptiQuery. Please choose an action:",
                 choices=[
                     "Start Optimization",
+                    "Optimize a Workload File",
                     "Configure a Database",
                     "Update an existing Database",
                     "Configure an AI Provider",
@@ -35,6 +37,9 @@ class OptiQueryCliRunner:
             if choice == "Start Optimization":
                 cls._start_optimization_flow()
 
+            elif choice == "Optimize a Workload File":
+                cls._start_workload_flow()
+
             elif choice == "Configure a Database":
                 cls._configure_database()
 
@@ -48,6 +53,7 @@ class OptiQueryCliRunner:
                 cls._update_provider()
 
             elif choice == "Exit":
+                Neo4jUtils.close_all()
                 print("\nGoodbye.\n")
                 break
 
@@ -155,6 +161,8 @@ class OptiQueryCliRunner:
         provider = ProviderManager.get_ai_provider(ai_provider=provider_choice)
 
         query = questionary.text("Enter the query you want to optimize:").ask()
+        verify = questionary.confirm("Verify that the optimized queries return the same results as the original?", default=True).ask()
+        benchmark = questionary.confirm("Benchmark the optimized queries against the database with PROFILE?", default=False).ask()
         cls._clear_screen()
         print("Running optimization, please wait...\n")
 
@@ -168,6 +176,8 @@ class OptiQueryCliRunner:
                 llm_type=provider.llm_type,
                 db_type=db.db_type,
                 model_name=provider.model_name,
+                verify=verify,
+                benchmark=benchmark,
                 **provider.llm_auth,
             )
             print("Optimization completed successfully.\n")
@@ -187,6 +197,62 @@ class OptiQueryCliRunner:
 
         input("\nPress Enter to return to main menu...")
 
+    @classmethod
+    def _start_workload_flow(cls) -> None:
+        cls._clear_screen()
+        databases_friendly_names = ProviderManager.list_dbs()
+        ai_providers_friendly_names = ProviderManager.list_ai_providers()
+
+        if not databases_friendly_names:
+            print("No databases have been configured yet. Please add a database first.")
+            input("Press Enter to return.")
+            return
+
+        if not ai_providers_friendly_names:
+            print("No AI providers have been configured yet. Please add an AI provider first.")
+            input("Press Enter to return.")
+            return
+
+        db_choice = questionary.select("Select a database to use:", choices=databases_friendly_names).ask()
+        db = ProviderManager.get_database(db=db_choice)
+
+        provider_choice = questionary.select("Select an AI provider to use:", choices=ai_providers_friendly_names).ask()
+        provider = ProviderManager.get_ai_provider(ai_provider=provider_choice)
+
+        queries_path = questionary.path("Path of the workload file (queries separated by ';', or .jsonl with a 'query' key):").ask()
+        output_path = questionary.text("Path of the results file (JSONL):", default="optimizations.jsonl").ask()
+        max_workers = questionary.text("Number of parallel optimizations:", default="4", validate=lambda value: value.isdigit() and int(value) > 0).ask()
+        cls._clear_screen()
+        print("Running workload optimization, please wait...\n")
+
+        try:
+            summary = OptiQueryHandler.optimize_workload(
+                queries_path=queries_path,
+                output_path=output_path,
+                max_workers=int(max_workers),
+                host=db.uri,
+                database=db.db_name,
+                username=db.username,
+                password=db.password,
+                llm_type=provider.llm_type,
+                db_type=db.db_type,
+                model_name=provider.model_name,
+                **provider.llm_auth,
+            )
+            print("Workload optimization completed.\n")
+            print(f"Queries in file:   {summary.total_queries}")
+            print(f"Unique queries:    {summary.unique_queries}")
+            print(f"Already optimized: {summary.skipped_queries}")
+            print(f"Succeeded:         {summary.succeeded}")
+            print(f"Failed:            {summary.failed}")
+            print(f"Results written to {summary.output_path}")
+
+        except Exception as e:
+            print("An error occurred:")
+            print(e)
+
+        input("\nPress Enter to return to main menu...")
+
     @classmethod
     def _print_result(cls, *, result: OptimizationResponse) -> None:
         print("=" * 80)
@@ -199,6 +265,28 @@ class OptiQueryCliRunner:
             print(item.query)
             print("\nExplanation:")
             print(item.explanation)
+            if item.estimated_cost is not None:
+                print(f"\nEstimated Cost: {item.estimated_cost:,.2f}")
+                if result.original_estimated_cost is not None:
+                    print(f"Original Estimated Cost: {result.original_estimated_cost:,.2f}")
+
+                if item.slower_than_original:
+                    print("Warning: estimated to be slower than the original query")
+
+            elif item.evaluation_error:
+                print(f"\nCould not estimate cost: {item.evaluation_error}")
+
+            if item.verification is not None:
+                print(f"\nResult Verification: {item.verification.value} - {item.verification_detail}")
+
+            if item.benchmark is not None:
+                print("\nBenchmark:")
+                cls._print_benchmark(name="Original", benchmark=result.original_benchmark)
+                cls._print_benchmark(name="Optimized", benchmark=item.benchmark)
+                if item.benchmark_p_value is not None:
+                    verdict = "significantly faster" if item.significantly_faster else "no significant improvement"
+                    print(f"Mann-Whitney p-value: {item.benchmark_p_value} ({verdict})")
+
             print("-" * 80)
 
         suggestions = result.suggestions
@@ -207,4 +295,44 @@ class OptiQueryCliRunner:
             print("=" * 80)
             for suggestion in suggestions:
                 print(f"- {suggestion}")
+
+        if result.original_benchmark is not None:
+            print("\nBenchmark Winner")
+            print("=" * 80)
+            print(result.benchmark_winner or "No optimized query was significantly faster than the original.")
+
+        report = result.session_report
+        if report is not None:
+            print("\nToken Usage")
+            print("=" * 80)
+            for turn in report.turns:
+                compacted = f", {turn.compacted_exchanges} earlier exchanges compacted" if turn.compacted_exchanges else ""
+                print(
+                    f"Turn {turn.turn}: sent {turn.sent_tokens} tokens (raw {turn.raw_tokens}), prompt {turn.prompt_tokens} tokens{compacted}, received {turn.received_tokens} tokens"
+                )
+                if turn.llm_seconds:
+                    first_chunk = f", first chunk after {turn.first_chunk_seconds:.2f}s" if turn.first_chunk_seconds is not None else ""
+                    early_stop = ", stream stopped after the first JSON object" if turn.early_stops else ""
+                    print(f"    LLM {turn.llm_seconds:.2f}s{first_chunk}, client overhead {turn.client_seconds:.3f}s{early_stop}")
+
+            print(
+                f"Total: sent {report.sent_tokens}, prompt {report.prompt_tokens}, received {report.received_tokens}, saved by {report.encoding.lower()} encoding {report.saved_tokens} ({report.token_counter})"
+            )
+            if report.cached_prompt_tokens or report.unknown_usage_turns:
+                unknown = (
+                    f", unknown for {report.unknown_usage_turns} turns whose stream stopped before the provider reported usage" if report.unknown_usage_turns else ""
+                )
+                print(f"Provider prompt cache: {report.cached_prompt_tokens} cached, {report.uncached_prompt_tokens} uncached prompt tokens{unknown}")
+
         print()
+
+    @classmethod
+    def _print_benchmark(cls, *, name: str, benchmark: QueryBenchmark) -> None:
+        if benchmark.error is not None:
+            print(f"{name}: {'timed out' if benchmark.timed_out else benchmark.error}")
+            return
+
+        print(
+            f"{name}: p50 {benchmark.p50_ms:,.2f}ms, p95 {benchmark.p95_ms:,.2f}ms, db hits {benchmark.db_hits:,}, "
+            f"page cache hits/misses {benchmark.page_cache_hits:,}/{benchmark.page_cache_misses:,}, rows {benchmark.rows:,}"
+        )
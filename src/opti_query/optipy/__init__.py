@@ -1,4 +1,4 @@
-from .llm_clients import ILLMClient, GeminiClient, ChatGPTClient
+from .llm_clients import ILLMClient, IAsyncLLMClient, GeminiClient, AsyncGeminiClient, ChatGPTClient, AsyncChatGPTClient
 from .queries import (
     IQueryRunner,
     Neo4jExplainQueryRunner,
@@ -6,4 +6,7 @@ from .queries import (
     Neo4jLabelCountQueryRunner,
     Neo4jRelBetweenLabelsCountQueryRunner,
     Neo4jPropertiesForLabelsRunner,
+    Neo4jPropertySelectivityRunner,
+    Neo4jDegreeDistributionRunner,
+    Neo4jSchemaDetailsRunner,
 )
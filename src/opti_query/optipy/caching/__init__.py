@@ -0,0 +1,2 @@
+from .answers import AnswerCache, AnswerCacheSettings, AnswerCacheStats
+from .schema import SchemaCache, SchemaCacheSettings, SchemaSnapshot
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+import typing
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from pydantic import BaseModel
+
+from ..definitions import DbContext
+
+
+class AnswerCacheSettings(BaseModel):
+    enabled: bool = True
+    max_size: int = 2048
+    ttl_seconds: float = 60 * 60
+
+
+class AnswerCacheStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AnswerCache:
+    _ENTRIES: "OrderedDict[typing.Hashable, typing.Tuple[float, str]]" = OrderedDict()
+    _IN_FLIGHT: typing.Dict[typing.Hashable, Future] = {}
+    _LOCK = threading.Lock()
+    _SETTINGS = AnswerCacheSettings()
+    _HITS = 0
+    _MISSES = 0
+    _EVICTIONS = 0
+
+    @classmethod
+    def configure(cls, *, settings: AnswerCacheSettings) -> None:
+        with cls._LOCK:
+            cls._SETTINGS = settings
+            cls._evict_overflow()
+
+    @classmethod
+    def get_or_compute(
+        cls,
+        *,
+        db_context: DbContext,
+        key: typing.Optional[typing.Hashable],
+        compute: typing.Callable[[], str],
+        record_stats: bool = True,
+    ) -> str:
+        if key is None or not cls._SETTINGS.enabled:
+            return compute()
+
+        full_key = cls._get_full_key(db_context=db_context, key=key)
+        cached, in_flight, owned = cls._claim(full_key=full_key, record_stats=record_stats)
+        if cached is not None:
+            return cached
+
+        if not owned:
+            try:
+                return in_flight.result()
+
+            except Exception:
+                return compute()
+
+        try:
+            value = compute()
+
+        except BaseException as e:
+            cls._release(full_key=full_key, future=in_flight, exception=e)
+            raise
+
+        cls._release(full_key=full_key, future=in_flight, value=value)
+        return value
+
+    @classmethod
+    async def get_or_compute_async(
+        cls,
+        *,
+        db_context: DbContext,
+        key: typing.Optional[typing.Hashable],
+        compute: typing.Callable[[], typing.Awaitable[str]],
+        record_stats: bool = True,
+    ) -> str:
+        if key is None or not cls._SETTINGS.enabled:
+            return await compute()
+
+        full_key = cls._get_full_key(db_context=db_context, key=key)
+        cached, in_flight, owned = cls._claim(full_key=full_key, record_stats=record_stats)
+        if cached is not None:
+            return cached
+
+        if not owned:
+            try:
+                return await asyncio.wrap_future(in_flight)
+
+            except Exception:
+                return await compute()
+
+        try:
+            value = await compute()
+
+        except BaseException as e:
+            cls._release(full_key=full_key, future=in_flight, exception=e)
+            raise
+
+        cls._release(full_key=full_key, future=in_flight, value=value)
+        return value
+
+    @classmethod
+    def get(cls, *, full_key: typing.Hashable, record_stats: bool = True) -> typing.Optional[str]:
+        with cls._LOCK:
+            return cls._get_locked(full_key=full_key, record_stats=record_stats)
+
+    @classmethod
+    def _get_locked(cls, *, full_key: typing.Hashable, record_stats: bool) -> typing.Optional[str]:
+        entry = cls._ENTRIES.get(full_key)
+        if entry is not None and time.monotonic() - entry[0] > cls._SETTINGS.ttl_seconds:
+            del cls._ENTRIES[full_key]
+            entry = None
+
+        if entry is None:
+            if record_stats:
+                cls._MISSES += 1
+
+            return None
+
+        cls._ENTRIES.move_to_end(full_key)
+        if record_stats:
+            cls._HITS += 1
+
+        return entry[1]
+
+    @classmethod
+    def _claim(cls, *, full_key: typing.Hashable, record_stats: bool) -> typing.Tuple[typing.Optional[str], typing.Optional[Future], bool]:
+        with cls._LOCK:
+            in_flight = cls._IN_FLIGHT.get(full_key)
+            if in_flight is not None:
+                if record_stats:
+                    cls._HITS += 1
+
+                return None, in_flight, False
+
+            cached = cls._get_locked(full_key=full_key, record_stats=record_stats)
+            if cached is not None:
+                return cached, None, False
+
+            in_flight = Future()
+            cls._IN_FLIGHT[full_key] = in_flight
+            return None, in_flight, True
+
+    @classmethod
+    def _release(
+        cls,
+        *,
+        full_key: typing.Hashable,
+        future: Future,
+        value: typing.Optional[str] = None,
+        exception: typing.Optional[BaseException] = None,
+    ) -> None:
+        with cls._LOCK:
+            cls._IN_FLIGHT.pop(full_key, None)
+            if exception is None:
+                cls._put_locked(full_key=full_key, value=value)
+
+        if exception is None:
+            future.set_result(value)
+
+        elif isinstance(exception, Exception):
+            future.set_exception(exception)
+
+        else:
+            future.set_exception(RuntimeError(f"Computation was interrupted: {exception!r}"))
+
+    @classmethod
+    def contains(cls, *, db_context: DbContext, key: typing.Hashable) -> bool:
+        full_key = cls._get_full_key(db_context=db_context, key=key)
+        with cls._LOCK:
+            return full_key in cls._IN_FLIGHT or cls._get_locked(full_key=full_key, record_stats=False) is not None
+
+    @classmethod
+    def put(cls, *, full_key: typing.Hashable, value: str) -> None:
+        with cls._LOCK:
+            cls._put_locked(full_key=full_key, value=value)
+
+    @classmethod
+    def _put_locked(cls, *, full_key: typing.Hashable, value: str) -> None:
+        cls._ENTRIES[full_key] = (time.monotonic(), value)
+        cls._ENTRIES.move_to_end(full_key)
+        cls._evict_overflow()
+
+    @classmethod
+    def get_stats(cls) -> AnswerCacheStats:
+        with cls._LOCK:
+            return AnswerCacheStats(hits=cls._HITS, misses=cls._MISSES, evictions=cls._EVICTIONS, size=len(cls._ENTRIES))
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._LOCK:
+            cls._ENTRIES.clear()
+            cls._HITS = 0
+            cls._MISSES = 0
+            cls._EVICTIONS = 0
+
+    @classmethod
+    def _get_full_key(cls, *, db_context: DbContext, key: typing.Hashable) -> typing.Hashable:
+        return db_context.host, db_context.database, key
+
+    @classmethod
+    def _evict_overflow(cls) -> None:
+        while len(cls._ENTRIES) > cls._SETTINGS.max_size:
+            cls._ENTRIES.popitem(last=False)
+            cls._EVICTIONS += 1
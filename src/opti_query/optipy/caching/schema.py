@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import typing
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ..definitions import DbContext
+
+
+class SchemaCacheSettings(BaseModel):
+    ttl_seconds: float = 24 * 60 * 60
+    revalidate_after_seconds: float = 60.0
+    persist: bool = True
+    cache_dir: Path = Path.home() / ".optiquery" / "schema_cache"
+
+
+class SchemaSnapshot(BaseModel):
+    host: str
+    database: str
+    fingerprint: str
+    created_at: float
+    schema_data: typing.Dict[str, typing.Any]
+
+
+class SchemaCache:
+    _SNAPSHOTS: typing.Dict[typing.Tuple[str, str], SchemaSnapshot] = {}
+    _VALIDATED_AT: typing.Dict[typing.Tuple[str, str], float] = {}
+    _KEY_LOCKS: typing.Dict[typing.Tuple[str, str], threading.Lock] = {}
+    _ASYNC_KEY_LOCKS: typing.Dict[typing.Tuple[typing.Tuple[str, str], asyncio.AbstractEventLoop], asyncio.Lock] = {}
+    _LOCK = threading.Lock()
+    _SETTINGS = SchemaCacheSettings()
+
+    @classmethod
+    def configure(cls, *, settings: SchemaCacheSettings) -> None:
+        cls._SETTINGS = settings
+
+    @classmethod
+    def get_or_load(
+        cls,
+        *,
+        db_context: DbContext,
+        fingerprint: typing.Callable[[], str],
+        loader: typing.Callable[[], typing.Dict[str, typing.Any]],
+    ) -> typing.Dict[str, typing.Any]:
+        key = cls._get_key(db_context=db_context)
+        with cls._get_key_lock(key=key):
+            snapshot = cls._get_live_snapshot(key=key)
+            if snapshot is not None and cls._is_recently_validated(key=key):
+                return snapshot.schema_data
+
+            current_fingerprint = fingerprint()
+            if snapshot is not None and current_fingerprint == snapshot.fingerprint:
+                return cls._mark_validated(key=key, snapshot=snapshot).schema_data
+
+            return cls._store(key=key, db_context=db_context, fingerprint=current_fingerprint, schema_data=loader()).schema_data
+
+    @classmethod
+    async def get_or_load_async(
+        cls,
+        *,
+        db_context: DbContext,
+        fingerprint: typing.Callable[[], typing.Awaitable[str]],
+        loader: typing.Callable[[], typing.Awaitable[typing.Dict[str, typing.Any]]],
+    ) -> typing.Dict[str, typing.Any]:
+        key = cls._get_key(db_context=db_context)
+        async with cls._get_async_key_lock(key=key):
+            snapshot = cls._get_live_snapshot(key=key)
+            if snapshot is not None and cls._is_recently_validated(key=key):
+                return snapshot.schema_data
+
+            current_fingerprint = await fingerprint()
+            if snapshot is not None and current_fingerprint == snapshot.fingerprint:
+                return cls._mark_validated(key=key, snapshot=snapshot).schema_data
+
+            return cls._store(key=key, db_context=db_context, fingerprint=current_fingerprint, schema_data=await loader()).schema_data
+
+    @classmethod
+    def _get_live_snapshot(cls, *, key: typing.Tuple[str, str]) -> typing.Optional[SchemaSnapshot]:
+        snapshot = cls._SNAPSHOTS.get(key) or cls._read_from_disk(key=key)
+        if snapshot is None or time.time() - snapshot.created_at >= cls._SETTINGS.ttl_seconds:
+            return None
+
+        return snapshot
+
+    @classmethod
+    def _is_recently_validated(cls, *, key: typing.Tuple[str, str]) -> bool:
+        return time.time() - cls._VALIDATED_AT.get(key, 0.0) < cls._SETTINGS.revalidate_after_seconds
+
+    @classmethod
+    def _mark_validated(cls, *, key: typing.Tuple[str, str], snapshot: SchemaSnapshot) -> SchemaSnapshot:
+        cls._SNAPSHOTS[key] = snapshot
+        cls._VALIDATED_AT[key] = time.time()
+        return snapshot
+
+    @classmethod
+    def _store(
+        cls,
+        *,
+        key: typing.Tuple[str, str],
+        db_context: DbContext,
+        fingerprint: str,
+        schema_data: typing.Dict[str, typing.Any],
+    ) -> SchemaSnapshot:
+        snapshot = SchemaSnapshot(host=db_context.host, database=db_context.database, fingerprint=fingerprint, created_at=time.time(), schema_data=schema_data)
+        cls._write_to_disk(key=key, snapshot=snapshot)
+        return cls._mark_validated(key=key, snapshot=snapshot)
+
+    @classmethod
+    def invalidate(cls, *, db_context: DbContext) -> None:
+        key = cls._get_key(db_context=db_context)
+        with cls._get_key_lock(key=key):
+            cls._SNAPSHOTS.pop(key, None)
+            cls._VALIDATED_AT.pop(key, None)
+            path = cls._get_path(key=key)
+            if path.exists():
+                path.unlink()
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._LOCK:
+            cls._SNAPSHOTS.clear()
+            cls._VALIDATED_AT.clear()
+
+    @classmethod
+    def _get_key(cls, *, db_context: DbContext) -> typing.Tuple[str, str]:
+        return db_context.host, db_context.database
+
+    @classmethod
+    def _get_key_lock(cls, *, key: typing.Tuple[str, str]) -> threading.Lock:
+        with cls._LOCK:
+            if key not in cls._KEY_LOCKS:
+                cls._KEY_LOCKS[key] = threading.Lock()
+
+            return cls._KEY_LOCKS[key]
+
+    @classmethod
+    def _get_async_key_lock(cls, *, key: typing.Tuple[str, str]) -> asyncio.Lock:
+        lock_key = (key, asyncio.get_running_loop())
+        with cls._LOCK:
+            if lock_key not in cls._ASYNC_KEY_LOCKS:
+                cls._ASYNC_KEY_LOCKS[lock_key] = asyncio.Lock()
+
+            return cls._ASYNC_KEY_LOCKS[lock_key]
+
+    @classmethod
+    def _get_path(cls, *, key: typing.Tuple[str, str]) -> Path:
+        digest = hashlib.sha256("|".join(key).encode()).hexdigest()
+        return cls._SETTINGS.cache_dir / f"{digest}.json"
+
+    @classmethod
+    def _read_from_disk(cls, *, key: typing.Tuple[str, str]) -> typing.Optional[SchemaSnapshot]:
+        if not cls._SETTINGS.persist:
+            return None
+
+        path = cls._get_path(key=key)
+        try:
+            return SchemaSnapshot.model_validate_json(path.read_text())
+
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def _write_to_disk(cls, *, key: typing.Tuple[str, str], snapshot: SchemaSnapshot) -> None:
+        if not cls._SETTINGS.persist:
+            return
+
+        path = cls._get_path(key=key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(snapshot.model_dump_json())
+            os.replace(tmp_path, path)
+
+        except OSError:
+            pass
+
+    @classmethod
+    def build_fingerprint(cls, *, parts: typing.Iterable[typing.Any]) -> str:
+        return hashlib.sha256(json.dumps(list(parts), sort_keys=True, default=str).encode()).hexdigest()
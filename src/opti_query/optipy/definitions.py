@@ -2,7 +2,7 @@ import abc
 import enum
 import typing
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from .exceptions import OutOfSchemaRequest
 
@@ -13,6 +13,12 @@ class OptiModel(BaseModel):
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
         raise NotImplementedError
 
+    @classmethod
+    def get_request_schema(cls) -> typing.Dict[str, typing.Any]:
+        schema = cls.model_json_schema()
+        properties = {name: {key: value for key, value in prop.items() if key not in ("title", "default")} for name, prop in schema["properties"].items()}
+        return {"type": "object", "properties": properties, "required": schema.get("required", []), "additionalProperties": False}
+
 
 class DbTypes(enum.StrEnum):
     NEO4J = "NEO4J"
@@ -23,9 +29,36 @@ class LlmTypes(enum.StrEnum):
     CHATGPT = "CHATGPT"
 
 
+class VerificationStatus(enum.StrEnum):
+    VERIFIED = "VERIFIED"
+    MISMATCHED = "MISMATCHED"
+    INCONCLUSIVE = "INCONCLUSIVE"
+
+
+class QueryBenchmark(BaseModel):
+    runs: int = 0
+    latencies_ms: typing.List[float] = []
+    p50_ms: typing.Optional[float] = None
+    p95_ms: typing.Optional[float] = None
+    db_hits: typing.Optional[int] = None
+    page_cache_hits: typing.Optional[int] = None
+    page_cache_misses: typing.Optional[int] = None
+    rows: typing.Optional[int] = None
+    timed_out: bool = False
+    error: typing.Optional[str] = None
+
+
 class OptimizedQuery(OptiModel):
     query: str
     explanation: str
+    estimated_cost: typing.Optional[float] = None
+    slower_than_original: typing.Optional[bool] = None
+    evaluation_error: typing.Optional[str] = None
+    benchmark: typing.Optional[QueryBenchmark] = None
+    benchmark_p_value: typing.Optional[float] = None
+    significantly_faster: typing.Optional[bool] = None
+    verification: typing.Optional[VerificationStatus] = None
+    verification_detail: typing.Optional[str] = None
 
     @classmethod
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
@@ -46,9 +79,63 @@ class OptimizedQuery(OptiModel):
             raise OutOfSchemaRequest(reason=f"'explanation' key in data of request type {QueryTypes.OPTIMIZE_FINISHED.value} must be str")
 
 
+class TurnReport(BaseModel):
+    turn: int
+    raw_tokens: int = 0
+    sent_tokens: int = 0
+    received_tokens: int = 0
+    prompt_tokens: int = 0
+    provider_prompt_tokens: typing.Optional[int] = 0
+    cached_prompt_tokens: typing.Optional[int] = 0
+    compacted_exchanges: int = 0
+    invalid_replies: int = 0
+    early_stops: int = 0
+    client_seconds: float = 0.0
+    llm_seconds: float = 0.0
+    first_chunk_seconds: typing.Optional[float] = None
+
+
+class SessionReport(BaseModel):
+    encoding: str
+    token_counter: str
+    turns: typing.List[TurnReport] = []
+
+    @property
+    def sent_tokens(self) -> int:
+        return sum(turn.sent_tokens for turn in self.turns)
+
+    @property
+    def saved_tokens(self) -> int:
+        return sum(turn.raw_tokens - turn.sent_tokens for turn in self.turns)
+
+    @property
+    def received_tokens(self) -> int:
+        return sum(turn.received_tokens for turn in self.turns)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(turn.prompt_tokens for turn in self.turns)
+
+    @property
+    def cached_prompt_tokens(self) -> int:
+        return sum(turn.cached_prompt_tokens for turn in self.turns if turn.cached_prompt_tokens is not None)
+
+    @property
+    def uncached_prompt_tokens(self) -> int:
+        return sum(turn.provider_prompt_tokens - turn.cached_prompt_tokens for turn in self.turns if turn.provider_prompt_tokens is not None)
+
+    @property
+    def unknown_usage_turns(self) -> int:
+        return sum(1 for turn in self.turns if turn.provider_prompt_tokens is None)
+
+
 class OptimizationResponse(OptiModel):
     optimized_queries_and_explains: typing.List[OptimizedQuery]
     suggestions: typing.List[str]
+    original_estimated_cost: typing.Optional[float] = None
+    original_benchmark: typing.Optional[QueryBenchmark] = None
+    benchmark_winner: typing.Optional[str] = None
+    session_report: typing.Optional[SessionReport] = None
 
     @classmethod
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
@@ -64,8 +151,79 @@ class OptimizationResponse(OptiModel):
         if not isinstance(data["suggestions"], list):
             raise OutOfSchemaRequest(reason=f"Value of key 'labels' in data of request with query_type: {QueryTypes.OPTIMIZE_FINISHED.value} must be list of str.")
 
+    @classmethod
+    def get_request_schema(cls) -> typing.Dict[str, typing.Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "optimized_queries_and_explains": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"query": {"type": "string"}, "explanation": {"type": "string"}},
+                        "required": ["query", "explanation"],
+                        "additionalProperties": False,
+                    },
+                },
+                "suggestions": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["optimized_queries_and_explains", "suggestions"],
+            "additionalProperties": False,
+        }
+
+
+class MultiQuestionRequest(OptiModel):
+    MAX_QUESTIONS: typing.ClassVar[int] = 10
+
+    questions: typing.List[typing.Dict[str, typing.Any]]
+
+    @classmethod
+    def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
+        if "questions" not in data:
+            raise OutOfSchemaRequest(reason=f"Request with query_type: {QueryTypes.MULTI_QUESTION.value} must contain 'questions' key in data.")
+
+        if not isinstance(data["questions"], list) or not data["questions"]:
+            raise OutOfSchemaRequest(reason=f"Value of key 'questions' in data of request with query_type: {QueryTypes.MULTI_QUESTION.value} must be a non empty list.")
+
+        if len(data["questions"]) > cls.MAX_QUESTIONS:
+            raise OutOfSchemaRequest(reason=f"Request with query_type: {QueryTypes.MULTI_QUESTION.value} may contain at most {cls.MAX_QUESTIONS} questions.")
+
+        for question in data["questions"]:
+            if not isinstance(question, dict):
+                raise OutOfSchemaRequest(reason=f"Every question in request with query_type: {QueryTypes.MULTI_QUESTION.value} must be a JSON object.")
+
+        if len(data.keys()) > 1:
+            keys = ", ".join(key for key in data.keys() if key != "questions")
+            raise OutOfSchemaRequest(
+                reason=f"Request with query_type: {QueryTypes.MULTI_QUESTION.value} must contain only 'questions' key in data, request contains {keys}."
+            )
+
+
+class WorkloadStatus(enum.StrEnum):
+    OK = "OK"
+    ERROR = "ERROR"
+
+
+class WorkloadResult(BaseModel):
+    query: str
+    status: WorkloadStatus
+    duration_seconds: float
+    optimization: typing.Optional[OptimizationResponse] = None
+    error: typing.Optional[str] = None
+
+
+class WorkloadSummary(BaseModel):
+    total_queries: int
+    unique_queries: int
+    skipped_queries: int
+    succeeded: int
+    failed: int
+    output_path: str
+
 
 class DbContext(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     password: str
     host: str
     username: str
@@ -75,6 +233,7 @@ class DbContext(BaseModel):
 class QueryTypes(enum.StrEnum):
     # general
     OPTIMIZE_FINISHED = "OPTIMIZE_FINISHED"
+    MULTI_QUESTION = "MULTI_QUESTION"
 
     # neo4j
     NEO4J_OPENING_QUERY = "NEO4J_OPENING_QUERY"
@@ -82,7 +241,12 @@ class QueryTypes(enum.StrEnum):
     NEO4J_REL_BETWEEN_NODES_COUNT = "NEO4J_REL_BETWEEN_NODES_COUNT"
     NEO4J_EXPLAIN_QUERY = "NEO4J_EXPLAIN_QUERY"
     NEO4J_PROPERTIES_FOR_LABELS = "NEO4J_PROPERTIES_FOR_LABELS"
+    NEO4J_PROPERTY_SELECTIVITY = "NEO4J_PROPERTY_SELECTIVITY"
+    NEO4J_DEGREE_DISTRIBUTION = "NEO4J_DEGREE_DISTRIBUTION"
+    NEO4J_SCHEMA_DETAILS = "NEO4J_SCHEMA_DETAILS"
+
 
+ANSWER_ENCODING_PLACEHOLDER = "<<ANSWER_ENCODING>>"
 
 DB_TYPE_TO_SYSTEM_INSTRUCTIONS = {
     DbTypes.NEO4J: """
@@ -113,6 +277,12 @@ Let's first check the properties of Child:
 
 Do not wrap the JSON in Markdown. Do not provide any text. Send only the JSON. Treat this as a strict machine protocol.
 
+BATCH YOUR QUESTIONS
+Every message costs a full round trip, so whenever you need several answers that do not depend on each other, send them together in a single MULTI_QUESTION message (template 8). The questions are executed concurrently and answered in one combined reply. Only ask a question alone when it depends on an answer you do not have yet.
+
+ANSWER ENCODING
+<<ANSWER_ENCODING>>
+
 CONTEXT (always arrives first)
 1. original_query – the Cypher text to optimise.  
 2. db_stats – an object that contains:  
@@ -120,6 +290,11 @@ CONTEXT (always arrives first)
    • indexes                        — [{"label": "Label", "property": "prop"}, …]  
    • constraints                    — [{"label": "Label", "property": "prop"}, …]  
    • rel_count_by_type              — {relType → int}
+   • omitted                        — present when db_stats was pruned to the query's labels, their one-hop rel types and related indexed labels; counts what was left out (fetch it with NEO4J_SCHEMA_DETAILS)  
+   • label_cooccurrence             — for the labels in original_query plus every indexed label:  
+       overlaps  — {label → {other label → % of label's nodes that also carry other label}}  
+       subsets   — [{"label": "X", "subset_of": "Y"}, …] every X node is also a Y (exact counts, a valid proof)  
+       likely_subsets replaces subsets when "exact" is false (sampled on very large graphs; confirm with a count before relying on it)
 
 TASK FLOW
 1. Bottleneck scan  
@@ -127,6 +302,8 @@ TASK FLOW
    • For every label + property in WHERE, MATCH, MERGE, or ORDER BY, verify an index exists.  
    • If an index is missing, ask a question that could reveal a better-indexed alternative (label overlap, property distribution, etc.).  
    • If a relationship pattern is used, verify the matching rel-type statistics; otherwise ask for them.
+   • For multi-hop or variable-length patterns, ask NEO4J_DEGREE_DISTRIBUTION for each side to decide the expansion order.
+   • For the filters the plan will depend on, ask NEO4J_PROPERTY_SELECTIVITY to learn how many nodes each one really keeps.
 
 2. Hypothesis building  
    • After each answer, update your mental model. If new data contradicts an earlier assumption, ask another question.  
@@ -143,7 +320,8 @@ QUESTION TEMPLATES
   "query_type": "NEO4J_COUNT_NODES_WITH_LABELS",
   "data": { "labels": ["Label1", "Label2"] }
 }
-→ returns int
+→ returns int, or {"estimate": int, "ci95": [low, high], "upper_bound": int, "sampled_nodes": int} when an exact count does not fit the time budget
+  (if no sample finishes either, "estimate" is null, "ci95" is [0, upper_bound] and "reason" explains why)
 
 2. Property distribution for labels  
 {
@@ -153,10 +331,11 @@ QUESTION TEMPLATES
 → returns  
 {
   "propName": [
-    {"type": "TypeName", "percentage": 73.0}
+    {"type": "TypeName", "percentage": "73.0%", "ci95": ["70.1%", "75.8%"]}
   ],
   …
 }
+(computed on a uniform random sample; ci95 is the 95 % confidence interval)
 
 3. Average count of a relationship between two label sets  
 {
@@ -167,14 +346,73 @@ QUESTION TEMPLATES
     "rel_type": "REL_TYPE"
   }
 }
-→ returns int
+→ returns int, or an estimate object like template 1
+(either label list may be empty to count the relationship regardless of that endpoint)
 
 4. EXPLAIN a candidate query  
 {
   "query_type": "NEO4J_EXPLAIN_QUERY",
   "data": { "query": "MATCH …" }
 }
-→ returns the Neo4j EXPLAIN plan
+→ returns a structured plan summary: fingerprint (equal fingerprints mean equal plans), estimated_result_rows, total_estimated_rows (rows flowing through every operator, a proxy for work), scans, seeks, index_usage, cartesian_products, eager_operators and the operators list (depth, operator, estimated_rows, details)
+
+5. Selectivity of properties on a label set ("properties" is optional, defaults to all)  
+{
+  "query_type": "NEO4J_PROPERTY_SELECTIVITY",
+  "data": { "labels": ["Label1"], "properties": ["prop1", "prop2"] }
+}
+→ returns  
+{
+  "prop1": {
+    "existence_rate": "92.5%",
+    "existence_ci95": ["91.7%", "93.2%"],
+    "estimated_distinct": 48210,
+    "most_common_values": [{"value": "x", "percentage": "4.1%"}, …],
+    "histogram": {"bounds": [min, …, max], "estimated_nodes_per_bucket": 9100}
+  },
+  …
+}
+(histogram only for numeric / temporal properties; equi-depth, so every bucket holds about the same number of nodes)
+Use it to judge how selective an equality or range filter is before choosing an index or rewrite.
+
+6. Degree distribution of a relationship type around a label set  
+{
+  "query_type": "NEO4J_DEGREE_DISTRIBUTION",
+  "data": { "labels": ["Label1"], "rel_type": "REL_TYPE" }
+}
+→ returns  
+{
+  "sampled_nodes": 5000,
+  "population": 120000,
+  "out_degree": {"avg": 3.2, "p50": 2, "p99": 40, "max": 310},
+  "in_degree":  {"avg": 0.4, "p50": 0, "p99": 6, "max": 18},
+  "top_supernodes": [{"element_id": "…", "labels": ["Label1"], "out_degree": 310, "in_degree": 2}, …],
+  "top_supernodes_source": "population"
+}
+(out = (:Label1)-[:REL_TYPE]->(), in = (:Label1)<-[:REL_TYPE]-(); the degree statistics are computed on a uniform random sample, so "max" is the sample maximum.
+top_supernodes are the highest-degree nodes of the whole label set; if that scan fails, top_supernodes_source is "sample" and they are the sample maxima only)
+Use it to choose the expansion direction and start point: expand from the side with the lower degree, and watch for supernodes that blow up expansions.
+
+7. Schema details that were left out of db_stats  
+{
+  "query_type": "NEO4J_SCHEMA_DETAILS",
+  "data": { "labels": ["Label1"], "rel_types": ["REL_TYPE"] }
+}
+→ returns node_count, relationship_count, indexes and constraints for exactly those labels / rel types  
+(send empty lists to get the names of every label and relationship type in the database)
+
+8. Several independent questions in one message (up to 10, any of the single-question templates)  
+{
+  "query_type": "MULTI_QUESTION",
+  "data": {
+    "questions": [
+      { "query_type": "NEO4J_COUNT_NODES_WITH_LABELS", "data": { "labels": ["Label1"] } },
+      { "query_type": "NEO4J_COUNT_NODES_WITH_LABELS", "data": { "labels": ["Label1", "Label2"] } },
+      { "query_type": "NEO4J_PROPERTIES_FOR_LABELS", "data": { "labels": ["Label1"] } }
+    ]
+  }
+}
+→ returns a list of {"question": …, "answer": …} in the same order
 
 TYPO & SYNTAX GUARDRAILS
 • Before asking questions, scan original_query for common human mistakes:  
@@ -201,14 +439,15 @@ INDEX / CONSTRAINT POLICY
 
 LABEL RELATIONSHIP INFERENCE
 • Nodes may carry multiple labels.  
-• If COUNT(X ∩ Y) equals COUNT(X), label X is a subset of label Y.  
+• If COUNT(X ∩ Y) equals COUNT(X), label X is a subset of label Y. An estimate is not a proof; only an exact int proves it.  
 • You may then query (:X:Y) to leverage an index on :Y(prop).  
 • Record the COUNT proof in your explanation whenever you use this optimisation.
 
 LABEL–INDEX ESCALATION RULES
 • For every property used in a filter on label L where L lacks an index on that property:  
   1. Scan the indexes list for any other label P that has an index on the same property.  
-  2. For each candidate P, run  
+  2. Look up label_cooccurrence first: an entry {"label": "L", "subset_of": "P"} in subsets already proves it with no extra question.  
+     Only for candidates missing there (or listed under likely_subsets), run (batch all candidates, together with COUNT(L), in one MULTI_QUESTION message)  
      {
        "query_type": "NEO4J_COUNT_NODES_WITH_LABELS",
        "data": { "labels": ["L", "P"] }
@@ -218,7 +457,7 @@ LABEL–INDEX ESCALATION RULES
 • If no candidate label qualifies, state that explicitly.
 
 QUESTION QUOTA
-• You must ask at least three discovery questions (any mix of templates 1-3) before you are allowed to emit OPTIMIZE_FINISHED.  
+• You must ask at least three discovery questions (any mix of templates 1-3, 5 and 6, alone or inside MULTI_QUESTION) before you are allowed to emit OPTIMIZE_FINISHED.  
 • NEO4J_EXPLAIN_QUERY does not count toward this quota.
 • You are not allowed to ask same question twice
 
@@ -241,7 +480,7 @@ MANDATORY CHECKLIST (all must be true before OPTIMIZE_FINISHED)
 
 GENERAL RULES
 • Never remove an existing filter unless you re-apply an equivalent filter elsewhere.  
-• One JSON question per turn; no extra text outside JSON questions.  
+• One JSON message per turn; put independent questions in one MULTI_QUESTION message; no extra text outside JSON questions.  
 • Stop asking questions once all checklist items are satisfied.
 
 WHEN DONE
@@ -0,0 +1,3 @@
+from .base import IResponseEncoder, ResponseEncodings, ENCODING_TO_RESPONSE_ENCODER
+from .encoders import CompactResponseEncoder, JsonResponseEncoder
+from .tokens import TokenCounter
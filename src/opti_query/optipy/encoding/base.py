@@ -0,0 +1,34 @@
+import abc
+import enum
+import inspect
+import typing
+
+
+class ResponseEncodings(enum.StrEnum):
+    COMPACT = "COMPACT"
+    JSON = "JSON"
+
+
+class IResponseEncoder(abc.ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            ENCODING_TO_RESPONSE_ENCODER[cls.get_encoding()] = cls
+
+    @classmethod
+    @abc.abstractmethod
+    def get_encoding(cls) -> ResponseEncodings:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def get_prompt_description(cls) -> str:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def encode(self, *, text: str) -> str:
+        raise NotImplementedError
+
+
+ENCODING_TO_RESPONSE_ENCODER: typing.Dict[ResponseEncodings, typing.Type[IResponseEncoder]] = {}
@@ -0,0 +1,82 @@
+import json
+import re
+import typing
+from json import JSONDecodeError
+
+from .base import IResponseEncoder, ResponseEncodings
+
+
+class JsonResponseEncoder(IResponseEncoder):
+    @classmethod
+    def get_encoding(cls) -> ResponseEncodings:
+        return ResponseEncodings.JSON
+
+    @classmethod
+    def get_prompt_description(cls) -> str:
+        return "Answers arrive as plain JSON, exactly as the database request produced them."
+
+    def encode(self, *, text: str) -> str:
+        return text
+
+
+class CompactResponseEncoder(IResponseEncoder):
+    MAX_TEXT_LENGTH = 4000
+    TABLE_BORDER_PATTERN = re.compile(r"^\s*\+[-+]*\+\s*$")
+    REPEATED_SPACES_PATTERN = re.compile(r" {2,}")
+    PLAN_TEXT_FIELDS = frozenset({"plan", "profile", "details"})
+
+    @classmethod
+    def get_encoding(cls) -> ResponseEncodings:
+        return ResponseEncodings.COMPACT
+
+    @classmethod
+    def get_prompt_description(cls) -> str:
+        return (
+            'Answers are compacted to save tokens: a list of objects that share the same keys arrives as {"columns": [...], "rows": [[...], …]}, '
+            "a list of single-key objects arrives merged into one object, and very long texts (such as plans) are truncated."
+        )
+
+    def encode(self, *, text: str) -> str:
+        try:
+            value = json.loads(text)
+
+        except JSONDecodeError:
+            return self._encode_text(text=text)
+
+        if not isinstance(value, (dict, list)):
+            return text
+
+        return json.dumps(self._compact(value=value), separators=(",", ":"), ensure_ascii=False)
+
+    def _compact(self, *, value: typing.Any, field: typing.Optional[str] = None) -> typing.Any:
+        if isinstance(value, dict):
+            return {key: self._compact(value=item, field=key) for key, item in value.items()}
+
+        if isinstance(value, str):
+            return self._encode_text(text=value) if field in self.PLAN_TEXT_FIELDS and "\n" in value else value
+
+        if not isinstance(value, list):
+            return value
+
+        items = [self._compact(value=item, field=field) for item in value]
+        if not items or not all(isinstance(item, dict) for item in items):
+            return items
+
+        if all(len(item) == 1 for item in items):
+            merged = {key: item[key] for item in items for key in item}
+            if len(merged) == len(items):
+                return merged
+
+        columns = list(items[0].keys())
+        if len(items) > 1 and all(list(item.keys()) == columns for item in items):
+            return {"columns": columns, "rows": [[item[column] for column in columns] for item in items]}
+
+        return items
+
+    def _encode_text(self, *, text: str) -> str:
+        lines = [self.REPEATED_SPACES_PATTERN.sub(" ", line.rstrip()) for line in text.splitlines() if not self.TABLE_BORDER_PATTERN.match(line)]
+        compacted = "\n".join(lines)
+        if len(compacted) > self.MAX_TEXT_LENGTH:
+            compacted = f"{compacted[: self.MAX_TEXT_LENGTH]}\n… {len(compacted) - self.MAX_TEXT_LENGTH} more characters truncated"
+
+        return compacted
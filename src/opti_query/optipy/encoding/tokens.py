@@ -0,0 +1,27 @@
+import typing
+
+try:
+    import tiktoken
+
+except ImportError:
+    tiktoken = None
+
+
+class TokenCounter:
+    ENCODING_NAME = "o200k_base"
+    CHARS_PER_TOKEN = 4
+    _ENCODING: typing.Optional[typing.Any] = None
+
+    @classmethod
+    def get_method(cls) -> str:
+        return "tiktoken" if tiktoken is not None else "estimate"
+
+    @classmethod
+    def count(cls, *, text: str) -> int:
+        if tiktoken is None:
+            return -(-len(text) // cls.CHARS_PER_TOKEN)
+
+        if cls._ENCODING is None:
+            cls._ENCODING = tiktoken.get_encoding(cls.ENCODING_NAME)
+
+        return len(cls._ENCODING.encode(text, disallowed_special=()))
@@ -0,0 +1,16 @@
+from .base import (
+    IQueryRanker,
+    IQueryBenchmarker,
+    IQueryVerifier,
+    IQueryLoadTester,
+    BenchmarkSettings,
+    VerificationSettings,
+    LoadTestSettings,
+    LoadTestResult,
+    LoadTestReport,
+    DB_TYPE_TO_QUERY_RANKER,
+    DB_TYPE_TO_QUERY_BENCHMARKER,
+    DB_TYPE_TO_QUERY_VERIFIER,
+    DB_TYPE_TO_QUERY_LOAD_TESTER,
+)
+from .neo4j import Neo4jQueryRanker, Neo4jQueryBenchmarker, Neo4jQueryVerifier, Neo4jQueryLoadTester
@@ -0,0 +1,513 @@
+import abc
+import asyncio
+import inspect
+import itertools
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+from ..definitions import DbContext, DbTypes, OptimizationResponse, QueryBenchmark, VerificationStatus
+from ..utils.hashing import ResultDigest
+from ..utils.plans import ProfileTotals
+from ..utils.sampling import SamplingUtils
+
+
+class BenchmarkSettings(BaseModel):
+    warmup_runs: int = 2
+    repetitions: int = 10
+    timeout_seconds: float = 30
+    significance_level: float = 0.05
+
+
+class VerificationSettings(BaseModel):
+    max_rows: int = 100000
+    timeout_seconds: float = 30
+
+
+class LoadTestSettings(BaseModel):
+    concurrency: int = 8
+    duration_seconds: float = 30
+    warmup_seconds: float = 5
+    timeout_seconds: float = 30
+
+
+class LoadTestResult(BaseModel):
+    query: str
+    requests: int
+    errors: int
+    error_rate: float
+    throughput_per_second: float
+    p50_ms: typing.Optional[float] = None
+    p95_ms: typing.Optional[float] = None
+    p99_ms: typing.Optional[float] = None
+    first_error: typing.Optional[str] = None
+
+
+class LoadTestReport(BaseModel):
+    concurrency: int
+    duration_seconds: float
+    parameter_sets: int
+    original: LoadTestResult
+    candidates: typing.List[LoadTestResult]
+
+
+class IQueryRanker(abc.ABC):
+    SLOWER_TOLERANCE = 0.05
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            DB_TYPE_TO_QUERY_RANKER[cls.get_db_type()] = cls
+
+    @classmethod
+    @abc.abstractmethod
+    def get_db_type(cls) -> DbTypes:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def estimate_cost(cls, *, db_context: DbContext, query: str) -> float:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    async def estimate_cost_async(cls, *, db_context: DbContext, query: str) -> float:
+        raise NotImplementedError
+
+    @classmethod
+    def rank(cls, *, db_context: DbContext, query: str, optimization: OptimizationResponse) -> OptimizationResponse:
+        queries = [query, *(candidate.query for candidate in optimization.optimized_queries_and_explains)]
+        costs = []
+        for candidate_query in queries:
+            try:
+                costs.append(cls.estimate_cost(db_context=db_context, query=candidate_query))
+
+            except Exception as e:
+                costs.append(e)
+
+        return cls._apply_costs(optimization=optimization, costs=costs)
+
+    @classmethod
+    async def rank_async(cls, *, db_context: DbContext, query: str, optimization: OptimizationResponse) -> OptimizationResponse:
+        queries = [query, *(candidate.query for candidate in optimization.optimized_queries_and_explains)]
+        costs = await asyncio.gather(*(cls.estimate_cost_async(db_context=db_context, query=candidate_query) for candidate_query in queries), return_exceptions=True)
+        return cls._apply_costs(optimization=optimization, costs=list(costs))
+
+    @classmethod
+    def _apply_costs(cls, *, optimization: OptimizationResponse, costs: typing.List[typing.Union[float, BaseException]]) -> OptimizationResponse:
+        original_cost, *candidate_costs = costs
+        if not isinstance(original_cost, BaseException):
+            optimization.original_estimated_cost = original_cost
+
+        for candidate, cost in zip(optimization.optimized_queries_and_explains, candidate_costs):
+            if isinstance(cost, BaseException):
+                candidate.evaluation_error = f"{type(cost).__name__}: {cost}"
+                continue
+
+            candidate.estimated_cost = cost
+            if optimization.original_estimated_cost is not None:
+                candidate.slower_than_original = cost > optimization.original_estimated_cost * (1 + cls.SLOWER_TOLERANCE)
+
+        optimization.optimized_queries_and_explains.sort(key=lambda candidate: (candidate.estimated_cost is None, candidate.estimated_cost or 0.0))
+        return optimization
+
+
+DB_TYPE_TO_QUERY_RANKER: typing.Dict[DbTypes, typing.Type[IQueryRanker]] = {}
+
+
+class IQueryBenchmarker(abc.ABC):
+    _SETTINGS: typing.ClassVar[BenchmarkSettings] = BenchmarkSettings()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            DB_TYPE_TO_QUERY_BENCHMARKER[cls.get_db_type()] = cls
+
+    @classmethod
+    def configure(cls, *, settings: BenchmarkSettings) -> None:
+        IQueryBenchmarker._SETTINGS = settings
+
+    @classmethod
+    @abc.abstractmethod
+    def get_db_type(cls) -> DbTypes:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def profile(cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None) -> typing.Tuple[float, ProfileTotals]:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    async def profile_async(
+        cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None
+    ) -> typing.Tuple[float, ProfileTotals]:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def is_timeout(cls, *, error: Exception) -> bool:
+        raise NotImplementedError
+
+    @classmethod
+    def benchmark(
+        cls,
+        *,
+        db_context: DbContext,
+        query: str,
+        optimization: OptimizationResponse,
+        parameters: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ) -> OptimizationResponse:
+        queries = [query, *(candidate.query for candidate in optimization.optimized_queries_and_explains)]
+        benchmarks = [QueryBenchmark() for _ in queries]
+        for run in range(cls._SETTINGS.warmup_runs + cls._SETTINGS.repetitions):
+            for benchmarked_query, benchmark in zip(queries, benchmarks):
+                if benchmark.error is not None:
+                    continue
+
+                try:
+                    elapsed_ms, totals = cls.profile(db_context=db_context, query=benchmarked_query, parameters=parameters)
+
+                except Exception as e:
+                    cls._record_error(benchmark=benchmark, error=e)
+                    continue
+
+                if run >= cls._SETTINGS.warmup_runs:
+                    cls._record_run(benchmark=benchmark, elapsed_ms=elapsed_ms, totals=totals)
+
+        return cls._apply_benchmarks(optimization=optimization, benchmarks=benchmarks)
+
+    @classmethod
+    async def benchmark_async(
+        cls,
+        *,
+        db_context: DbContext,
+        query: str,
+        optimization: OptimizationResponse,
+        parameters: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ) -> OptimizationResponse:
+        queries = [query, *(candidate.query for candidate in optimization.optimized_queries_and_explains)]
+        benchmarks = [QueryBenchmark() for _ in queries]
+        for run in range(cls._SETTINGS.warmup_runs + cls._SETTINGS.repetitions):
+            for benchmarked_query, benchmark in zip(queries, benchmarks):
+                if benchmark.error is not None:
+                    continue
+
+                try:
+                    elapsed_ms, totals = await cls.profile_async(db_context=db_context, query=benchmarked_query, parameters=parameters)
+
+                except Exception as e:
+                    cls._record_error(benchmark=benchmark, error=e)
+                    continue
+
+                if run >= cls._SETTINGS.warmup_runs:
+                    cls._record_run(benchmark=benchmark, elapsed_ms=elapsed_ms, totals=totals)
+
+        return cls._apply_benchmarks(optimization=optimization, benchmarks=benchmarks)
+
+    @classmethod
+    def _record_error(cls, *, benchmark: QueryBenchmark, error: Exception) -> None:
+        benchmark.timed_out = cls.is_timeout(error=error)
+        benchmark.error = f"{type(error).__name__}: {error}"
+
+    @classmethod
+    def _record_run(cls, *, benchmark: QueryBenchmark, elapsed_ms: float, totals: ProfileTotals) -> None:
+        benchmark.runs += 1
+        benchmark.latencies_ms.append(round(elapsed_ms, 3))
+        benchmark.db_hits = totals.db_hits
+        benchmark.page_cache_hits = totals.page_cache_hits
+        benchmark.page_cache_misses = totals.page_cache_misses
+        benchmark.rows = totals.rows
+
+    @classmethod
+    def _apply_benchmarks(cls, *, optimization: OptimizationResponse, benchmarks: typing.List[QueryBenchmark]) -> OptimizationResponse:
+        for benchmark in benchmarks:
+            benchmark.p50_ms = SamplingUtils.percentile(values=benchmark.latencies_ms, ratio=0.5)
+            benchmark.p95_ms = SamplingUtils.percentile(values=benchmark.latencies_ms, ratio=0.95)
+
+        original, *candidate_benchmarks = benchmarks
+        optimization.original_benchmark = original
+        winner: typing.Optional[typing.Tuple[float, str]] = None
+        for candidate, benchmark in zip(optimization.optimized_queries_and_explains, candidate_benchmarks):
+            candidate.benchmark = benchmark
+            if not benchmark.latencies_ms or not original.latencies_ms:
+                continue
+
+            candidate.benchmark_p_value = round(SamplingUtils.mann_whitney_p_value(first=benchmark.latencies_ms, second=original.latencies_ms), 4)
+            candidate.significantly_faster = candidate.benchmark_p_value < cls._SETTINGS.significance_level and benchmark.p50_ms < original.p50_ms
+            if candidate.significantly_faster and (winner is None or benchmark.p50_ms < winner[0]):
+                winner = benchmark.p50_ms, candidate.query
+
+        optimization.benchmark_winner = winner[1] if winner is not None else None
+        return optimization
+
+
+DB_TYPE_TO_QUERY_BENCHMARKER: typing.Dict[DbTypes, typing.Type[IQueryBenchmarker]] = {}
+
+
+class IQueryVerifier(abc.ABC):
+    _SETTINGS: typing.ClassVar[VerificationSettings] = VerificationSettings()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            DB_TYPE_TO_QUERY_VERIFIER[cls.get_db_type()] = cls
+
+    @classmethod
+    def configure(cls, *, settings: VerificationSettings) -> None:
+        IQueryVerifier._SETTINGS = settings
+
+    @classmethod
+    @abc.abstractmethod
+    def get_db_type(cls) -> DbTypes:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def digest(cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None) -> ResultDigest:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    async def digest_async(cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None) -> ResultDigest:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def is_ordered(cls, *, query: str) -> bool:
+        raise NotImplementedError
+
+    @classmethod
+    def verify(
+        cls,
+        *,
+        db_context: DbContext,
+        query: str,
+        optimization: OptimizationResponse,
+        parameters: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ) -> OptimizationResponse:
+        original = cls.digest(db_context=db_context, query=query, parameters=parameters)
+        for candidate in optimization.optimized_queries_and_explains:
+            candidate.verification, candidate.verification_detail = cls.compare(
+                original=original,
+                candidate=cls.digest(db_context=db_context, query=candidate.query, parameters=parameters),
+                ordered=cls.is_ordered(query=query),
+            )
+
+        return optimization
+
+    @classmethod
+    async def verify_async(
+        cls,
+        *,
+        db_context: DbContext,
+        query: str,
+        optimization: OptimizationResponse,
+        parameters: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ) -> OptimizationResponse:
+        original = await cls.digest_async(db_context=db_context, query=query, parameters=parameters)
+        for candidate in optimization.optimized_queries_and_explains:
+            candidate.verification, candidate.verification_detail = cls.compare(
+                original=original,
+                candidate=await cls.digest_async(db_context=db_context, query=candidate.query, parameters=parameters),
+                ordered=cls.is_ordered(query=query),
+            )
+
+        return optimization
+
+    @classmethod
+    def compare(cls, *, original: ResultDigest, candidate: ResultDigest, ordered: bool) -> typing.Tuple[VerificationStatus, str]:
+        if original.error is not None:
+            return VerificationStatus.INCONCLUSIVE, f"Original query could not be executed: {original.error}"
+
+        if candidate.timed_out:
+            return VerificationStatus.INCONCLUSIVE, f"Optimized query did not finish within {cls._SETTINGS.timeout_seconds} seconds."
+
+        if candidate.unavailable:
+            return VerificationStatus.INCONCLUSIVE, f"Optimized query could not reach the database: {candidate.error}"
+
+        if candidate.error is not None:
+            return VerificationStatus.MISMATCHED, f"Optimized query failed: {candidate.error}"
+
+        if original.truncated or candidate.truncated:
+            return VerificationStatus.INCONCLUSIVE, f"Results exceed the {cls._SETTINGS.max_rows} rows budget."
+
+        if original.columns != candidate.columns:
+            return VerificationStatus.MISMATCHED, f"Original returns columns {original.columns}, optimized returns {candidate.columns}."
+
+        if original.rows != candidate.rows:
+            return VerificationStatus.MISMATCHED, f"Original returns {original.rows} rows, optimized returns {candidate.rows}."
+
+        if original.multiset_hash != candidate.multiset_hash:
+            return VerificationStatus.MISMATCHED, f"Both return {original.rows} rows but their contents differ."
+
+        if ordered and original.ordered_hash != candidate.ordered_hash:
+            return VerificationStatus.INCONCLUSIVE, "Same rows in a different order, ties in ORDER BY may explain it."
+
+        return VerificationStatus.VERIFIED, f"Identical {'ordered ' if ordered else ''}results over {original.rows} rows."
+
+
+DB_TYPE_TO_QUERY_VERIFIER: typing.Dict[DbTypes, typing.Type[IQueryVerifier]] = {}
+
+
+class _LoadTestRecorder:
+    def __init__(self, *, settings: LoadTestSettings, parameter_sets: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        self._parameter_sets = parameter_sets or [{}]
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.latencies_ms: typing.List[float] = []
+        self.errors = 0
+        self.first_error: typing.Optional[str] = None
+        self.measure_start = time.monotonic() + settings.warmup_seconds
+        self.deadline = self.measure_start + settings.duration_seconds
+
+    def next_parameters(self) -> typing.Dict[str, typing.Any]:
+        return self._parameter_sets[next(self._counter) % len(self._parameter_sets)]
+
+    def record(self, *, started: float, elapsed_ms: typing.Optional[float] = None, error: typing.Optional[Exception] = None) -> None:
+        if started < self.measure_start:
+            return
+
+        with self._lock:
+            if error is None:
+                self.latencies_ms.append(elapsed_ms)
+                return
+
+            self.errors += 1
+            if self.first_error is None:
+                self.first_error = f"{type(error).__name__}: {error}"
+
+
+class IQueryLoadTester(abc.ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            DB_TYPE_TO_QUERY_LOAD_TESTER[cls.get_db_type()] = cls
+
+    @classmethod
+    @abc.abstractmethod
+    def get_db_type(cls) -> DbTypes:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def execute(cls, *, db_context: DbContext, query: str, parameters: typing.Dict[str, typing.Any], timeout: float) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    async def execute_async(cls, *, db_context: DbContext, query: str, parameters: typing.Dict[str, typing.Any], timeout: float) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def run(
+        cls,
+        *,
+        db_context: DbContext,
+        query: str,
+        candidate_queries: typing.List[str],
+        settings: LoadTestSettings,
+        parameter_sets: typing.Optional[typing.List[typing.Dict[str, typing.Any]]] = None,
+    ) -> LoadTestReport:
+        results = [
+            cls._run_query(db_context=db_context, query=tested_query, settings=settings, parameter_sets=parameter_sets or [])
+            for tested_query in [query, *candidate_queries]
+        ]
+        return LoadTestReport(
+            concurrency=settings.concurrency,
+            duration_seconds=settings.duration_seconds,
+            parameter_sets=len(parameter_sets or []),
+            original=results[0],
+            candidates=results[1:],
+        )
+
+    @classmethod
+    async def run_async(
+        cls,
+        *,
+        db_context: DbContext,
+        query: str,
+        candidate_queries: typing.List[str],
+        settings: LoadTestSettings,
+        parameter_sets: typing.Optional[typing.List[typing.Dict[str, typing.Any]]] = None,
+    ) -> LoadTestReport:
+        results = [
+            await cls._run_query_async(db_context=db_context, query=tested_query, settings=settings, parameter_sets=parameter_sets or [])
+            for tested_query in [query, *candidate_queries]
+        ]
+        return LoadTestReport(
+            concurrency=settings.concurrency,
+            duration_seconds=settings.duration_seconds,
+            parameter_sets=len(parameter_sets or []),
+            original=results[0],
+            candidates=results[1:],
+        )
+
+    @classmethod
+    def _run_query(cls, *, db_context: DbContext, query: str, settings: LoadTestSettings, parameter_sets: typing.List[typing.Dict[str, typing.Any]]) -> LoadTestResult:
+        recorder = _LoadTestRecorder(settings=settings, parameter_sets=parameter_sets)
+
+        def worker() -> None:
+            while time.monotonic() < recorder.deadline:
+                started = time.monotonic()
+                try:
+                    cls.execute(db_context=db_context, query=query, parameters=recorder.next_parameters(), timeout=settings.timeout_seconds)
+
+                except Exception as e:
+                    recorder.record(started=started, error=e)
+                    continue
+
+                recorder.record(started=started, elapsed_ms=(time.monotonic() - started) * 1000)
+
+        with ThreadPoolExecutor(max_workers=settings.concurrency) as executor:
+            for future in [executor.submit(worker) for _ in range(settings.concurrency)]:
+                future.result()
+
+        return cls._summarize(query=query, recorder=recorder)
+
+    @classmethod
+    async def _run_query_async(
+        cls, *, db_context: DbContext, query: str, settings: LoadTestSettings, parameter_sets: typing.List[typing.Dict[str, typing.Any]]
+    ) -> LoadTestResult:
+        recorder = _LoadTestRecorder(settings=settings, parameter_sets=parameter_sets)
+
+        async def worker() -> None:
+            while time.monotonic() < recorder.deadline:
+                started = time.monotonic()
+                try:
+                    await cls.execute_async(db_context=db_context, query=query, parameters=recorder.next_parameters(), timeout=settings.timeout_seconds)
+
+                except Exception as e:
+                    recorder.record(started=started, error=e)
+                    continue
+
+                recorder.record(started=started, elapsed_ms=(time.monotonic() - started) * 1000)
+
+        await asyncio.gather(*(worker() for _ in range(settings.concurrency)))
+        return cls._summarize(query=query, recorder=recorder)
+
+    @classmethod
+    def _summarize(cls, *, query: str, recorder: _LoadTestRecorder) -> LoadTestResult:
+        requests = len(recorder.latencies_ms) + recorder.errors
+        measured_seconds = max(time.monotonic(), recorder.deadline) - recorder.measure_start
+        return LoadTestResult(
+            query=query,
+            requests=requests,
+            errors=recorder.errors,
+            error_rate=round(recorder.errors / requests, 4) if requests else 0.0,
+            throughput_per_second=round(len(recorder.latencies_ms) / measured_seconds, 2) if measured_seconds > 0 else 0.0,
+            p50_ms=SamplingUtils.percentile(values=recorder.latencies_ms, ratio=0.5),
+            p95_ms=SamplingUtils.percentile(values=recorder.latencies_ms, ratio=0.95),
+            p99_ms=SamplingUtils.percentile(values=recorder.latencies_ms, ratio=0.99),
+            first_error=recorder.first_error,
+        )
+
+
+DB_TYPE_TO_QUERY_LOAD_TESTER: typing.Dict[DbTypes, typing.Type[IQueryLoadTester]] = {}
@@ -0,0 +1,150 @@
+import time
+import typing
+
+from neo4j.exceptions import DriverError, Neo4jError
+from neo4j.graph import Node, Path, Relationship
+
+from .base import IQueryRanker, IQueryBenchmarker, IQueryVerifier, IQueryLoadTester
+from ..definitions import DbContext, DbTypes
+from ..utils.cypher import CypherUtils
+from ..utils.hashing import ResultDigest, ResultHasher
+from ..utils.neo4j import Neo4jUtils
+from ..utils.plans import PlanAnalyzer, ProfileTotals
+
+
+class Neo4jQueryRanker(IQueryRanker):
+    @classmethod
+    def get_db_type(cls) -> DbTypes:
+        return DbTypes.NEO4J
+
+    @classmethod
+    def estimate_cost(cls, *, db_context: DbContext, query: str) -> float:
+        with Neo4jUtils.acquire_tx(db_context=db_context) as tx:
+            plan = tx.run(f"EXPLAIN {query}").consume().plan
+
+        return PlanAnalyzer.estimate_cost(plan=plan)
+
+    @classmethod
+    async def estimate_cost_async(cls, *, db_context: DbContext, query: str) -> float:
+        async with Neo4jUtils.acquire_async_tx(db_context=db_context) as tx:
+            result = await tx.run(f"EXPLAIN {query}")
+            plan = (await result.consume()).plan
+
+        return PlanAnalyzer.estimate_cost(plan=plan)
+
+
+class Neo4jQueryBenchmarker(IQueryBenchmarker):
+    @classmethod
+    def get_db_type(cls) -> DbTypes:
+        return DbTypes.NEO4J
+
+    @classmethod
+    def profile(cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None) -> typing.Tuple[float, ProfileTotals]:
+        with Neo4jUtils.acquire_tx(db_context=db_context, timeout=cls._SETTINGS.timeout_seconds) as tx:
+            start = time.perf_counter()
+            summary = tx.run(f"PROFILE {query}", parameters).consume()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        return elapsed_ms, PlanAnalyzer.get_profile_totals(profile=summary.profile)
+
+    @classmethod
+    async def profile_async(
+        cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None
+    ) -> typing.Tuple[float, ProfileTotals]:
+        async with Neo4jUtils.acquire_async_tx(db_context=db_context, timeout=cls._SETTINGS.timeout_seconds) as tx:
+            start = time.perf_counter()
+            result = await tx.run(f"PROFILE {query}", parameters)
+            summary = await result.consume()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        return elapsed_ms, PlanAnalyzer.get_profile_totals(profile=summary.profile)
+
+    @classmethod
+    def is_timeout(cls, *, error: Exception) -> bool:
+        return Neo4jUtils.is_timeout_error(error=error)
+
+
+class Neo4jQueryVerifier(IQueryVerifier):
+    @classmethod
+    def get_db_type(cls) -> DbTypes:
+        return DbTypes.NEO4J
+
+    @classmethod
+    def digest(cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None) -> ResultDigest:
+        hasher = ResultHasher(canonicalize=cls._canonicalize)
+        try:
+            with Neo4jUtils.acquire_tx(db_context=db_context, timeout=cls._SETTINGS.timeout_seconds) as tx:
+                result = tx.run(query, parameters)
+                for record in result:
+                    if hasher.rows >= cls._SETTINGS.max_rows:
+                        return hasher.get_digest(columns=list(result.keys()), truncated=True)
+
+                    hasher.add(values=record.values())
+
+                return hasher.get_digest(columns=list(result.keys()))
+
+        except Neo4jError as e:
+            return ResultDigest(error=f"{type(e).__name__}: {e}", timed_out=Neo4jUtils.is_timeout_error(error=e))
+
+        except DriverError as e:
+            return ResultDigest(error=f"{type(e).__name__}: {e}", unavailable=True)
+
+    @classmethod
+    async def digest_async(cls, *, db_context: DbContext, query: str, parameters: typing.Optional[typing.Dict[str, typing.Any]] = None) -> ResultDigest:
+        hasher = ResultHasher(canonicalize=cls._canonicalize)
+        try:
+            async with Neo4jUtils.acquire_async_tx(db_context=db_context, timeout=cls._SETTINGS.timeout_seconds) as tx:
+                result = await tx.run(query, parameters)
+                async for record in result:
+                    if hasher.rows >= cls._SETTINGS.max_rows:
+                        return hasher.get_digest(columns=list(await result.keys()), truncated=True)
+
+                    hasher.add(values=record.values())
+
+                return hasher.get_digest(columns=list(await result.keys()))
+
+        except Neo4jError as e:
+            return ResultDigest(error=f"{type(e).__name__}: {e}", timed_out=Neo4jUtils.is_timeout_error(error=e))
+
+        except DriverError as e:
+            return ResultDigest(error=f"{type(e).__name__}: {e}", unavailable=True)
+
+    @classmethod
+    def is_ordered(cls, *, query: str) -> bool:
+        return CypherUtils.is_ordered(query=query)
+
+    @classmethod
+    def _canonicalize(cls, value: typing.Any) -> typing.Any:
+        if isinstance(value, (Node, Relationship)):
+            return {"element_id": value.element_id}
+
+        if isinstance(value, Path):
+            return {"path": [cls._canonicalize(relationship) for relationship in value.relationships] or [cls._canonicalize(value.start_node)]}
+
+        if isinstance(value, (list, tuple)):
+            return [cls._canonicalize(item) for item in value]
+
+        if isinstance(value, dict):
+            return {key: cls._canonicalize(item) for key, item in value.items()}
+
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+
+        return str(value)
+
+
+class Neo4jQueryLoadTester(IQueryLoadTester):
+    @classmethod
+    def get_db_type(cls) -> DbTypes:
+        return DbTypes.NEO4J
+
+    @classmethod
+    def execute(cls, *, db_context: DbContext, query: str, parameters: typing.Dict[str, typing.Any], timeout: float) -> None:
+        with Neo4jUtils.acquire_tx(db_context=db_context, timeout=timeout) as tx:
+            tx.run(query, parameters).consume()
+
+    @classmethod
+    async def execute_async(cls, *, db_context: DbContext, query: str, parameters: typing.Dict[str, typing.Any], timeout: float) -> None:
+        async with Neo4jUtils.acquire_async_tx(db_context=db_context, timeout=timeout) as tx:
+            result = await tx.run(query, parameters)
+            await result.consume()
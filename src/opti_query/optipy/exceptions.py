@@ -7,6 +7,15 @@ class OutOfSchemaRequest(Exception):
         return self._reason
 
 
+class DbQueryFailed(Exception):
+    def __init__(self, *, reason: str):
+        self._reason = reason
+
+    @property
+    def reason(self) -> str:
+        return self._reason
+
+
 class UnsupportedModelName(Exception):
     def __init__(self, *, model_name: str, llm_type: str):
         self._model_name = model_name
@@ -1,11 +1,35 @@
+import asyncio
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
 from .definitions import (
     DbContext,
     DB_TYPE_TO_SYSTEM_INSTRUCTIONS,
     LlmTypes,
     DbTypes,
     OptimizationResponse,
+    WorkloadResult,
+    WorkloadStatus,
+    WorkloadSummary,
+)
+from .evaluation import (
+    DB_TYPE_TO_QUERY_RANKER,
+    DB_TYPE_TO_QUERY_BENCHMARKER,
+    DB_TYPE_TO_QUERY_VERIFIER,
+    DB_TYPE_TO_QUERY_LOAD_TESTER,
+    BenchmarkSettings,
+    IQueryBenchmarker,
+    IQueryVerifier,
+    LoadTestReport,
+    LoadTestSettings,
+    VerificationSettings,
 )
-from .llm_clients.base import LLM_TYPE_TO_LLM_CLIENT
+from .llm_clients.base import LLM_TYPE_TO_LLM_CLIENT, ASYNC_LLM_TYPE_TO_LLM_CLIENT
+from .utils.neo4j import Neo4jUtils, Neo4jPoolSettings
+from .workload import WorkloadReader
 
 
 class OptiQueryHandler:
@@ -21,11 +45,264 @@ class OptiQueryHandler:
         database: str,
         llm_type: LlmTypes,
         model_name: str,
+        rank_candidates: bool = True,
+        verify: bool = False,
+        benchmark: bool = False,
+        parameters: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        benchmark_settings: typing.Optional[BenchmarkSettings] = None,
+        verification_settings: typing.Optional[VerificationSettings] = None,
+        pool_settings: typing.Optional[Neo4jPoolSettings] = None,
         **llm_auth,
     ) -> OptimizationResponse:
+        if pool_settings is not None:
+            Neo4jUtils.configure_pool(settings=pool_settings)
+
+        if benchmark_settings is not None:
+            IQueryBenchmarker.configure(settings=benchmark_settings)
+
+        if verification_settings is not None:
+            IQueryVerifier.configure(settings=verification_settings)
+
         db_context = DbContext(host=host, username=username, password=password, database=database)
         system_instruction = DB_TYPE_TO_SYSTEM_INSTRUCTIONS[db_type]
         llm_client_cls = LLM_TYPE_TO_LLM_CLIENT[llm_type]
         client = llm_client_cls(system_instruction=system_instruction, model_name=model_name, **llm_auth)
         optimization = client.get_optimization(query=query, db_context=db_context, db_type=db_type)
+        if rank_candidates and db_type in DB_TYPE_TO_QUERY_RANKER:
+            optimization = DB_TYPE_TO_QUERY_RANKER[db_type].rank(db_context=db_context, query=query, optimization=optimization)
+
+        if verify and db_type in DB_TYPE_TO_QUERY_VERIFIER:
+            optimization = DB_TYPE_TO_QUERY_VERIFIER[db_type].verify(db_context=db_context, query=query, optimization=optimization, parameters=parameters)
+
+        if benchmark and db_type in DB_TYPE_TO_QUERY_BENCHMARKER:
+            optimization = DB_TYPE_TO_QUERY_BENCHMARKER[db_type].benchmark(db_context=db_context, query=query, optimization=optimization, parameters=parameters)
+
+        return optimization
+
+    @classmethod
+    def optimize_workload(
+        cls,
+        *,
+        db_type: DbTypes,
+        host: str,
+        username: str,
+        password: str,
+        database: str,
+        llm_type: LlmTypes,
+        model_name: str,
+        queries_path: typing.Union[str, Path],
+        output_path: typing.Union[str, Path],
+        max_workers: int = 4,
+        resume: bool = True,
+        pool_settings: typing.Optional[Neo4jPoolSettings] = None,
+        **llm_auth,
+    ) -> WorkloadSummary:
+        if pool_settings is not None:
+            Neo4jUtils.configure_pool(settings=pool_settings)
+
+        output_path = Path(output_path)
+        queries = WorkloadReader.read_queries(path=Path(queries_path))
+        unique_queries = WorkloadReader.deduplicate(queries=queries)
+        completed = WorkloadReader.read_completed_queries(path=output_path) if resume else set()
+        pending_queries = [query for query in unique_queries if WorkloadReader.normalize(query=query) not in completed]
+
+        write_lock = threading.Lock()
+        succeeded = failed = 0
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "a" if resume else "w") as output_file, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    cls._optimize_workload_query,
+                    db_type=db_type,
+                    host=host,
+                    username=username,
+                    password=password,
+                    query=query,
+                    database=database,
+                    llm_type=llm_type,
+                    model_name=model_name,
+                    **llm_auth,
+                )
+                for query in pending_queries
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result.status == WorkloadStatus.OK:
+                    succeeded += 1
+
+                else:
+                    failed += 1
+
+                with write_lock:
+                    output_file.write(result.model_dump_json() + "\n")
+                    output_file.flush()
+
+        return WorkloadSummary(
+            total_queries=len(queries),
+            unique_queries=len(unique_queries),
+            skipped_queries=len(unique_queries) - len(pending_queries),
+            succeeded=succeeded,
+            failed=failed,
+            output_path=str(output_path),
+        )
+
+    @classmethod
+    def load_test(
+        cls,
+        *,
+        db_type: DbTypes,
+        host: str,
+        username: str,
+        password: str,
+        database: str,
+        query: str,
+        optimization: typing.Optional[OptimizationResponse] = None,
+        candidate_queries: typing.Optional[typing.List[str]] = None,
+        concurrency: int = 8,
+        duration_seconds: float = 30,
+        warmup_seconds: float = 5,
+        timeout_seconds: float = 30,
+        parameters_path: typing.Optional[typing.Union[str, Path]] = None,
+        pool_settings: typing.Optional[Neo4jPoolSettings] = None,
+    ) -> LoadTestReport:
+        if pool_settings is not None:
+            Neo4jUtils.configure_pool(settings=pool_settings)
+
+        db_context = DbContext(host=host, username=username, password=password, database=database)
+        return DB_TYPE_TO_QUERY_LOAD_TESTER[db_type].run(
+            db_context=db_context,
+            query=query,
+            candidate_queries=cls._get_candidate_queries(optimization=optimization, candidate_queries=candidate_queries),
+            settings=LoadTestSettings(concurrency=concurrency, duration_seconds=duration_seconds, warmup_seconds=warmup_seconds, timeout_seconds=timeout_seconds),
+            parameter_sets=WorkloadReader.read_parameters(path=Path(parameters_path)) if parameters_path else None,
+        )
+
+    @classmethod
+    def _get_candidate_queries(cls, *, optimization: typing.Optional[OptimizationResponse], candidate_queries: typing.Optional[typing.List[str]]) -> typing.List[str]:
+        queries = list(candidate_queries or [])
+        if optimization is not None:
+            queries.extend(candidate.query for candidate in optimization.optimized_queries_and_explains)
+
+        if not queries:
+            raise ValueError("load_test requires an optimization or candidate_queries to compare against the original query")
+
+        return queries
+
+    @classmethod
+    def _optimize_workload_query(cls, *, query: str, **kwargs) -> WorkloadResult:
+        start = time.monotonic()
+        try:
+            optimization = cls.optimize_query(query=query, **kwargs)
+
+        except Exception as e:
+            return WorkloadResult(query=query, status=WorkloadStatus.ERROR, duration_seconds=time.monotonic() - start, error=f"{type(e).__name__}: {e}")
+
+        return WorkloadResult(query=query, status=WorkloadStatus.OK, duration_seconds=time.monotonic() - start, optimization=optimization)
+
+
+class AsyncOptiQueryHandler:
+    @classmethod
+    async def optimize_query(
+        cls,
+        *,
+        db_type: DbTypes,
+        host: str,
+        username: str,
+        password: str,
+        query: str,
+        database: str,
+        llm_type: LlmTypes,
+        model_name: str,
+        rank_candidates: bool = True,
+        verify: bool = False,
+        benchmark: bool = False,
+        parameters: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        benchmark_settings: typing.Optional[BenchmarkSettings] = None,
+        verification_settings: typing.Optional[VerificationSettings] = None,
+        pool_settings: typing.Optional[Neo4jPoolSettings] = None,
+        **llm_auth,
+    ) -> OptimizationResponse:
+        if pool_settings is not None:
+            Neo4jUtils.configure_pool(settings=pool_settings)
+
+        if benchmark_settings is not None:
+            IQueryBenchmarker.configure(settings=benchmark_settings)
+
+        if verification_settings is not None:
+            IQueryVerifier.configure(settings=verification_settings)
+
+        db_context = DbContext(host=host, username=username, password=password, database=database)
+        system_instruction = DB_TYPE_TO_SYSTEM_INSTRUCTIONS[db_type]
+        llm_client_cls = ASYNC_LLM_TYPE_TO_LLM_CLIENT[llm_type]
+        client = llm_client_cls(system_instruction=system_instruction, model_name=model_name, **llm_auth)
+        optimization = await client.get_optimization(query=query, db_context=db_context, db_type=db_type)
+        if rank_candidates and db_type in DB_TYPE_TO_QUERY_RANKER:
+            optimization = await DB_TYPE_TO_QUERY_RANKER[db_type].rank_async(db_context=db_context, query=query, optimization=optimization)
+
+        if verify and db_type in DB_TYPE_TO_QUERY_VERIFIER:
+            optimization = await DB_TYPE_TO_QUERY_VERIFIER[db_type].verify_async(db_context=db_context, query=query, optimization=optimization, parameters=parameters)
+
+        if benchmark and db_type in DB_TYPE_TO_QUERY_BENCHMARKER:
+            optimization = await DB_TYPE_TO_QUERY_BENCHMARKER[db_type].benchmark_async(
+                db_context=db_context, query=query, optimization=optimization, parameters=parameters
+            )
+
         return optimization
+
+    @classmethod
+    async def optimize_queries(
+        cls,
+        *,
+        queries: typing.Iterable[str],
+        max_concurrency: int = 16,
+        **kwargs,
+    ) -> typing.List[WorkloadResult]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def optimize(query: str) -> WorkloadResult:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    optimization = await cls.optimize_query(query=query, **kwargs)
+
+                except Exception as e:
+                    return WorkloadResult(query=query, status=WorkloadStatus.ERROR, duration_seconds=time.monotonic() - start, error=f"{type(e).__name__}: {e}")
+
+                return WorkloadResult(query=query, status=WorkloadStatus.OK, duration_seconds=time.monotonic() - start, optimization=optimization)
+
+        return list(await asyncio.gather(*(optimize(query) for query in WorkloadReader.deduplicate(queries=queries))))
+
+    @classmethod
+    async def load_test(
+        cls,
+        *,
+        db_type: DbTypes,
+        host: str,
+        username: str,
+        password: str,
+        database: str,
+        query: str,
+        optimization: typing.Optional[OptimizationResponse] = None,
+        candidate_queries: typing.Optional[typing.List[str]] = None,
+        concurrency: int = 8,
+        duration_seconds: float = 30,
+        warmup_seconds: float = 5,
+        timeout_seconds: float = 30,
+        parameters_path: typing.Optional[typing.Union[str, Path]] = None,
+        pool_settings: typing.Optional[Neo4jPoolSettings] = None,
+    ) -> LoadTestReport:
+        if pool_settings is not None:
+            Neo4jUtils.configure_pool(settings=pool_settings)
+
+        db_context = DbContext(host=host, username=username, password=password, database=database)
+        return await DB_TYPE_TO_QUERY_LOAD_TESTER[db_type].run_async(
+            db_context=db_context,
+            query=query,
+            candidate_queries=OptiQueryHandler._get_candidate_queries(optimization=optimization, candidate_queries=candidate_queries),
+            settings=LoadTestSettings(concurrency=concurrency, duration_seconds=duration_seconds, warmup_seconds=warmup_seconds, timeout_seconds=timeout_seconds),
+            parameter_sets=WorkloadReader.read_parameters(path=Path(parameters_path)) if parameters_path else None,
+        )
+
+    @classmethod
+    async def close(cls) -> None:
+        await Neo4jUtils.close_all_async()
@@ -1,3 +1,3 @@
-from .base import ILLMClient
-from .gemini import GeminiClient
-from .chatgpt import ChatGPTClient
+from .base import ILLMClient, IAsyncLLMClient
+from .gemini import GeminiClient, AsyncGeminiClient
+from .chatgpt import ChatGPTClient, AsyncChatGPTClient
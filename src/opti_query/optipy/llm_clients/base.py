@@ -1,15 +1,34 @@
 import abc
+import asyncio
+import inspect
+import json
 import typing
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError
 
-from ..definitions import DbContext, QueryTypes, LlmTypes, OptimizationResponse, DbTypes
-from ..exceptions import OutOfSchemaRequest
-from ..queries.base import QUERY_TYPE_TO_QUERY_CLASS
+from ..caching import AnswerCache
+from ..definitions import ANSWER_ENCODING_PLACEHOLDER, DbContext, QueryTypes, LlmTypes, OptimizationResponse, DbTypes, MultiQuestionRequest, SessionReport, TurnReport
+from ..encoding import ENCODING_TO_RESPONSE_ENCODER, IResponseEncoder, ResponseEncodings, TokenCounter
+from ..exceptions import OutOfSchemaRequest, LlmReachedTryCount, DbQueryFailed
+from ..prefetch import DB_TYPE_TO_PREFETCHER, IQueryPrefetcher, PrefetchMetrics
+from .history import ConversationHistory, HistoryMessage, HistorySettings
+from .prompt_cache import PromptCacheSettings, PromptCacheUtils
+from .streaming import JsonStreamScanner, StreamingSettings
+from ..queries.base import QUERY_TYPE_TO_QUERY_CLASS, IQueryRunner
 
 
-class ILLMClient(abc.ABC):
-    def __init_subclass__(cls, **kwargs):
-        super().__init_subclass__()
-        LLM_TYPE_TO_LLM_CLIENT[cls.get_llm_type()] = cls
+class BaseLLMClient(abc.ABC):
+    MAX_JSON_RETRIES = 5
+    MAX_PARALLEL_QUESTIONS = 4
+    INVALID_JSON_MSG = "Your message is not a valid json. Please send only a **valid json** message."
+    _RESPONSE_ENCODING = ResponseEncodings.COMPACT
+    _HISTORY_SETTINGS = HistorySettings()
+    _PROMPT_CACHE_SETTINGS = PromptCacheSettings()
+    _STREAMING_SETTINGS = StreamingSettings()
+    _system_instruction: str = ""
+    _history: typing.Optional[ConversationHistory] = None
+    _prefetcher: typing.Optional[IQueryPrefetcher] = None
+    _session_report: typing.Optional[SessionReport] = None
 
     @abc.abstractmethod
     def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
@@ -20,17 +39,138 @@ class ILLMClient(abc.ABC):
     def get_llm_type(cls) -> LlmTypes:
         raise NotImplementedError
 
-    @abc.abstractmethod
-    def get_optimization(self, *, query: str, db_context: DbContext, db_type: DbTypes) -> OptimizationResponse:
-        raise NotImplementedError
+    def _on_session_start(self, *, db_type: DbTypes) -> None:
+        pass
+
+    @classmethod
+    def configure_encoding(cls, *, encoding: ResponseEncodings) -> None:
+        BaseLLMClient._RESPONSE_ENCODING = encoding
+
+    @classmethod
+    def _build_system_instruction(cls, *, system_instruction: str) -> str:
+        encoder_cls = ENCODING_TO_RESPONSE_ENCODER[cls._RESPONSE_ENCODING]
+        return system_instruction.replace(ANSWER_ENCODING_PLACEHOLDER, encoder_cls.get_prompt_description())
+
+    @classmethod
+    def configure_history(cls, *, settings: HistorySettings) -> None:
+        BaseLLMClient._HISTORY_SETTINGS = settings
+
+    @classmethod
+    def configure_prompt_cache(cls, *, settings: PromptCacheSettings) -> None:
+        BaseLLMClient._PROMPT_CACHE_SETTINGS = settings
+
+    def _get_prompt_cache_key(self, *, model_name: str) -> str:
+        return PromptCacheUtils.build_key(model_name=model_name, system_instruction=self._system_instruction)
+
+    def _record_usage(self, *, prompt_tokens: typing.Optional[int], cached_tokens: typing.Optional[int]) -> None:
+        if self._session_report is None or not self._session_report.turns:
+            return
+
+        turn = self._session_report.turns[-1]
+        if turn.provider_prompt_tokens is None:
+            return
+
+        turn.provider_prompt_tokens += prompt_tokens or 0
+        turn.cached_prompt_tokens += cached_tokens or 0
+
+    def _record_unknown_usage(self) -> None:
+        if self._session_report is not None and self._session_report.turns:
+            self._session_report.turns[-1].provider_prompt_tokens = None
+            self._session_report.turns[-1].cached_prompt_tokens = None
 
     @classmethod
-    def _handle_llm_request(cls, *, msg_from_llm: typing.Mapping[str, typing.Any], db_context: DbContext) -> typing.Any:
+    def configure_streaming(cls, *, settings: StreamingSettings) -> None:
+        BaseLLMClient._STREAMING_SETTINGS = settings
+
+    def _should_stop_stream(self, *, scanner: JsonStreamScanner) -> bool:
+        return self._STREAMING_SETTINGS.enabled and self._STREAMING_SETTINGS.stop_on_first_object and scanner.result is not None
+
+    def _record_early_stop(self) -> None:
+        if self._session_report is not None and self._session_report.turns:
+            self._session_report.turns[-1].early_stops += 1
+
+    def _record_timing(self, *, client_seconds: float, llm_seconds: float, first_chunk_seconds: typing.Optional[float] = None) -> None:
+        if self._session_report is None or not self._session_report.turns:
+            return
+
+        turn = self._session_report.turns[-1]
+        turn.client_seconds = round(turn.client_seconds + client_seconds, 4)
+        turn.llm_seconds = round(turn.llm_seconds + llm_seconds, 4)
+        if turn.first_chunk_seconds is None and first_chunk_seconds is not None:
+            turn.first_chunk_seconds = round(first_chunk_seconds, 4)
+
+    def _start_history(self) -> None:
+        self._history = ConversationHistory(
+            system_instruction=self._system_instruction, settings=self._HISTORY_SETTINGS, parse_reply=lambda text: self._parse_llm_text(text=text)
+        )
+
+    def _build_prompt(self, *, msg: str) -> typing.List[HistoryMessage]:
+        self._history.add_user(content=msg)
+        messages = self._history.get_messages()
+        if self._session_report is not None and self._session_report.turns:
+            turn = self._session_report.turns[-1]
+            turn.prompt_tokens += self._history.get_prompt_tokens()
+            turn.compacted_exchanges = self._history.compacted_exchanges
+
+        return messages
+
+    def _record_assistant_message(self, *, text: str) -> None:
+        self._history.add_assistant(content=text)
+
+    def get_session_report(self) -> typing.Optional[SessionReport]:
+        return self._session_report
+
+    def _start_session_report(self) -> None:
+        self._response_encoder: IResponseEncoder = ENCODING_TO_RESPONSE_ENCODER[self._RESPONSE_ENCODING]()
+        self._session_report = SessionReport(encoding=self._RESPONSE_ENCODING.value, token_counter=TokenCounter.get_method())
+
+    def _encode_message(self, *, msg: str) -> str:
+        encoded = self._response_encoder.encode(text=msg)
+        turn = TurnReport(turn=len(self._session_report.turns) + 1, raw_tokens=TokenCounter.count(text=msg), sent_tokens=TokenCounter.count(text=encoded))
+        self._session_report.turns.append(turn)
+        return encoded
+
+    def _record_reply(self, *, text: str, valid: bool) -> None:
+        if self._session_report is None or not self._session_report.turns:
+            return
+
+        turn = self._session_report.turns[-1]
+        turn.received_tokens += TokenCounter.count(text=text)
+        if not valid:
+            turn.invalid_replies += 1
+            turn.sent_tokens += TokenCounter.count(text=self.INVALID_JSON_MSG)
+
+    def _finish_optimization(self, *, optimization: OptimizationResponse) -> OptimizationResponse:
+        optimization.session_report = self._session_report
+        return optimization
+
+    def get_prefetch_metrics(self) -> PrefetchMetrics:
+        return self._prefetcher.get_metrics() if self._prefetcher is not None else PrefetchMetrics()
+
+    def _create_prefetcher(self, *, db_context: DbContext, db_type: DbTypes) -> typing.Optional[IQueryPrefetcher]:
+        prefetcher_cls = DB_TYPE_TO_PREFETCHER.get(db_type)
+        self._prefetcher = prefetcher_cls(db_context=db_context) if prefetcher_cls is not None else None
+        return self._prefetcher
+
+    def _stop_prefetcher(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+
+    def _record_db_request(self, *, key: typing.Optional[typing.Hashable]) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher.record_request(key=key)
+
+    @classmethod
+    def _build_opening_request(cls, *, query: str, db_type: DbTypes) -> typing.Mapping[str, typing.Any]:
+        return {"query_type": f"{db_type.value}_OPENING_QUERY", "data": {"query": query}}
+
+    @classmethod
+    def _build_llm_request(cls, *, msg_from_llm: typing.Mapping[str, typing.Any]) -> typing.Union[OptimizationResponse, MultiQuestionRequest, IQueryRunner]:
         if "query_type" not in msg_from_llm:
             raise OutOfSchemaRequest(reason="Your message does not contain a query_type. Your messages must follow that schema.")
 
         query_type = msg_from_llm["query_type"]
-        if query_type not in QueryTypes:
+        if query_type not in list(QueryTypes):
             raise OutOfSchemaRequest(reason=f"{query_type} is not a valid query type.")
 
         if "data" not in msg_from_llm:
@@ -40,13 +180,235 @@ class ILLMClient(abc.ABC):
             OptimizationResponse.validate_request(data=msg_from_llm["data"])
             return OptimizationResponse(**msg_from_llm["data"])
 
+        elif msg_from_llm["query_type"] == QueryTypes.MULTI_QUESTION:
+            MultiQuestionRequest.validate_request(data=msg_from_llm["data"])
+            return MultiQuestionRequest(**msg_from_llm["data"])
+
         query_runner_cls = QUERY_TYPE_TO_QUERY_CLASS[query_type]
         query_data = msg_from_llm["data"]
 
         query_runner_cls.validate_request(data=query_data)
-        query_runner = query_runner_cls(**query_data)
-        db_response = query_runner.get_parsed_response(db_context=db_context)
-        return db_response
+        return query_runner_cls(**query_data)
+
+    @classmethod
+    def _parse_llm_text(cls, *, text: str) -> typing.Optional[typing.Mapping[str, typing.Any]]:
+        stripped = text.strip()
+        if stripped.startswith("```"):
+            stripped = stripped.split("\n", 1)[-1] if "\n" in stripped else stripped[3:]
+            stripped = stripped.rsplit("```", 1)[0]
+
+        try:
+            msg_from_llm = json.loads(stripped)
+
+        except JSONDecodeError:
+            return None
+
+        return msg_from_llm if isinstance(msg_from_llm, dict) else None
+
+    @classmethod
+    def _build_question_request(cls, *, question: typing.Mapping[str, typing.Any]) -> IQueryRunner:
+        llm_request = cls._build_llm_request(msg_from_llm=question)
+        if not isinstance(llm_request, IQueryRunner):
+            raise OutOfSchemaRequest(reason=f"Only database questions can be sent inside {QueryTypes.MULTI_QUESTION.value}, not {question['query_type']}.")
+
+        return llm_request
+
+    @classmethod
+    def _build_multi_answer(cls, *, questions: typing.List[typing.Mapping[str, typing.Any]], answers: typing.List[str]) -> str:
+        combined = []
+        for question, answer in zip(questions, answers):
+            try:
+                parsed_answer = json.loads(answer)
+
+            except JSONDecodeError:
+                parsed_answer = answer
+
+            combined.append({"question": question, "answer": parsed_answer})
+
+        return json.dumps(combined)
+
+
+class ILLMClient(BaseLLMClient, abc.ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            LLM_TYPE_TO_LLM_CLIENT[cls.get_llm_type()] = cls
+
+    def get_optimization(self, *, query: str, db_context: DbContext, db_type: DbTypes) -> OptimizationResponse:
+        self._on_session_start(db_type=db_type)
+        self._start_session_report()
+        self._start_history()
+        msg_from_llm = self._build_opening_request(query=query, db_type=db_type)
+        msg_to_llm = self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
+        prefetcher = self._create_prefetcher(db_context=db_context, db_type=db_type)
+        if prefetcher is not None:
+            prefetcher.start(query=query, opening_response=json.loads(msg_to_llm))
+
+        try:
+            msg_from_llm = self._send_msg(msg=self._encode_message(msg=f"{msg_to_llm}"))
+            while True:
+                try:
+                    msg_to_llm = self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
+
+                except (OutOfSchemaRequest, DbQueryFailed) as e:
+                    msg_to_llm = e.reason
+
+                if isinstance(msg_to_llm, OptimizationResponse):
+                    return self._finish_optimization(optimization=msg_to_llm)
+
+                msg_from_llm = self._send_msg(msg=self._encode_message(msg=msg_to_llm))
+
+        finally:
+            self._stop_prefetcher()
+
+    @abc.abstractmethod
+    def _send_text(self, *, msg: str) -> str:
+        raise NotImplementedError
+
+    def _send_msg(self, *, msg: str) -> typing.Mapping[str, typing.Any]:
+        for _ in range(self.MAX_JSON_RETRIES + 1):
+            text = self._send_text(msg=msg)
+            msg_from_llm = self._parse_llm_text(text=text)
+            self._record_reply(text=text, valid=msg_from_llm is not None)
+            if msg_from_llm is not None:
+                return msg_from_llm
+
+            msg = self.INVALID_JSON_MSG
+
+        raise LlmReachedTryCount
+
+    def _handle_llm_request(self, *, msg_from_llm: typing.Mapping[str, typing.Any], db_context: DbContext) -> typing.Any:
+        llm_request = self._build_llm_request(msg_from_llm=msg_from_llm)
+        if isinstance(llm_request, OptimizationResponse):
+            return llm_request
+
+        if isinstance(llm_request, MultiQuestionRequest):
+            return self._answer_questions(questions=llm_request.questions, db_context=db_context)
+
+        return self._run_db_request(query_runner=llm_request, db_context=db_context)
+
+    def _run_db_request(self, *, query_runner: IQueryRunner, db_context: DbContext) -> str:
+        key = query_runner.get_cache_key()
+        self._record_db_request(key=key)
+        return AnswerCache.get_or_compute(
+            db_context=db_context,
+            key=key,
+            compute=lambda: query_runner.get_parsed_response(db_context=db_context),
+        )
+
+    def _answer_questions(self, *, questions: typing.List[typing.Mapping[str, typing.Any]], db_context: DbContext) -> str:
+        with ThreadPoolExecutor(max_workers=min(self.MAX_PARALLEL_QUESTIONS, len(questions))) as executor:
+            answers = list(executor.map(lambda question: self._answer_question(question=question, db_context=db_context), questions))
+
+        return self._build_multi_answer(questions=questions, answers=answers)
+
+    def _answer_question(self, *, question: typing.Mapping[str, typing.Any], db_context: DbContext) -> str:
+        try:
+            query_runner = self._build_question_request(question=question)
+
+        except OutOfSchemaRequest as e:
+            return e.reason
+
+        try:
+            return self._run_db_request(query_runner=query_runner, db_context=db_context)
+
+        except DbQueryFailed as e:
+            return e.reason
+
+
+class IAsyncLLMClient(BaseLLMClient, abc.ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            ASYNC_LLM_TYPE_TO_LLM_CLIENT[cls.get_llm_type()] = cls
+
+    async def get_optimization(self, *, query: str, db_context: DbContext, db_type: DbTypes) -> OptimizationResponse:
+        self._on_session_start(db_type=db_type)
+        self._start_session_report()
+        self._start_history()
+        msg_from_llm = self._build_opening_request(query=query, db_type=db_type)
+        msg_to_llm = await self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
+        prefetcher = self._create_prefetcher(db_context=db_context, db_type=db_type)
+        if prefetcher is not None:
+            prefetcher.start_async(query=query, opening_response=json.loads(msg_to_llm))
+
+        try:
+            msg_from_llm = await self._send_msg(msg=self._encode_message(msg=f"{msg_to_llm}"))
+            while True:
+                try:
+                    msg_to_llm = await self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
+
+                except (OutOfSchemaRequest, DbQueryFailed) as e:
+                    msg_to_llm = e.reason
+
+                if isinstance(msg_to_llm, OptimizationResponse):
+                    return self._finish_optimization(optimization=msg_to_llm)
+
+                msg_from_llm = await self._send_msg(msg=self._encode_message(msg=msg_to_llm))
+
+        finally:
+            self._stop_prefetcher()
+
+    @abc.abstractmethod
+    async def _send_text(self, *, msg: str) -> str:
+        raise NotImplementedError
+
+    async def _send_msg(self, *, msg: str) -> typing.Mapping[str, typing.Any]:
+        for _ in range(self.MAX_JSON_RETRIES + 1):
+            text = await self._send_text(msg=msg)
+            msg_from_llm = self._parse_llm_text(text=text)
+            self._record_reply(text=text, valid=msg_from_llm is not None)
+            if msg_from_llm is not None:
+                return msg_from_llm
+
+            msg = self.INVALID_JSON_MSG
+
+        raise LlmReachedTryCount
+
+    async def _handle_llm_request(self, *, msg_from_llm: typing.Mapping[str, typing.Any], db_context: DbContext) -> typing.Any:
+        llm_request = self._build_llm_request(msg_from_llm=msg_from_llm)
+        if isinstance(llm_request, OptimizationResponse):
+            return llm_request
+
+        if isinstance(llm_request, MultiQuestionRequest):
+            return await self._answer_questions(questions=llm_request.questions, db_context=db_context)
+
+        return await self._run_db_request(query_runner=llm_request, db_context=db_context)
+
+    async def _run_db_request(self, *, query_runner: IQueryRunner, db_context: DbContext) -> str:
+        key = query_runner.get_cache_key()
+        self._record_db_request(key=key)
+        return await AnswerCache.get_or_compute_async(
+            db_context=db_context,
+            key=key,
+            compute=lambda: query_runner.get_parsed_response_async(db_context=db_context),
+        )
+
+    async def _answer_questions(self, *, questions: typing.List[typing.Mapping[str, typing.Any]], db_context: DbContext) -> str:
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_QUESTIONS)
+
+        async def answer(question: typing.Mapping[str, typing.Any]) -> str:
+            async with semaphore:
+                return await self._answer_question(question=question, db_context=db_context)
+
+        answers = await asyncio.gather(*(answer(question) for question in questions))
+        return self._build_multi_answer(questions=questions, answers=list(answers))
+
+    async def _answer_question(self, *, question: typing.Mapping[str, typing.Any], db_context: DbContext) -> str:
+        try:
+            query_runner = self._build_question_request(question=question)
+
+        except OutOfSchemaRequest as e:
+            return e.reason
+
+        try:
+            return await self._run_db_request(query_runner=query_runner, db_context=db_context)
+
+        except DbQueryFailed as e:
+            return e.reason
 
 
 LLM_TYPE_TO_LLM_CLIENT: typing.Dict[LlmTypes, typing.Type[ILLMClient]] = {}
+ASYNC_LLM_TYPE_TO_LLM_CLIENT: typing.Dict[LlmTypes, typing.Type[IAsyncLLMClient]] = {}
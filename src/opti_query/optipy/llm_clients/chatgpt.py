@@ -1,64 +1,166 @@
-import json
+import time
 import typing
-from json import JSONDecodeError
 
-from openai import OpenAI, NotFoundError
+from openai import OpenAI, AsyncOpenAI, NotFoundError, BadRequestError
 
-from .base import ILLMClient
-from ..definitions import DbContext, LlmTypes, OptimizationResponse, DbTypes
-from ..exceptions import OutOfSchemaRequest, UnsupportedModelName
+from .base import ILLMClient, IAsyncLLMClient
+from .history import HistoryMessage
+from .streaming import JsonStreamScanner
+from .schema import ResponseSchemaBuilder
+from ..definitions import LlmTypes, DbTypes
+from ..exceptions import UnsupportedModelName
 
 
-class ChatGPTClient(ILLMClient):
-    def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
+class _ChatGPTConversation:
+    def _init_conversation(self, *, system_instruction: str, model_name: str, llm_auth: typing.Mapping[str, str]) -> None:
         if "api_key" not in llm_auth.keys():
-            raise ValueError("llm_auth for gemini must contain only api_key, not {}".format(list(llm_auth.keys())))
+            raise ValueError("llm_auth for chatgpt must contain only api_key, not {}".format(list(llm_auth.keys())))
 
         if len(llm_auth.keys()) > 1:
-            raise ValueError("llm_auth for gemini must contain only api_key, not {}".format(list(llm_auth.keys())))
+            raise ValueError("llm_auth for chatgpt must contain only api_key, not {}".format(list(llm_auth.keys())))
 
+        self._system_instruction = self._build_system_instruction(system_instruction=system_instruction)
         self._model_name = model_name
-        self._conversation_history = [{"role": "system", "content": system_instruction}]
-        self._client = OpenAI(**llm_auth)
+        self._response_formats: typing.List[typing.Dict[str, typing.Any]] = []
+        self._use_prompt_cache_key = self._PROMPT_CACHE_SETTINGS.enabled
 
     @classmethod
     def get_llm_type(cls) -> LlmTypes:
         return LlmTypes.CHATGPT
 
-    def get_optimization(self, *, query: str, db_context: DbContext, db_type: DbTypes) -> OptimizationResponse:
-        msg_from_llm = {"query_type": f"{db_type.value}_OPENING_QUERY", "data": {"query": query}}
-        msg_to_llm = self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
-        msg_from_llm = self._send_msg(msg=f"{msg_to_llm}")
+    def _on_session_start(self, *, db_type: DbTypes) -> None:
+        self._response_formats = [
+            {
+                "type": "json_schema",
+                "json_schema": {"name": "opti_query_message", "schema": ResponseSchemaBuilder.build_json_schema(db_type=db_type), "strict": False},
+            },
+            {"type": "json_object"},
+        ]
+
+    def _build_completion_kwargs(self, *, messages: typing.List[HistoryMessage]) -> typing.Dict[str, typing.Any]:
+        conversation = [{"role": "system", "content": self._system_instruction}, *(message.model_dump() for message in messages)]
+        kwargs: typing.Dict[str, typing.Any] = {"model": self._model_name, "messages": conversation}
+        if self._use_prompt_cache_key:
+            kwargs["prompt_cache_key"] = self._get_prompt_cache_key(model_name=self._model_name)
+
+        if self._response_formats:
+            kwargs["response_format"] = self._response_formats[0]
+
+        if self._STREAMING_SETTINGS.enabled:
+            kwargs["stream"] = True
+            kwargs["stream_options"] = {"include_usage": True}
+
+        return kwargs
+
+    def _downgrade_request(self, *, error: BadRequestError) -> bool:
+        if self._use_prompt_cache_key and "prompt_cache_key" in str(error):
+            self._use_prompt_cache_key = False
+            return True
+
+        if not self._response_formats or "response_format" not in str(error):
+            return False
+
+        self._response_formats.pop(0)
+        return True
+
+    def _read_completion(self, *, response: typing.Any, scanner: JsonStreamScanner) -> None:
+        scanner.feed(chunk=response.choices[0].message.content or "")
+        self._read_usage(usage=getattr(response, "usage", None))
+
+    def _read_chunk(self, *, chunk: typing.Any, scanner: JsonStreamScanner) -> bool:
+        self._read_usage(usage=getattr(chunk, "usage", None))
+        if chunk.choices:
+            scanner.feed(chunk=chunk.choices[0].delta.content or "")
+
+        return self._should_stop_stream(scanner=scanner)
+
+    def _read_usage(self, *, usage: typing.Any) -> None:
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            self._record_usage(prompt_tokens=usage.prompt_tokens, cached_tokens=getattr(details, "cached_tokens", None))
+
+    def _handle_completion(self, *, scanner: JsonStreamScanner, started: float, sent: float, first_chunk: typing.Optional[float]) -> str:
+        self._record_timing(
+            client_seconds=sent - started,
+            llm_seconds=time.monotonic() - sent,
+            first_chunk_seconds=first_chunk - sent if first_chunk is not None else None,
+        )
+        text = scanner.get_text()
+        self._record_assistant_message(text=text)
+        return text
+
+
+class ChatGPTClient(_ChatGPTConversation, ILLMClient):
+    def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
+        self._init_conversation(system_instruction=system_instruction, model_name=model_name, llm_auth=llm_auth)
+        self._client = OpenAI(**llm_auth)
+
+    def _send_text(self, *, msg: str) -> str:
+        started = time.monotonic()
+        messages = self._build_prompt(msg=msg)
         while True:
+            scanner = JsonStreamScanner()
+            first_chunk = None
+            sent = time.monotonic()
             try:
-                msg_to_llm = self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
+                response = self._client.chat.completions.create(**self._build_completion_kwargs(messages=messages))
+                if not self._STREAMING_SETTINGS.enabled:
+                    self._read_completion(response=response, scanner=scanner)
+
+                else:
+                    for chunk in response:
+                        first_chunk = first_chunk or time.monotonic()
+                        if self._read_chunk(chunk=chunk, scanner=scanner):
+                            response.close()
+                            self._record_early_stop()
+                            self._record_unknown_usage()
+                            break
+
+            except NotFoundError as e:
+                raise UnsupportedModelName(model_name=self._model_name, llm_type=LlmTypes.CHATGPT.value.title()) from e
 
-            except OutOfSchemaRequest as e:
-                msg_to_llm = e.reason
+            except BadRequestError as e:
+                if not self._downgrade_request(error=e):
+                    raise
 
-            if isinstance(msg_to_llm, OptimizationResponse):
-                return msg_to_llm
+                continue
 
-            msg_from_llm = self._send_msg(msg=msg_to_llm)
+            return self._handle_completion(scanner=scanner, started=started, sent=sent, first_chunk=first_chunk)
+
+
+class AsyncChatGPTClient(_ChatGPTConversation, IAsyncLLMClient):
+    def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
+        self._init_conversation(system_instruction=system_instruction, model_name=model_name, llm_auth=llm_auth)
+        self._client = AsyncOpenAI(**llm_auth)
+
+    async def _send_text(self, *, msg: str) -> str:
+        started = time.monotonic()
+        messages = self._build_prompt(msg=msg)
+        while True:
+            scanner = JsonStreamScanner()
+            first_chunk = None
+            sent = time.monotonic()
+            try:
+                response = await self._client.chat.completions.create(**self._build_completion_kwargs(messages=messages))
+                if not self._STREAMING_SETTINGS.enabled:
+                    self._read_completion(response=response, scanner=scanner)
 
-    def _send_msg(self, *, msg: str, try_count: int = 0) -> typing.Mapping[str, typing.Any]:
-        self._conversation_history.append({"role": "user", "content": msg})
-        try:
-            response = self._client.chat.completions.create(
-                model=self._model_name,
-                messages=self._conversation_history,
-            )
+                else:
+                    async for chunk in response:
+                        first_chunk = first_chunk or time.monotonic()
+                        if self._read_chunk(chunk=chunk, scanner=scanner):
+                            await response.close()
+                            self._record_early_stop()
+                            self._record_unknown_usage()
+                            break
 
-        except NotFoundError as e:
-            raise UnsupportedModelName(model_name=self._model_name, llm_type=LlmTypes.CHATGPT.value.title()) from e
+            except NotFoundError as e:
+                raise UnsupportedModelName(model_name=self._model_name, llm_type=LlmTypes.CHATGPT.value.title()) from e
 
-        text = response.choices[0].message.content
-        try:
-            msg_from_llm = json.loads(text)
+            except BadRequestError as e:
+                if not self._downgrade_request(error=e):
+                    raise
 
-        except JSONDecodeError as e:
-            self._conversation_history.append({"role": "assistant", "content": text})
-            failed_to_parse_msg = "Your message is not a valid json. Please send only a **valid json** message."
-            return self._send_msg(msg=failed_to_parse_msg, try_count=try_count + 1)
+                continue
 
-        return msg_from_llm
+            return self._handle_completion(scanner=scanner, started=started, sent=sent, first_chunk=first_chunk)
@@ -1,18 +1,55 @@
-import json
+import datetime
+import threading
+import time
 import typing
-from json import JSONDecodeError
 
 import google.generativeai as genai
-from google.api_core.exceptions import NotFound
+from google.api_core.exceptions import GoogleAPIError, NotFound, InvalidArgument
+from google.generativeai import caching
 from google.generativeai.types import ContentDict
 
-from .base import ILLMClient
-from ..definitions import DbContext, LlmTypes, OptimizationResponse, DbTypes
-from ..exceptions import OutOfSchemaRequest, UnsupportedModelName, LlmReachedTryCount
+from .base import ILLMClient, IAsyncLLMClient
+from .history import HistoryMessage
+from .schema import ResponseSchemaBuilder
+from .streaming import JsonStreamScanner
+from ..definitions import LlmTypes, DbTypes
+from ..exceptions import UnsupportedModelName
 
 
-class GeminiClient(ILLMClient):
-    def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
+class _GeminiCachedContents:
+    REFRESH_MARGIN_SECONDS = 60
+    _CACHES: typing.Dict[str, typing.Tuple[float, typing.Optional[caching.CachedContent]]] = {}
+    _LOCK = threading.Lock()
+
+    @classmethod
+    def get(cls, *, key: str, model_name: str, system_instruction: str, ttl_seconds: int) -> typing.Optional[caching.CachedContent]:
+        with cls._LOCK:
+            entry = cls._CACHES.get(key)
+            if entry is not None and entry[0] - cls.REFRESH_MARGIN_SECONDS > time.monotonic():
+                return entry[1]
+
+            try:
+                cached_content = caching.CachedContent.create(
+                    model=model_name,
+                    display_name=key,
+                    system_instruction=system_instruction,
+                    ttl=datetime.timedelta(seconds=ttl_seconds),
+                )
+
+            except GoogleAPIError:
+                cached_content = None
+
+            cls._CACHES[key] = (time.monotonic() + ttl_seconds, cached_content)
+            return cached_content
+
+    @classmethod
+    def invalidate(cls, *, key: str) -> None:
+        with cls._LOCK:
+            cls._CACHES.pop(key, None)
+
+
+class _GeminiConversation:
+    def _init_conversation(self, *, system_instruction: str, model_name: str, llm_auth: typing.Mapping[str, str]) -> None:
         if "api_key" not in llm_auth.keys():
             raise ValueError("llm_auth for gemini must contain only api_key, not {}".format(list(llm_auth.keys())))
 
@@ -20,56 +57,194 @@ class GeminiClient(ILLMClient):
             raise ValueError("llm_auth for gemini must contain only api_key, not {}".format(list(llm_auth.keys())))
 
         genai.configure(**llm_auth)
-        self._model = genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+        self._system_instruction = self._build_system_instruction(system_instruction=system_instruction)
         self._model_name = model_name
+        self._generation_configs: typing.List[genai.GenerationConfig] = []
+        self._cached_content: typing.Optional[caching.CachedContent] = None
+        self._chat_session: typing.Optional[genai.ChatSession] = None
+        self._chat_compactions = 0
+        self._model = genai.GenerativeModel(model_name=model_name, system_instruction=self._system_instruction)
 
     @classmethod
     def get_llm_type(cls) -> LlmTypes:
         return LlmTypes.GEMINI
 
-    def get_optimization(self, *, query: str, db_context: DbContext, db_type: DbTypes) -> OptimizationResponse:
-        history: list[ContentDict] = []
-        msg_from_llm = {"query_type": f"{db_type.value}_OPENING_QUERY", "data": {"query": query}}
-        msg_to_llm = self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
-        msg_from_llm = self._send_msg(history=history, msg=f"{msg_to_llm}")
+    def _on_session_start(self, *, db_type: DbTypes) -> None:
+        self._generation_configs = [
+            genai.GenerationConfig(response_mime_type="application/json", response_schema=ResponseSchemaBuilder.build_flat_schema(db_type=db_type)),
+            genai.GenerationConfig(response_mime_type="application/json"),
+        ]
+        self._build_model()
+
+    def _build_model(self) -> None:
+        generation_config = self._generation_configs[0] if self._generation_configs else None
+        if self._PROMPT_CACHE_SETTINGS.enabled:
+            self._cached_content = _GeminiCachedContents.get(
+                key=self._get_prompt_cache_key(model_name=self._model_name),
+                model_name=self._model_name,
+                system_instruction=self._system_instruction,
+                ttl_seconds=self._PROMPT_CACHE_SETTINGS.ttl_seconds,
+            )
+
+        self._chat_session = None
+        if self._cached_content is not None:
+            self._model = genai.GenerativeModel.from_cached_content(cached_content=self._cached_content, generation_config=generation_config)
+            return
+
+        self._model = genai.GenerativeModel(model_name=self._model_name, system_instruction=self._system_instruction, generation_config=generation_config)
+
+    def _drop_cached_content(self) -> bool:
+        if self._cached_content is None:
+            return False
+
+        _GeminiCachedContents.invalidate(key=self._get_prompt_cache_key(model_name=self._model_name))
+        self._cached_content = None
+        self._chat_session = None
+        generation_config = self._generation_configs[0] if self._generation_configs else None
+        self._model = genai.GenerativeModel(model_name=self._model_name, system_instruction=self._system_instruction, generation_config=generation_config)
+        return True
+
+    def _downgrade_generation_config(self) -> bool:
+        if not self._generation_configs:
+            return False
+
+        self._generation_configs.pop(0)
+        self._build_model()
+        return True
+
+    def _get_chat_session(self, *, messages: typing.List[HistoryMessage]) -> genai.ChatSession:
+        if self._chat_session is None or self._chat_compactions != self._history.compacted_exchanges:
+            history = [ContentDict(role="model" if message.role == "assistant" else "user", parts=[message.content]) for message in messages[:-1]]
+            self._chat_session = self._model.start_chat(history=history)
+            self._chat_compactions = self._history.compacted_exchanges
+
+        return self._chat_session
+
+    def _stop_stream(self, *, chat_session: genai.ChatSession, response: typing.Any, msg: str, text: str) -> None:
+        # The SDK has no public way to stop a stream and keep the partial reply, so this relies on google-generativeai 0.8
+        # internals: the transport stream is response._iterator (a grpc call with cancel(), or a REST generator with close()),
+        # and rewind() drops the unfinished turn the session still holds. If any of that changes, the chat session is dropped
+        # and rebuilt from the client history on the next turn.
+        try:
+            stream = response._iterator
+            if hasattr(stream, "cancel"):
+                stream.cancel()
+
+            else:
+                stream.close()
+
+            chat_session.rewind()
+            chat_session.history.extend(
+                [
+                    genai.protos.Content(role="user", parts=[genai.protos.Part(text=msg)]),
+                    genai.protos.Content(role="model", parts=[genai.protos.Part(text=text)]),
+                ]
+            )
+
+        except Exception:
+            self._chat_session = None
+
+        self._record_early_stop()
+        self._record_unknown_usage()
+
+    @classmethod
+    def _get_chunk_text(cls, *, chunk: typing.Any) -> str:
+        try:
+            return chunk.text
+
+        except ValueError:
+            return ""
+
+    def _handle_response(
+        self,
+        *,
+        response: typing.Any,
+        scanner: JsonStreamScanner,
+        started: float,
+        sent: float,
+        first_chunk: typing.Optional[float],
+    ) -> str:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self._record_usage(prompt_tokens=usage.prompt_token_count, cached_tokens=usage.cached_content_token_count)
+
+        self._record_timing(
+            client_seconds=sent - started,
+            llm_seconds=time.monotonic() - sent,
+            first_chunk_seconds=first_chunk - sent if first_chunk is not None else None,
+        )
+        text = scanner.get_text()
+        self._record_assistant_message(text=text)
+        return text
+
+
+class GeminiClient(_GeminiConversation, ILLMClient):
+    def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
+        self._init_conversation(system_instruction=system_instruction, model_name=model_name, llm_auth=llm_auth)
+
+    def _send_text(self, *, msg: str) -> str:
+        started = time.monotonic()
+        messages = self._build_prompt(msg=msg)
         while True:
+            chat_session = self._get_chat_session(messages=messages)
+            scanner = JsonStreamScanner()
+            first_chunk = None
+            sent = time.monotonic()
             try:
-                msg_to_llm = self._handle_llm_request(msg_from_llm=msg_from_llm, db_context=db_context)
+                response = chat_session.send_message(msg, stream=self._STREAMING_SETTINGS.enabled)
+                for chunk in response:
+                    first_chunk = first_chunk or time.monotonic()
+                    scanner.feed(chunk=self._get_chunk_text(chunk=chunk))
+                    if self._should_stop_stream(scanner=scanner):
+                        self._stop_stream(chat_session=chat_session, response=response, msg=msg, text=scanner.result)
+                        break
 
-            except OutOfSchemaRequest as e:
-                msg_to_llm = e.reason
+            except NotFound as e:
+                if self._drop_cached_content():
+                    continue
 
-            if isinstance(msg_to_llm, OptimizationResponse):
-                return msg_to_llm
+                raise UnsupportedModelName(model_name=self._model_name, llm_type=LlmTypes.GEMINI.value.title()) from e
 
-            msg_from_llm = self._send_msg(history=history, msg=msg_to_llm)
+            except InvalidArgument:
+                if not self._downgrade_generation_config() and not self._drop_cached_content():
+                    raise
 
-    def _send_msg(self, *, history: typing.List[ContentDict], msg: str, try_count: int = 0) -> typing.Mapping[str, typing.Any]:
-        chat_session = self._model.start_chat(history=history)
-        try:
-            response = chat_session.send_message(msg)
+                continue
 
-        except NotFound as e:
-            raise UnsupportedModelName(model_name=self._model_name, llm_type=LlmTypes.GEMINI.value.title()) from e
+            return self._handle_response(response=response, scanner=scanner, started=started, sent=sent, first_chunk=first_chunk)
 
-        try:
-            text = response.text[7:-4]
-            msg_from_llm = json.loads(text)
 
-        except JSONDecodeError as e:
-            text = response.text
+class AsyncGeminiClient(_GeminiConversation, IAsyncLLMClient):
+    def __init__(self, *, system_instruction: str, model_name: str, **llm_auth) -> None:
+        self._init_conversation(system_instruction=system_instruction, model_name=model_name, llm_auth=llm_auth)
+
+    async def _send_text(self, *, msg: str) -> str:
+        started = time.monotonic()
+        messages = self._build_prompt(msg=msg)
+        while True:
+            chat_session = self._get_chat_session(messages=messages)
+            scanner = JsonStreamScanner()
+            first_chunk = None
+            sent = time.monotonic()
             try:
-                msg_from_llm = json.loads(text)
+                response = await chat_session.send_message_async(msg, stream=self._STREAMING_SETTINGS.enabled)
+                async for chunk in response:
+                    first_chunk = first_chunk or time.monotonic()
+                    scanner.feed(chunk=self._get_chunk_text(chunk=chunk))
+                    if self._should_stop_stream(scanner=scanner):
+                        self._stop_stream(chat_session=chat_session, response=response, msg=msg, text=scanner.result)
+                        break
+
+            except NotFound as e:
+                if self._drop_cached_content():
+                    continue
+
+                raise UnsupportedModelName(model_name=self._model_name, llm_type=LlmTypes.GEMINI.value.title()) from e
 
-            except JSONDecodeError as e:
-                if try_count > 5:
-                    raise LlmReachedTryCount
+            except InvalidArgument:
+                if not self._downgrade_generation_config() and not self._drop_cached_content():
+                    raise
 
-                history.append(ContentDict(role="user", parts=[msg]))
-                history.append(ContentDict(role="model", parts=[response.text]))
-                failed_to_parse_msg = "Your message is not a valid json. Please send only a **valid json** message."
-                return self._send_msg(history=history, msg=failed_to_parse_msg, try_count=try_count + 1)
+                continue
 
-        history.append(ContentDict(role="user", parts=[msg]))
-        history.append(ContentDict(role="model", parts=[response.text]))
-        return msg_from_llm
+            return self._handle_response(response=response, scanner=scanner, started=started, sent=sent, first_chunk=first_chunk)
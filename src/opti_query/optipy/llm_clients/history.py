@@ -0,0 +1,98 @@
+import json
+import typing
+
+from pydantic import BaseModel
+
+from ..encoding import TokenCounter
+
+
+class HistorySettings(BaseModel):
+    enabled: bool = True
+    max_prompt_tokens: int = 32000
+    keep_recent_exchanges: int = 3
+    max_fact_length: int = 600
+
+
+class HistoryMessage(BaseModel):
+    role: str
+    content: str
+
+
+class ConversationHistory:
+    USER = "user"
+    ASSISTANT = "assistant"
+    LEDGER_HEADER = "FACTS LEARNED IN EARLIER TURNS (the messages themselves were compacted, treat these as already answered):"
+
+    def __init__(
+        self,
+        *,
+        system_instruction: str,
+        settings: HistorySettings,
+        parse_reply: typing.Callable[[str], typing.Optional[typing.Mapping[str, typing.Any]]],
+    ) -> None:
+        self._settings = settings
+        self._parse_reply = parse_reply
+        self._system_tokens = TokenCounter.count(text=system_instruction)
+        self._opening: typing.Optional[HistoryMessage] = None
+        self._messages: typing.List[HistoryMessage] = []
+        self._facts: typing.List[str] = []
+        self._tokens: typing.List[int] = []
+        self.compacted_exchanges = 0
+
+    def add_user(self, *, content: str) -> None:
+        if self._opening is None:
+            self._opening = HistoryMessage(role=self.USER, content=content)
+            return
+
+        self._append(message=HistoryMessage(role=self.USER, content=content))
+
+    def add_assistant(self, *, content: str) -> None:
+        self._append(message=HistoryMessage(role=self.ASSISTANT, content=content))
+
+    def get_messages(self) -> typing.List[HistoryMessage]:
+        if self._settings.enabled:
+            self._compact()
+
+        return [self._get_pinned(), *self._messages] if self._opening is not None else list(self._messages)
+
+    def get_prompt_tokens(self) -> int:
+        pinned_tokens = TokenCounter.count(text=self._get_pinned().content) if self._opening is not None else 0
+        return self._system_tokens + pinned_tokens + sum(self._tokens)
+
+    def get_facts(self) -> typing.List[str]:
+        return list(self._facts)
+
+    def _append(self, *, message: HistoryMessage) -> None:
+        self._messages.append(message)
+        self._tokens.append(TokenCounter.count(text=message.content))
+
+    def _get_pinned(self) -> HistoryMessage:
+        if not self._facts:
+            return self._opening
+
+        facts = "\n".join(f"- {fact}" for fact in self._facts)
+        return HistoryMessage(role=self.USER, content=f"{self._opening.content}\n\n{self.LEDGER_HEADER}\n{facts}")
+
+    def _compact(self) -> None:
+        while self.get_prompt_tokens() > self._settings.max_prompt_tokens and len(self._messages) > 2 * self._settings.keep_recent_exchanges:
+            question, answer = self._messages[0], self._messages[1]
+            del self._messages[:2]
+            del self._tokens[:2]
+            self.compacted_exchanges += 1
+            fact = self._build_fact(question=question.content, answer=answer.content)
+            if fact is not None:
+                self._facts.append(fact)
+
+        while self._facts and self.get_prompt_tokens() > self._settings.max_prompt_tokens:
+            self._facts.pop(0)
+
+    def _build_fact(self, *, question: str, answer: str) -> typing.Optional[str]:
+        parsed_question = self._parse_reply(question)
+        if parsed_question is None:
+            return None
+
+        answer = " ".join(answer.split())
+        if len(answer) > self._settings.max_fact_length:
+            answer = answer[: self._settings.max_fact_length] + "…"
+
+        return f"{json.dumps(parsed_question, separators=(',', ':'))} => {answer}"
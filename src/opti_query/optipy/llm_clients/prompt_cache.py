@@ -0,0 +1,18 @@
+import hashlib
+
+from pydantic import BaseModel
+
+
+class PromptCacheSettings(BaseModel):
+    enabled: bool = True
+    ttl_seconds: int = 60 * 60
+
+
+class PromptCacheUtils:
+    KEY_PREFIX = "opti-query"
+    KEY_HASH_LENGTH = 16
+
+    @classmethod
+    def build_key(cls, *, model_name: str, system_instruction: str) -> str:
+        digest = hashlib.sha256(f"{model_name}\n{system_instruction}".encode()).hexdigest()[: cls.KEY_HASH_LENGTH]
+        return f"{cls.KEY_PREFIX}-{digest}"
@@ -0,0 +1,106 @@
+import typing
+
+from ..definitions import DbTypes, QueryTypes, OptimizationResponse, DB_TYPE_TO_OPENING_QUERY
+from ..queries.base import QUERY_TYPE_TO_QUERY_CLASS
+
+
+class ResponseSchemaBuilder:
+    FLAT_SCHEMA_KEYS = ("type", "items", "properties", "required", "enum", "description", "nullable")
+
+    @classmethod
+    def get_question_types(cls, *, db_type: DbTypes) -> typing.List[QueryTypes]:
+        opening_query_type = DB_TYPE_TO_OPENING_QUERY[db_type]
+        return [query_type for query_type in QUERY_TYPE_TO_QUERY_CLASS if query_type.startswith(f"{db_type.value}_") and query_type != opening_query_type]
+
+    @classmethod
+    def build_json_schema(cls, *, db_type: DbTypes) -> typing.Dict[str, typing.Any]:
+        question_types = cls.get_question_types(db_type=db_type)
+        question_data_schemas = [QUERY_TYPE_TO_QUERY_CLASS[query_type].get_request_schema() for query_type in question_types]
+        question_schema = cls._build_message_schema(query_types=question_types, data_schemas=question_data_schemas)
+        multi_question_schema = {
+            "type": "object",
+            "properties": {"questions": {"type": "array", "items": question_schema}},
+            "required": ["questions"],
+            "additionalProperties": False,
+        }
+        return cls._build_message_schema(
+            query_types=[*question_types, QueryTypes.MULTI_QUESTION, QueryTypes.OPTIMIZE_FINISHED],
+            data_schemas=[*question_data_schemas, multi_question_schema, OptimizationResponse.get_request_schema()],
+        )
+
+    @classmethod
+    def build_flat_schema(cls, *, db_type: DbTypes) -> typing.Dict[str, typing.Any]:
+        question_types = cls.get_question_types(db_type=db_type)
+        question_data_schema = cls._merge_object_schemas(schemas=[QUERY_TYPE_TO_QUERY_CLASS[query_type].get_request_schema() for query_type in question_types])
+        question_schema = {
+            "type": "object",
+            "properties": {"query_type": {"type": "string", "enum": [query_type.value for query_type in question_types]}, "data": question_data_schema},
+            "required": ["query_type", "data"],
+        }
+        data_schema = cls._merge_object_schemas(
+            schemas=[
+                question_data_schema,
+                {"type": "object", "properties": {"questions": {"type": "array", "items": question_schema}}},
+                cls._to_flat_schema(schema=OptimizationResponse.get_request_schema()),
+            ]
+        )
+        query_types = [*question_types, QueryTypes.MULTI_QUESTION, QueryTypes.OPTIMIZE_FINISHED]
+        return {
+            "type": "object",
+            "properties": {"query_type": {"type": "string", "enum": [query_type.value for query_type in query_types]}, "data": data_schema},
+            "required": ["query_type", "data"],
+        }
+
+    @classmethod
+    def _build_message_schema(
+        cls,
+        *,
+        query_types: typing.List[QueryTypes],
+        data_schemas: typing.List[typing.Dict[str, typing.Any]],
+    ) -> typing.Dict[str, typing.Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query_type": {"type": "string", "enum": [query_type.value for query_type in query_types]},
+                "data": {"anyOf": data_schemas},
+            },
+            "required": ["query_type", "data"],
+            "additionalProperties": False,
+        }
+
+    @classmethod
+    def _merge_object_schemas(cls, *, schemas: typing.Iterable[typing.Dict[str, typing.Any]]) -> typing.Dict[str, typing.Any]:
+        properties: typing.Dict[str, typing.Any] = {}
+        required: typing.Optional[typing.List[str]] = None
+        for schema in schemas:
+            for name, prop in schema.get("properties", {}).items():
+                properties.setdefault(name, cls._to_flat_schema(schema=prop))
+
+            schema_required = schema.get("required", [])
+            required = list(schema_required) if required is None else [name for name in required if name in schema_required]
+
+        return {"type": "object", "properties": properties, "required": required or []}
+
+    @classmethod
+    def _to_flat_schema(cls, *, schema: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        flat_schema: typing.Dict[str, typing.Any] = {}
+        for key, value in schema.items():
+            if key not in cls.FLAT_SCHEMA_KEYS:
+                continue
+
+            if key == "items":
+                flat_schema[key] = cls._to_flat_schema(schema=value)
+
+            elif key == "properties":
+                flat_schema[key] = {name: cls._to_flat_schema(schema=prop) for name, prop in value.items()}
+
+            else:
+                flat_schema[key] = value
+
+        if "anyOf" in schema and "type" not in flat_schema:
+            options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+            flat_schema.update(cls._to_flat_schema(schema=options[0]))
+            if len(options) < len(schema["anyOf"]):
+                flat_schema["nullable"] = True
+
+        return flat_schema
@@ -0,0 +1,65 @@
+import typing
+
+from pydantic import BaseModel
+
+
+class StreamingSettings(BaseModel):
+    enabled: bool = True
+    stop_on_first_object: bool = True
+
+
+class JsonStreamScanner:
+    OBJECT_START = "{"
+    OPENERS = "{["
+    CLOSERS = "}]"
+
+    def __init__(self) -> None:
+        self._chunks: typing.List[str] = []
+        self._object_chars: typing.List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.result: typing.Optional[str] = None
+
+    def feed(self, *, chunk: str) -> typing.Optional[str]:
+        self._chunks.append(chunk)
+        if self.result is not None:
+            return self.result
+
+        for char in chunk:
+            if self._depth == 0:
+                if char == self.OBJECT_START:
+                    self._depth = 1
+                    self._object_chars = [char]
+
+                continue
+
+            self._object_chars.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+
+                elif char == "\\":
+                    self._escaped = True
+
+                elif char == '"':
+                    self._in_string = False
+
+                continue
+
+            if char == '"':
+                self._in_string = True
+
+            elif char in self.OPENERS:
+                self._depth += 1
+
+            elif char in self.CLOSERS:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.result = "".join(self._object_chars)
+                    return self.result
+
+        return None
+
+    def get_text(self) -> str:
+        return self.result if self.result is not None else "".join(self._chunks)
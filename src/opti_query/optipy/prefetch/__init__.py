@@ -0,0 +1,2 @@
+from .base import IQueryPrefetcher, PrefetchSettings, PrefetchMetrics, DB_TYPE_TO_PREFETCHER
+from .neo4j import Neo4jQueryPrefetcher
@@ -0,0 +1,177 @@
+import abc
+import asyncio
+import inspect
+import threading
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+from ..caching import AnswerCache
+from ..definitions import DbContext, DbTypes
+from ..queries.base import IQueryRunner
+
+
+class PrefetchSettings(BaseModel):
+    enabled: bool = True
+    max_workers: int = 4
+    max_tasks: int = 24
+    max_pairwise_labels: int = 6
+
+
+class PrefetchMetrics(BaseModel):
+    prefetched: int = 0
+    requested: int = 0
+    used: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.used / self.requested if self.requested else 0.0
+
+    @property
+    def precision(self) -> float:
+        return self.used / self.prefetched if self.prefetched else 0.0
+
+
+class IQueryPrefetcher(abc.ABC):
+    _SETTINGS = PrefetchSettings()
+    _EXECUTOR: typing.Optional[ThreadPoolExecutor] = None
+    _LOCK = threading.Lock()
+    _TOTAL_METRICS = PrefetchMetrics()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__()
+
+        if not inspect.isabstract(cls):
+            DB_TYPE_TO_PREFETCHER[cls.get_db_type()] = cls
+
+    def __init__(self, *, db_context: DbContext) -> None:
+        self._db_context = db_context
+        self._prefetched_keys: typing.Set[typing.Hashable] = set()
+        self._used_keys: typing.Set[typing.Hashable] = set()
+        self._futures: typing.List[Future] = []
+        self._tasks: typing.List[asyncio.Task] = []
+        self._metrics = PrefetchMetrics()
+
+    @classmethod
+    @abc.abstractmethod
+    def get_db_type(cls) -> DbTypes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def build_query_runners(self, *, query: str, opening_response: typing.Mapping[str, typing.Any]) -> typing.List[IQueryRunner]:
+        raise NotImplementedError
+
+    @classmethod
+    def configure(cls, *, settings: PrefetchSettings) -> None:
+        with cls._LOCK:
+            IQueryPrefetcher._SETTINGS = settings
+            if IQueryPrefetcher._EXECUTOR is not None:
+                IQueryPrefetcher._EXECUTOR.shutdown(wait=False, cancel_futures=True)
+                IQueryPrefetcher._EXECUTOR = None
+
+    @classmethod
+    def get_total_metrics(cls) -> PrefetchMetrics:
+        with cls._LOCK:
+            return cls._TOTAL_METRICS.model_copy()
+
+    @classmethod
+    def reset_total_metrics(cls) -> None:
+        with cls._LOCK:
+            IQueryPrefetcher._TOTAL_METRICS = PrefetchMetrics()
+
+    def get_metrics(self) -> PrefetchMetrics:
+        return self._metrics.model_copy()
+
+    def start(self, *, query: str, opening_response: typing.Mapping[str, typing.Any]) -> None:
+        executor = self._get_executor()
+        for query_runner in self._select_query_runners(query=query, opening_response=opening_response):
+            self._futures.append(executor.submit(self._prefetch, query_runner=query_runner))
+
+    def start_async(self, *, query: str, opening_response: typing.Mapping[str, typing.Any]) -> None:
+        semaphore = asyncio.Semaphore(self._SETTINGS.max_workers)
+
+        async def prefetch(query_runner: IQueryRunner) -> None:
+            async with semaphore:
+                await self._prefetch_async(query_runner=query_runner)
+
+        for query_runner in self._select_query_runners(query=query, opening_response=opening_response):
+            self._tasks.append(asyncio.create_task(prefetch(query_runner)))
+
+    def record_request(self, *, key: typing.Optional[typing.Hashable]) -> None:
+        if key is None:
+            return
+
+        with self._LOCK:
+            self._metrics.requested += 1
+            self._TOTAL_METRICS.requested += 1
+            if key in self._prefetched_keys and key not in self._used_keys:
+                self._used_keys.add(key)
+                self._metrics.used += 1
+                self._TOTAL_METRICS.used += 1
+
+    def stop(self) -> None:
+        for future in self._futures:
+            future.cancel()
+
+        for task in self._tasks:
+            task.cancel()
+
+        self._futures.clear()
+        self._tasks.clear()
+
+    def _select_query_runners(self, *, query: str, opening_response: typing.Mapping[str, typing.Any]) -> typing.List[IQueryRunner]:
+        if not self._SETTINGS.enabled:
+            return []
+
+        selected: typing.List[IQueryRunner] = []
+        for query_runner in self.build_query_runners(query=query, opening_response=opening_response):
+            key = query_runner.get_cache_key()
+            if key is None or key in self._prefetched_keys or AnswerCache.contains(db_context=self._db_context, key=key):
+                continue
+
+            self._prefetched_keys.add(key)
+            selected.append(query_runner)
+            if len(selected) >= self._SETTINGS.max_tasks:
+                break
+
+        with self._LOCK:
+            self._metrics.prefetched += len(selected)
+            self._TOTAL_METRICS.prefetched += len(selected)
+
+        return selected
+
+    def _prefetch(self, *, query_runner: IQueryRunner) -> None:
+        try:
+            AnswerCache.get_or_compute(
+                db_context=self._db_context,
+                key=query_runner.get_cache_key(),
+                compute=lambda: query_runner.get_parsed_response(db_context=self._db_context),
+                record_stats=False,
+            )
+
+        except Exception:
+            pass
+
+    async def _prefetch_async(self, *, query_runner: IQueryRunner) -> None:
+        try:
+            await AnswerCache.get_or_compute_async(
+                db_context=self._db_context,
+                key=query_runner.get_cache_key(),
+                compute=lambda: query_runner.get_parsed_response_async(db_context=self._db_context),
+                record_stats=False,
+            )
+
+        except Exception:
+            pass
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._LOCK:
+            if IQueryPrefetcher._EXECUTOR is None:
+                IQueryPrefetcher._EXECUTOR = ThreadPoolExecutor(max_workers=cls._SETTINGS.max_workers, thread_name_prefix="opti-query-prefetch")
+
+            return IQueryPrefetcher._EXECUTOR
+
+
+DB_TYPE_TO_PREFETCHER: typing.Dict[DbTypes, typing.Type[IQueryPrefetcher]] = {}
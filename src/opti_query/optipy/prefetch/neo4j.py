@@ -0,0 +1,87 @@
+import itertools
+import typing
+
+from .base import IQueryPrefetcher
+from ..definitions import DbTypes
+from ..queries.base import IQueryRunner
+from ..queries.neo4j import (
+    Neo4jLabelCountQueryRunner,
+    Neo4jRelBetweenLabelsCountQueryRunner,
+    Neo4jPropertiesForLabelsRunner,
+    Neo4jPropertySelectivityRunner,
+    Neo4jDegreeDistributionRunner,
+)
+from ..utils.cypher import CypherUtils
+from ..utils.schema import Neo4jSchemaPruner
+
+
+class Neo4jQueryPrefetcher(IQueryPrefetcher):
+    @classmethod
+    def get_db_type(cls) -> DbTypes:
+        return DbTypes.NEO4J
+
+    def build_query_runners(self, *, query: str, opening_response: typing.Mapping[str, typing.Any]) -> typing.List[IQueryRunner]:
+        patterns = CypherUtils.extract_patterns(query=query)
+        known_labels = self._get_names(counts=opening_response.get("node_count", []))
+        known_rel_types = Neo4jSchemaPruner.get_rel_types(schema=opening_response) if "relationship_count" in opening_response else set()
+        labels = [label for label in patterns.labels if not known_labels or label in known_labels]
+
+        query_runners: typing.List[IQueryRunner] = [Neo4jLabelCountQueryRunner(labels=[label]) for label in labels]
+
+        for relationship in patterns.relationships:
+            if not relationship.from_node_labels or not relationship.to_node_labels:
+                continue
+
+            if known_rel_types and relationship.rel_type not in known_rel_types:
+                continue
+
+            query_runners.append(
+                Neo4jRelBetweenLabelsCountQueryRunner(
+                    from_node_labels=relationship.from_node_labels,
+                    to_node_labels=relationship.to_node_labels,
+                    rel_type=relationship.rel_type,
+                )
+            )
+            query_runners.append(Neo4jDegreeDistributionRunner(labels=relationship.from_node_labels, rel_type=relationship.rel_type))
+
+        for first_label, second_label in itertools.combinations(labels[: self._SETTINGS.max_pairwise_labels], 2):
+            query_runners.append(Neo4jLabelCountQueryRunner(labels=[first_label, second_label]))
+
+        for label, indexed_label in self._get_escalation_candidates(
+            labels=labels,
+            properties_by_label=patterns.properties_by_label,
+            indexes=opening_response.get("indexes", []),
+        ):
+            query_runners.append(Neo4jLabelCountQueryRunner(labels=[label, indexed_label]))
+
+        for label in labels:
+            if label in patterns.properties_by_label:
+                query_runners.append(Neo4jPropertiesForLabelsRunner(labels=[label]))
+                query_runners.append(Neo4jPropertySelectivityRunner(labels=[label], properties=patterns.properties_by_label[label]))
+
+        return query_runners
+
+    @classmethod
+    def _get_names(cls, *, counts: typing.Iterable[typing.Mapping[str, int]]) -> typing.Set[str]:
+        return {name for count in counts for name in count}
+
+    @classmethod
+    def _get_escalation_candidates(
+        cls,
+        *,
+        labels: typing.List[str],
+        properties_by_label: typing.Mapping[str, typing.List[str]],
+        indexes: typing.Iterable[typing.Mapping[str, str]],
+    ) -> typing.List[typing.Tuple[str, str]]:
+        indexed_pairs = {(index["label"], index["property"]) for index in indexes}
+        candidates: typing.List[typing.Tuple[str, str]] = []
+        for label in labels:
+            for prop in properties_by_label.get(label, []):
+                if (label, prop) in indexed_pairs:
+                    continue
+
+                for indexed_label, indexed_prop in sorted(indexed_pairs):
+                    if indexed_prop == prop and indexed_label != label and (label, indexed_label) not in candidates:
+                        candidates.append((label, indexed_label))
+
+        return candidates
@@ -1,2 +1,11 @@
 from .base import IQueryRunner
-from .neo4j import Neo4jExplainQueryRunner, Neo4jOpeningQueryRunner, Neo4jLabelCountQueryRunner, Neo4jRelBetweenLabelsCountQueryRunner, Neo4jPropertiesForLabelsRunner
+from .neo4j import (
+    Neo4jExplainQueryRunner,
+    Neo4jOpeningQueryRunner,
+    Neo4jLabelCountQueryRunner,
+    Neo4jRelBetweenLabelsCountQueryRunner,
+    Neo4jPropertiesForLabelsRunner,
+    Neo4jPropertySelectivityRunner,
+    Neo4jDegreeDistributionRunner,
+    Neo4jSchemaDetailsRunner,
+)
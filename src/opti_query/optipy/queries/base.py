@@ -29,5 +29,12 @@ class IQueryRunner(OptiModel):
     def get_parsed_response(self, *, db_context: DbContext) -> str:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    async def get_parsed_response_async(self, *, db_context: DbContext) -> str:
+        raise NotImplementedError
+
+    def get_cache_key(self) -> typing.Optional[typing.Hashable]:
+        return None
+
 
 QUERY_TYPE_TO_QUERY_CLASS: typing.Dict[QueryTypes, typing.Type[IQueryRunner]] = {}
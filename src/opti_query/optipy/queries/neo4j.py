@@ -1,28 +1,89 @@
 import abc
 import json
+import math
+import time
 import typing
-from collections import defaultdict, Counter
+from collections import defaultdict
 
-from neo4j.exceptions import ClientError
+from pydantic import BaseModel
 
 from .base import IQueryRunner
+from ..caching import SchemaCache, AnswerCache
 from ..definitions import DbContext, QueryTypes
-from ..exceptions import OutOfSchemaRequest
+from ..exceptions import OutOfSchemaRequest, DbQueryFailed
+from ..utils.cypher import CypherUtils
 from ..utils.neo4j import Neo4jUtils
+from ..utils.plans import PlanAnalyzer
+from ..utils.sampling import SamplingUtils
+from ..utils.schema import Neo4jSchemaPruner
 
 
 class Neo4jQueryRunner(IQueryRunner, abc.ABC):
+    def get_parsed_response(self, *, db_context: DbContext) -> str:
+        return self._parse_results(results=list(self._run_query(db_context=db_context)))
+
+    async def get_parsed_response_async(self, *, db_context: DbContext) -> str:
+        return self._parse_results(results=await self._run_query_async(db_context=db_context))
+
+    @abc.abstractmethod
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        raise NotImplementedError
+
     def _run_query(self, *, db_context: DbContext) -> typing.Generator[typing.Any, None, None]:
+        yield from self._run_queries(db_context=db_context, queries=self.build_queries())
+
+    async def _run_query_async(self, *, db_context: DbContext) -> typing.List[typing.Any]:
+        return await self._run_queries_async(db_context=db_context, queries=self.build_queries())
+
+    @classmethod
+    def _run_queries(cls, *, db_context: DbContext, queries: typing.List[str]) -> typing.Generator[typing.Any, None, None]:
         with Neo4jUtils.acquire_tx(db_context=db_context) as tx:
-            for query in self.build_queries():
+            for query in queries:
                 try:
                     yield tx.run(query).data()
 
                 except Exception as e:
-                    yield f"Please try again, error was raised while running query: {e}. \nThe error might be related to you."
+                    yield cls._build_failure(error=e)
+
+    @classmethod
+    async def _run_queries_async(cls, *, db_context: DbContext, queries: typing.List[str]) -> typing.List[typing.Any]:
+        results = []
+        async with Neo4jUtils.acquire_async_tx(db_context=db_context) as tx:
+            for query in queries:
+                try:
+                    result = await tx.run(query)
+                    results.append(await result.data())
+
+                except Exception as e:
+                    results.append(cls._build_failure(error=e))
+
+        return results
+
+    @classmethod
+    def _build_failure(cls, *, error: Exception) -> DbQueryFailed:
+        return DbQueryFailed(reason=f"Please try again, error was raised while running query: {error}. \nThe error might be related to you.")
+
+    @classmethod
+    def _raise_on_failure(cls, *, result: typing.Any) -> typing.Any:
+        if isinstance(result, DbQueryFailed):
+            raise result
+
+        return result
+
+    @classmethod
+    def _normalize_names(cls, *, names: typing.Iterable[str]) -> typing.Tuple[str, ...]:
+        return tuple(sorted({cls._normalize_name(name=name) for name in names}))
+
+    @classmethod
+    def _normalize_name(cls, *, name: str) -> str:
+        return name.strip().lstrip(":").strip("`")
 
 
 class Neo4jOpeningQueryRunner(Neo4jQueryRunner):
+    COOCCURRENCE_MAX_LABELS: typing.ClassVar[int] = 20
+    COOCCURRENCE_EXACT_THRESHOLD: typing.ClassVar[int] = 5_000_000
+    COOCCURRENCE_SAMPLE_SIZE: typing.ClassVar[int] = 10_000
+
     query: str
 
     @classmethod
@@ -30,20 +91,14 @@ class Neo4jOpeningQueryRunner(Neo4jQueryRunner):
         return QueryTypes.NEO4J_OPENING_QUERY
 
     def build_queries(self) -> typing.List[str]:
+        return self.build_schema_queries()
+
+    @classmethod
+    def build_schema_queries(cls) -> typing.List[str]:
         return [
             """
-            CALL () {
-                CALL apoc.meta.stats() YIELD labels, relTypes
-                UNWIND keys(labels) AS label
-                WITH 'node_count' AS section, label AS name, labels[label] AS count, relTypes
-                RETURN section, name, count
-                UNION ALL
-                CALL apoc.meta.stats() YIELD relTypes
-                UNWIND keys(relTypes) AS relType
-                WITH 'relationship_count' AS section, relType AS name, relTypes[relType] AS count
-                RETURN section, name, count
-            }
-            RETURN section, name, count
+            CALL apoc.meta.stats() YIELD labels, relTypes
+            RETURN labels, relTypes
             """,
             """
             SHOW INDEXES YIELD labelsOrTypes AS labels, properties
@@ -67,16 +122,159 @@ class Neo4jOpeningQueryRunner(Neo4jQueryRunner):
             keys = ", ".join(key for key in data.keys() if key != "query")
             raise OutOfSchemaRequest(reason=f"Request with query_type: {cls.get_query_type().value} must contain only 'query' key in data, request contains {keys}.")
 
+    @classmethod
+    def build_fingerprint_queries(cls) -> typing.List[str]:
+        return [
+            """
+            CALL apoc.meta.stats() YIELD nodeCount, relCount, labels, relTypesCount
+            RETURN nodeCount, relCount, labels, relTypesCount
+            """,
+            """
+            SHOW INDEXES YIELD name, state
+            RETURN collect(name + ':' + state) AS indexes
+            """,
+            """
+            SHOW CONSTRAINTS YIELD name
+            RETURN collect(name) AS constraints
+            """,
+        ]
+
+    @classmethod
+    def load_schema(cls, *, db_context: DbContext) -> typing.Mapping[str, typing.Any]:
+        return SchemaCache.get_or_load(
+            db_context=db_context,
+            fingerprint=lambda: cls._parse_fingerprint(results=list(cls._run_queries(db_context=db_context, queries=cls.build_fingerprint_queries()))),
+            loader=lambda: cls._parse_schema(results=list(cls._run_queries(db_context=db_context, queries=cls.build_schema_queries()))),
+        )
+
+    @classmethod
+    async def load_schema_async(cls, *, db_context: DbContext) -> typing.Mapping[str, typing.Any]:
+        async def fingerprint() -> str:
+            return cls._parse_fingerprint(results=await cls._run_queries_async(db_context=db_context, queries=cls.build_fingerprint_queries()))
+
+        async def loader() -> typing.Dict[str, typing.Any]:
+            return cls._parse_schema(results=await cls._run_queries_async(db_context=db_context, queries=cls.build_schema_queries()))
+
+        return await SchemaCache.get_or_load_async(db_context=db_context, fingerprint=fingerprint, loader=loader)
+
     def get_parsed_response(self, *, db_context: DbContext) -> str:
-        stats_response, indexes_response, constraints_response = tuple(self._run_query(db_context=db_context))
+        schema = Neo4jSchemaPruner.prune(schema=self.load_schema(db_context=db_context), query=self.query)
+        cooccurrence = None
+        labels = self._get_cooccurrence_labels(schema=schema)
+        if len(labels) > 1:
+            query, exact = self.build_cooccurrence_query(labels=labels, schema=schema)
+            try:
+                cooccurrence = AnswerCache.get_or_compute(
+                    db_context=db_context,
+                    key=(QueryTypes.NEO4J_OPENING_QUERY, "label_cooccurrence", tuple(labels), exact),
+                    compute=lambda: self._parse_cooccurrence(labels=labels, exact=exact, results=list(self._run_queries(db_context=db_context, queries=[query]))),
+                )
+
+            except DbQueryFailed as e:
+                cooccurrence = json.dumps({"error": e.reason})
+
+        return self._build_response(schema=schema, cooccurrence=cooccurrence)
+
+    async def get_parsed_response_async(self, *, db_context: DbContext) -> str:
+        schema = Neo4jSchemaPruner.prune(schema=await self.load_schema_async(db_context=db_context), query=self.query)
+        cooccurrence = None
+        labels = self._get_cooccurrence_labels(schema=schema)
+        if len(labels) > 1:
+            query, exact = self.build_cooccurrence_query(labels=labels, schema=schema)
+
+            async def compute() -> str:
+                return self._parse_cooccurrence(labels=labels, exact=exact, results=await self._run_queries_async(db_context=db_context, queries=[query]))
+
+            try:
+                cooccurrence = await AnswerCache.get_or_compute_async(
+                    db_context=db_context,
+                    key=(QueryTypes.NEO4J_OPENING_QUERY, "label_cooccurrence", tuple(labels), exact),
+                    compute=compute,
+                )
+
+            except DbQueryFailed as e:
+                cooccurrence = json.dumps({"error": e.reason})
+
+        return self._build_response(schema=schema, cooccurrence=cooccurrence)
+
+    def build_cooccurrence_query(self, *, labels: typing.List[str], schema: typing.Mapping[str, typing.Any]) -> typing.Tuple[str, bool]:
+        label_counts = {name: count for node_count in schema["node_count"] for name, count in node_count.items()}
+        exact = sum(label_counts[label] for label in labels) <= self.COOCCURRENCE_EXACT_THRESHOLD
+        subqueries = []
+        for index, label in enumerate(labels):
+            sample = ""
+            if not exact and label_counts[label] > self.COOCCURRENCE_SAMPLE_SIZE:
+                sample = f"WHERE rand() < {self.COOCCURRENCE_SAMPLE_SIZE / label_counts[label]} WITH n LIMIT {self.COOCCURRENCE_SAMPLE_SIZE}"
+
+            overlaps = ", ".join(f"count(CASE WHEN n:{self._quote_name(name=other)} THEN 1 END)" for other in labels)
+            subqueries.append(f"CALL {{ MATCH (n:{self._quote_name(name=label)}) {sample} RETURN [{overlaps}] AS row_{index} }}")
+
+        rows = ", ".join(f"row_{index}" for index in range(len(labels)))
+        query = "\n".join([*subqueries, f"RETURN [{rows}] AS matrix"])
+        return query, exact
+
+    def _get_cooccurrence_labels(self, *, schema: typing.Mapping[str, typing.Any]) -> typing.List[str]:
+        label_counts = {name: count for node_count in schema["node_count"] for name, count in node_count.items()}
+        candidates = [*CypherUtils.extract_patterns(query=self.query).labels, *sorted({index["label"] for index in schema["indexes"]})]
+        labels: typing.List[str] = []
+        for label in candidates:
+            if label_counts.get(label) and label not in labels:
+                labels.append(label)
+
+        return labels[: self.COOCCURRENCE_MAX_LABELS]
+
+    @classmethod
+    def _parse_cooccurrence(cls, *, labels: typing.List[str], exact: bool, results: typing.List[typing.Any]) -> str:
+        matrix = cls._raise_on_failure(result=results[0])[0]["matrix"]
+        overlaps: typing.Dict[str, typing.Dict[str, str]] = {}
+        subsets = []
+        for row_index, label in enumerate(labels):
+            sampled = matrix[row_index][row_index]
+            for column_index, other in enumerate(labels):
+                if column_index == row_index or not matrix[row_index][column_index]:
+                    continue
+
+                overlaps.setdefault(label, {})[other] = SamplingUtils.format_percentage(ratio=matrix[row_index][column_index] / sampled)
+                if matrix[row_index][column_index] == sampled:
+                    subsets.append({"label": label, "subset_of": other})
+
+        return json.dumps({"exact": exact, "overlaps": overlaps, "subsets" if exact else "likely_subsets": subsets})
+
+    @classmethod
+    def _quote_name(cls, *, name: str) -> str:
+        return "`" + name.replace("`", "``") + "`"
+
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        return self._build_response(schema=Neo4jSchemaPruner.prune(schema=self._parse_schema(results=results), query=self.query))
+
+    def _build_response(self, *, schema: typing.Mapping[str, typing.Any], cooccurrence: typing.Optional[str] = None) -> str:
+        response = dict(schema)
+        if cooccurrence is not None:
+            response["label_cooccurrence"] = json.loads(cooccurrence)
+
+        response["query"] = self.query
+        return json.dumps(response)
+
+    @classmethod
+    def _parse_fingerprint(cls, *, results: typing.List[typing.Any]) -> str:
+        stats_response, indexes_response, constraints_response = (cls._raise_on_failure(result=result) for result in results)
+        return SchemaCache.build_fingerprint(parts=[stats_response[0], sorted(indexes_response[0]["indexes"]), sorted(constraints_response[0]["constraints"])])
+
+    @classmethod
+    def _parse_schema(cls, *, results: typing.List[typing.Any]) -> typing.Dict[str, typing.Any]:
+        stats_response, indexes_response, constraints_response = (cls._raise_on_failure(result=result) for result in results)
         response: typing.Dict[str, typing.Any] = {
             "node_count": [],
             "relationship_count": [],
             "indexes": [],
             "constraints": [],
         }
-        for item in stats_response:
-            response[item["section"]].append({item["name"]: item["count"]})
+        for stats in stats_response:
+            for name, count in stats["labels"].items():
+                response["node_count"].append({name: count})
+
+            for name, count in stats["relTypes"].items():
+                response["relationship_count"].append({name: count})
 
         for record in indexes_response:
             labels = record.get("labels") or []
@@ -91,12 +289,171 @@ class Neo4jOpeningQueryRunner(Neo4jQueryRunner):
             for label in labels:
                 for prop in properties:
                     response["constraints"].append({"label": label, "property": prop})
-        response["query"] = self.query
-        return json.dumps(response)
+
+        return response
+
+
+class Neo4jCountSettings(BaseModel):
+    estimate: bool = False
+    relative_error: float = 0.05
+    time_budget_seconds: float = 5.0
+    exact_budget_share: float = 0.5
+    initial_sample_size: int = 1000
+    max_sample_size: int = 100000
 
 
-class Neo4jLabelCountQueryRunner(Neo4jQueryRunner):
-    labels: typing.Iterable[str]
+class Neo4jCountQueryRunner(Neo4jQueryRunner, abc.ABC):
+    _COUNT_SETTINGS: typing.ClassVar[Neo4jCountSettings] = Neo4jCountSettings()
+
+    @classmethod
+    def configure_counts(cls, *, settings: Neo4jCountSettings) -> None:
+        Neo4jCountQueryRunner._COUNT_SETTINGS = settings
+
+    @abc.abstractmethod
+    def build_count_store_query(self) -> str:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _get_count_store_answer(self, *, counts: typing.Mapping[str, typing.Any]) -> typing.Optional[int]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _get_upper_bound(self, *, counts: typing.Mapping[str, typing.Any]) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _build_sample_query(self, *, counts: typing.Mapping[str, typing.Any], sample_size: int) -> typing.Tuple[str, int]:
+        raise NotImplementedError
+
+    def get_parsed_response(self, *, db_context: DbContext) -> str:
+        plan = self._plan_count()
+        try:
+            query, timeout = next(plan)
+            while True:
+                try:
+                    with Neo4jUtils.acquire_tx(db_context=db_context, timeout=timeout) as tx:
+                        records = tx.run(query).data()
+
+                except Exception as e:
+                    records = self._handle_count_error(error=e)
+
+                query, timeout = plan.send(records)
+
+        except StopIteration as e:
+            return e.value
+
+        except Exception as e:
+            raise self._build_failure(error=e) from e
+
+    async def get_parsed_response_async(self, *, db_context: DbContext) -> str:
+        plan = self._plan_count()
+        try:
+            query, timeout = next(plan)
+            while True:
+                try:
+                    async with Neo4jUtils.acquire_async_tx(db_context=db_context, timeout=timeout) as tx:
+                        result = await tx.run(query)
+                        records = await result.data()
+
+                except Exception as e:
+                    records = self._handle_count_error(error=e)
+
+                query, timeout = plan.send(records)
+
+        except StopIteration as e:
+            return e.value
+
+        except Exception as e:
+            raise self._build_failure(error=e) from e
+
+    def _plan_count(self) -> typing.Generator[typing.Tuple[str, typing.Optional[float]], typing.Optional[typing.List[typing.Any]], str]:
+        counts = yield self.build_count_store_query(), None
+        counts = counts[0]
+        answer = self._get_count_store_answer(counts=counts)
+        if answer is not None:
+            return str(answer)
+
+        settings = self._COUNT_SETTINGS
+        if not settings.estimate:
+            records = yield self.build_queries()[0], None
+            return self._parse_results(results=[records])
+
+        deadline = time.monotonic() + settings.time_budget_seconds
+        records = yield self.build_queries()[0], settings.time_budget_seconds * settings.exact_budget_share
+        if records is not None:
+            return self._parse_results(results=[records])
+
+        upper_bound = self._get_upper_bound(counts=counts)
+        estimate: typing.Dict[str, typing.Any] = {
+            "estimate": None,
+            "ci95": [0, upper_bound],
+            "upper_bound": upper_bound,
+            "sampled_nodes": 0,
+            "reason": f"Neither the exact count nor a sample finished within {settings.time_budget_seconds} seconds.",
+        }
+        sample_size = settings.initial_sample_size
+        while time.monotonic() < deadline:
+            query, population = self._build_sample_query(counts=counts, sample_size=sample_size)
+            records = yield query, deadline - time.monotonic()
+            if records is None:
+                break
+
+            sample = records[0]
+            mean, low, high = SamplingUtils.mean_interval(
+                total=sample["sampled"],
+                value_sum=sample["value_sum"] or 0,
+                value_square_sum=sample["value_square_sum"] or 0,
+                population=population,
+            )
+            if sample["sampled"] >= population:
+                return str(round(mean * population))
+
+            estimate.update(
+                {
+                    "estimate": round(mean * population),
+                    "ci95": [round(low * population), round(min(high * population, upper_bound))],
+                    "sampled_nodes": sample["sampled"],
+                }
+            )
+            estimate.pop("reason", None)
+            if high - low <= 2 * settings.relative_error * mean or (high - low) * population < 2 or sample_size >= settings.max_sample_size:
+                break
+
+            sample_size = min(settings.max_sample_size, sample_size * 4)
+
+        return json.dumps(estimate)
+
+    @classmethod
+    def _get_count_settings_key(cls) -> typing.Hashable:
+        settings = cls._COUNT_SETTINGS
+        if not settings.estimate:
+            return False
+
+        return True, settings.relative_error, settings.time_budget_seconds, settings.exact_budget_share, settings.initial_sample_size, settings.max_sample_size
+
+    @classmethod
+    def _handle_count_error(cls, *, error: Exception) -> None:
+        if Neo4jUtils.is_timeout_error(error=error):
+            return None
+
+        raise error
+
+    @classmethod
+    def _build_bernoulli_sample(cls, *, labels: typing.List[str], population: int, sample_size: int) -> str:
+        probability = min(1.0, sample_size / population) if population else 1.0
+        return f"MATCH (n:{':'.join(labels)}) WHERE rand() < {probability} WITH n LIMIT {sample_size}"
+
+    @classmethod
+    def _build_node_pattern(cls, *, labels: typing.List[str]) -> str:
+        return f"(:{':'.join(labels)})" if labels else "()"
+
+    @classmethod
+    def _build_count_subqueries(cls, *, patterns: typing.List[typing.Tuple[str, str]]) -> str:
+        return "\n            ".join(f"CALL {{ MATCH {pattern} RETURN count(*) AS {name} }}" for name, pattern in patterns)
+
+
+class Neo4jLabelCountQueryRunner(Neo4jCountQueryRunner):
+    labels: typing.List[str]
 
     @classmethod
     def get_query_type(cls) -> QueryTypes:
@@ -106,10 +463,42 @@ class Neo4jLabelCountQueryRunner(Neo4jQueryRunner):
         labels = ":".join(self.labels)
         return [f"MATCH (n:{labels}) RETURN COUNT(n) AS count"]
 
-    def get_parsed_response(self, *, db_context: DbContext) -> str:
-        count = next(self._run_query(db_context=db_context))[0]
+    def build_count_store_query(self) -> str:
+        patterns = [(f"label_{index}", f"(:{label})") for index, label in enumerate(self.labels)]
+        return f"""
+            {self._build_count_subqueries(patterns=patterns)}
+            RETURN [{", ".join(name for name, _ in patterns)}] AS label_counts
+            """
+
+    def _get_count_store_answer(self, *, counts: typing.Mapping[str, typing.Any]) -> typing.Optional[int]:
+        label_counts = counts["label_counts"]
+        if len(set(self._normalize_names(names=self.labels))) == 1 or min(label_counts) == 0:
+            return min(label_counts)
+
+        return None
+
+    def _get_upper_bound(self, *, counts: typing.Mapping[str, typing.Any]) -> int:
+        return min(counts["label_counts"])
+
+    def _build_sample_query(self, *, counts: typing.Mapping[str, typing.Any], sample_size: int) -> typing.Tuple[str, int]:
+        label_counts = counts["label_counts"]
+        base_index = label_counts.index(min(label_counts))
+        other_labels = [label for index, label in enumerate(self.labels) if index != base_index]
+        sample = self._build_bernoulli_sample(labels=[self.labels[base_index]], population=label_counts[base_index], sample_size=sample_size)
+        query = f"""
+            {sample}
+            WITH CASE WHEN n:{":".join(other_labels)} THEN 1 ELSE 0 END AS value
+            RETURN count(*) AS sampled, sum(value) AS value_sum, sum(value * value) AS value_square_sum
+            """
+        return query, label_counts[base_index]
+
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        count = results[0][0]
         return str(count["count"])
 
+    def get_cache_key(self) -> typing.Optional[typing.Hashable]:
+        return self.get_query_type(), self._normalize_names(names=self.labels), self._get_count_settings_key()
+
     @classmethod
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
         if "labels" not in data.keys():
@@ -123,9 +512,9 @@ class Neo4jLabelCountQueryRunner(Neo4jQueryRunner):
             raise OutOfSchemaRequest(reason=f"Request with query_type: {cls.get_query_type().value} must contain only 'labels' key in data, request contains {keys}.")
 
 
-class Neo4jRelBetweenLabelsCountQueryRunner(Neo4jQueryRunner):
-    from_node_labels: typing.Iterable[str]
-    to_node_labels: typing.Iterable[str]
+class Neo4jRelBetweenLabelsCountQueryRunner(Neo4jCountQueryRunner):
+    from_node_labels: typing.List[str]
+    to_node_labels: typing.List[str]
     rel_type: str
 
     @classmethod
@@ -133,14 +522,77 @@ class Neo4jRelBetweenLabelsCountQueryRunner(Neo4jQueryRunner):
         return QueryTypes.NEO4J_REL_BETWEEN_NODES_COUNT
 
     def build_queries(self) -> typing.List[str]:
-        from_node_labels = ":".join(self.from_node_labels)
-        to_node_labels = ":".join(self.to_node_labels)
-        return [f"MATCH (:{from_node_labels})-[r:{self.rel_type}]->(:{to_node_labels}) RETURN COUNT(r) AS count"]
+        from_node = self._build_node_pattern(labels=self.from_node_labels)
+        to_node = self._build_node_pattern(labels=self.to_node_labels)
+        return [f"MATCH {from_node}-[r:{self.rel_type}]->{to_node} RETURN COUNT(r) AS count"]
 
-    def get_parsed_response(self, *, db_context: DbContext) -> str:
-        count = next(self._run_query(db_context=db_context))[0]
+    def build_count_store_query(self) -> str:
+        patterns = [("total", f"()-[:{self.rel_type}]->()")]
+        patterns += [(f"from_{index}", f"(:{label})-[:{self.rel_type}]->()") for index, label in enumerate(self.from_node_labels)]
+        patterns += [(f"to_{index}", f"()-[:{self.rel_type}]->(:{label})") for index, label in enumerate(self.to_node_labels)]
+        patterns += [(f"from_nodes_{index}", f"(:{label})") for index, label in enumerate(self.from_node_labels)]
+        patterns += [(f"to_nodes_{index}", f"(:{label})") for index, label in enumerate(self.to_node_labels)]
+        return f"""
+            {self._build_count_subqueries(patterns=patterns)}
+            RETURN total,
+                   [{", ".join(name for name, _ in patterns if name.startswith("from_") and not name.startswith("from_nodes_"))}] AS from_counts,
+                   [{", ".join(name for name, _ in patterns if name.startswith("to_") and not name.startswith("to_nodes_"))}] AS to_counts,
+                   [{", ".join(name for name, _ in patterns if name.startswith("from_nodes_"))}] AS from_node_counts,
+                   [{", ".join(name for name, _ in patterns if name.startswith("to_nodes_"))}] AS to_node_counts
+            """
+
+    def _get_count_store_answer(self, *, counts: typing.Mapping[str, typing.Any]) -> typing.Optional[int]:
+        total, from_counts, to_counts = counts["total"], counts["from_counts"], counts["to_counts"]
+        if min([total, *from_counts, *to_counts]) == 0:
+            return 0
+
+        from_labels = set(self._normalize_names(names=self.from_node_labels))
+        to_labels = set(self._normalize_names(names=self.to_node_labels))
+        if len(from_labels) > 1 or len(to_labels) > 1:
+            return None
+
+        from_count = from_counts[0] if from_counts else total
+        to_count = to_counts[0] if to_counts else total
+        if from_count == total:
+            return to_count
+
+        if to_count == total:
+            return from_count
+
+        return None
+
+    def _get_upper_bound(self, *, counts: typing.Mapping[str, typing.Any]) -> int:
+        return min([counts["total"], *counts["from_counts"], *counts["to_counts"]])
+
+    def _build_sample_query(self, *, counts: typing.Mapping[str, typing.Any], sample_size: int) -> typing.Tuple[str, int]:
+        from_node_counts, to_node_counts = counts["from_node_counts"], counts["to_node_counts"]
+        sample_from_side = bool(from_node_counts) and (not to_node_counts or min(from_node_counts) <= min(to_node_counts))
+        labels, node_counts, other_labels = (
+            (self.from_node_labels, from_node_counts, self.to_node_labels) if sample_from_side else (self.to_node_labels, to_node_counts, self.from_node_labels)
+        )
+        base_index = node_counts.index(min(node_counts))
+        relationship = f"-[:{self.rel_type}]->" if sample_from_side else f"<-[:{self.rel_type}]-"
+        sample = self._build_bernoulli_sample(labels=[labels[base_index]], population=node_counts[base_index], sample_size=sample_size)
+        query = f"""
+            {sample}
+            WITH CASE WHEN n:{":".join(labels)} THEN COUNT {{ (n){relationship}{self._build_node_pattern(labels=other_labels)} }} ELSE 0 END AS value
+            RETURN count(*) AS sampled, sum(value) AS value_sum, sum(value * value) AS value_square_sum
+            """
+        return query, node_counts[base_index]
+
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        count = results[0][0]
         return str(count["count"])
 
+    def get_cache_key(self) -> typing.Optional[typing.Hashable]:
+        return (
+            self.get_query_type(),
+            self._normalize_names(names=self.from_node_labels),
+            self._normalize_names(names=self.to_node_labels),
+            self._normalize_name(name=self.rel_type),
+            self._get_count_settings_key(),
+        )
+
     @classmethod
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
         if "from_node_labels" not in data.keys():
@@ -175,7 +627,24 @@ class Neo4jExplainQueryRunner(Neo4jQueryRunner):
     def _run_query(self, *, db_context: DbContext) -> typing.Generator[typing.Any, None, None]:
         with Neo4jUtils.acquire_tx(db_context=db_context) as tx:
             for query in self.build_queries():
-                yield tx.run(query).consume().plan
+                try:
+                    yield tx.run(query).consume().plan
+
+                except Exception as e:
+                    yield e
+
+    async def _run_query_async(self, *, db_context: DbContext) -> typing.List[typing.Any]:
+        plans: typing.List[typing.Any] = []
+        async with Neo4jUtils.acquire_async_tx(db_context=db_context) as tx:
+            for query in self.build_queries():
+                try:
+                    result = await tx.run(query)
+                    plans.append((await result.consume()).plan)
+
+                except Exception as e:
+                    plans.append(e)
+
+        return plans
 
     @classmethod
     def get_query_type(cls) -> QueryTypes:
@@ -186,12 +655,30 @@ class Neo4jExplainQueryRunner(Neo4jQueryRunner):
 
     def get_parsed_response(self, *, db_context: DbContext) -> str:
         try:
-            plan = next(self._run_query(db_context=db_context))
+            return super().get_parsed_response(db_context=db_context)
+
+        except DbQueryFailed:
+            raise
+
+        except Exception as e:
+            raise DbQueryFailed(reason=f"Error in your explain request: {e}") from e
+
+    async def get_parsed_response_async(self, *, db_context: DbContext) -> str:
+        try:
+            return await super().get_parsed_response_async(db_context=db_context)
+
+        except DbQueryFailed:
+            raise
 
         except Exception as e:
-            return f"Error in your explain request: {e}"
+            raise DbQueryFailed(reason=f"Error in your explain request: {e}") from e
 
-        return plan["args"]["string-representation"]
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        plan = results[0]
+        if isinstance(plan, Exception):
+            raise DbQueryFailed(reason=f"Error in your explain request: {plan}")
+
+        return PlanAnalyzer.summarize(plan=plan).model_dump_json(exclude_none=True)
 
     @classmethod
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
@@ -207,34 +694,57 @@ class Neo4jExplainQueryRunner(Neo4jQueryRunner):
 
 
 class Neo4jPropertiesForLabelsRunner(Neo4jQueryRunner):
-    labels: typing.Iterable[str]
+    SAMPLE_SIZE: typing.ClassVar[int] = 5000
+    NOT_NULL_SUFFIX: typing.ClassVar[str] = " NOT NULL"
+
+    labels: typing.List[str]
 
     @classmethod
     def get_query_type(cls) -> QueryTypes:
         return QueryTypes.NEO4J_PROPERTIES_FOR_LABELS
 
+    @classmethod
+    def configure(cls, *, sample_size: int) -> None:
+        if sample_size <= 0:
+            raise ValueError(f"sample_size must be positive, not {sample_size}")
+
+        cls.SAMPLE_SIZE = sample_size
+
     def build_queries(self) -> typing.List[str]:
-        labels = ":".join(self.labels)
-        return [f"MATCH (n:{labels}) WITH n limit 5000 RETURN properties(n) AS props"]
+        sample_query = SamplingUtils.build_sample_query(labels=self.labels, sample_size=self.SAMPLE_SIZE)
+        return [
+            f"""
+            {sample_query}
+            WITH population, count(n) AS total, collect(n) AS nodes
+            UNWIND nodes AS n
+            UNWIND keys(n) AS key
+            RETURN population, total, key, valueType(n[key]) AS type, count(*) AS count
+            """
+        ]
 
-    def get_parsed_response(self, *, db_context: DbContext) -> str:
-        nodes_properties = next(self._run_query(db_context=db_context))
-        prop_type_counter: typing.DefaultDict[str, Counter] = defaultdict(Counter)
-        total_nodes = 0
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        type_counts = self._raise_on_failure(result=results[0])
 
-        for node_properties in nodes_properties:
-            total_nodes += 1
-            props = node_properties["props"]
-            for prop_name, value in props.items():
-                typ = type(value).__name__
-                prop_type_counter[prop_name][typ] += 1
+        stats: typing.Dict[str, typing.List[typing.Mapping[str, typing.Any]]] = defaultdict(list)
+        for type_count in type_counts:
+            typ = type_count["type"]
+            if typ.endswith(self.NOT_NULL_SUFFIX):
+                typ = typ[: -len(self.NOT_NULL_SUFFIX)]
 
-        stats: typing.Dict[str, typing.List[typing.Mapping[str, str]]] = {}
-        for prop, type_counter in prop_type_counter.items():
-            stats[prop] = [{"type": typ, "percentage": f"{round((count / total_nodes) * 100, 2)}%"} for typ, count in type_counter.items()]
+            low, high = SamplingUtils.wilson_interval(successes=type_count["count"], total=type_count["total"], population=type_count["population"])
+            stats[type_count["key"]].append(
+                {
+                    "type": typ,
+                    "percentage": SamplingUtils.format_percentage(ratio=type_count["count"] / type_count["total"]),
+                    "ci95": [SamplingUtils.format_percentage(ratio=low), SamplingUtils.format_percentage(ratio=high)],
+                }
+            )
 
         return json.dumps(stats)
 
+    def get_cache_key(self) -> typing.Optional[typing.Hashable]:
+        return self.get_query_type(), self._normalize_names(names=self.labels), self.SAMPLE_SIZE
+
     @classmethod
     def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
         if "labels" not in data.keys():
@@ -246,3 +756,284 @@ class Neo4jPropertiesForLabelsRunner(Neo4jQueryRunner):
         if len(data.keys()) > 1:
             keys = ", ".join(key for key in data.keys() if key != "labels")
             raise OutOfSchemaRequest(reason=f"Request with query_type: {cls.get_query_type().value} must contain only 'labels' key in data, request contains {keys}.")
+
+
+class Neo4jPropertySelectivityRunner(Neo4jQueryRunner):
+    SAMPLE_SIZE: typing.ClassVar[int] = 5000
+    HISTOGRAM_BUCKETS: typing.ClassVar[int] = 10
+    MOST_COMMON_VALUES: typing.ClassVar[int] = 5
+    MAX_VALUE_LENGTH: typing.ClassVar[int] = 100
+    ORDERED_TYPES: typing.ClassVar[typing.Tuple[str, ...]] = ("INTEGER", "FLOAT", "DATE", "LOCAL DATETIME", "ZONED DATETIME", "LOCAL TIME", "ZONED TIME")
+
+    labels: typing.List[str]
+    properties: typing.Optional[typing.List[str]] = None
+
+    @classmethod
+    def get_query_type(cls) -> QueryTypes:
+        return QueryTypes.NEO4J_PROPERTY_SELECTIVITY
+
+    @classmethod
+    def configure(cls, *, sample_size: int, histogram_buckets: typing.Optional[int] = None) -> None:
+        if sample_size <= 0:
+            raise ValueError(f"sample_size must be positive, not {sample_size}")
+
+        cls.SAMPLE_SIZE = sample_size
+        if histogram_buckets is not None:
+            cls.HISTOGRAM_BUCKETS = histogram_buckets
+
+    def build_queries(self) -> typing.List[str]:
+        sample_query = SamplingUtils.build_sample_query(labels=self.labels, sample_size=self.SAMPLE_SIZE)
+        keys = f"[{', '.join(json.dumps(prop) for prop in self.properties)}]" if self.properties else "keys(n)"
+        ordered_types = ", ".join(json.dumps(typ) for typ in self.ORDERED_TYPES)
+        return [
+            f"""
+            {sample_query}
+            WITH population, collect(n) AS nodes
+            WITH population, size(nodes) AS total, nodes
+            UNWIND nodes AS n
+            UNWIND {keys} AS key
+            WITH population, total, key, n[key] AS value
+            WHERE value IS NOT NULL
+            WITH population, total, key, value, count(*) AS frequency
+            ORDER BY frequency DESC
+            WITH population, total, key, sum(frequency) AS present, count(*) AS distinct_values,
+                 sum(CASE WHEN frequency = 1 THEN 1 ELSE 0 END) AS singletons,
+                 collect({{value: value, frequency: frequency}})[0..{self.MOST_COMMON_VALUES}] AS most_common,
+                 collect(CASE WHEN any(typ IN [{ordered_types}] WHERE valueType(value) STARTS WITH typ) THEN {{value: value, frequency: frequency}} END) AS ordered_values
+            CALL {{
+                WITH ordered_values
+                UNWIND ordered_values AS ordered
+                UNWIND range(1, ordered.frequency) AS copy
+                WITH ordered.value AS value
+                ORDER BY value
+                RETURN collect(value) AS values
+            }}
+            WITH population, total, key, present, distinct_values, singletons, most_common, values, size(values) AS ordered_total
+            RETURN population, total, key, present, distinct_values, singletons, most_common,
+                   CASE WHEN ordered_total > 0
+                        THEN [bucket IN range(0, {self.HISTOGRAM_BUCKETS}) | values[toInteger(round(bucket * (ordered_total - 1) / {self.HISTOGRAM_BUCKETS}.0))]]
+                   END AS bounds
+            """
+        ]
+
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        profiles = self._raise_on_failure(result=results[0])
+        stats: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        for profile in profiles:
+            low, high = SamplingUtils.wilson_interval(successes=profile["present"], total=profile["total"], population=profile["population"])
+            stats[profile["key"]] = {
+                "existence_rate": SamplingUtils.format_percentage(ratio=profile["present"] / profile["total"]),
+                "existence_ci95": [SamplingUtils.format_percentage(ratio=low), SamplingUtils.format_percentage(ratio=high)],
+                "estimated_distinct": self._estimate_distinct(profile=profile),
+                "most_common_values": [
+                    {"value": self._shorten_value(value=common["value"]), "percentage": SamplingUtils.format_percentage(ratio=common["frequency"] / profile["present"])}
+                    for common in profile["most_common"]
+                ],
+            }
+            if profile.get("bounds") is not None:
+                stats[profile["key"]]["histogram"] = {
+                    "bounds": profile["bounds"],
+                    "estimated_nodes_per_bucket": round(profile["population"] * profile["present"] / profile["total"] / self.HISTOGRAM_BUCKETS),
+                }
+
+        for prop in self.properties or []:
+            stats.setdefault(prop, {"existence_rate": "0.0%"})
+
+        return json.dumps(stats, default=str)
+
+    @classmethod
+    def _estimate_distinct(cls, *, profile: typing.Mapping[str, typing.Any]) -> int:
+        # GEE estimator (Charikar et al.): scale up only the values seen once in the sample.
+        population, total, present = profile["population"], profile["total"], profile["present"]
+        distinct_values, singletons = profile["distinct_values"], profile["singletons"]
+        if total >= population:
+            return distinct_values
+
+        estimate = math.sqrt(population / total) * singletons + (distinct_values - singletons)
+        return round(min(max(estimate, distinct_values), population * present / total))
+
+    @classmethod
+    def _shorten_value(cls, *, value: typing.Any) -> typing.Any:
+        if isinstance(value, str) and len(value) > cls.MAX_VALUE_LENGTH:
+            return value[: cls.MAX_VALUE_LENGTH] + "…"
+
+        if isinstance(value, (list, dict)) and len(json.dumps(value, default=str)) > cls.MAX_VALUE_LENGTH:
+            return json.dumps(value, default=str)[: cls.MAX_VALUE_LENGTH] + "…"
+
+        return value
+
+    def get_cache_key(self) -> typing.Optional[typing.Hashable]:
+        properties = tuple(sorted(set(self.properties))) if self.properties else None
+        return self.get_query_type(), self._normalize_names(names=self.labels), properties, self.SAMPLE_SIZE, self.HISTOGRAM_BUCKETS
+
+    @classmethod
+    def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
+        if "labels" not in data.keys():
+            raise OutOfSchemaRequest(reason=f"Request with query_type: {cls.get_query_type().value} must contain 'labels' key in data.")
+
+        if not isinstance(data["labels"], list):
+            raise OutOfSchemaRequest(reason=f"Value of key 'labels' in data of request with query_type: {cls.get_query_type().value} must be list.")
+
+        if "properties" in data.keys() and data["properties"] is not None and not isinstance(data["properties"], list):
+            raise OutOfSchemaRequest(reason=f"Value of key 'properties' in data of request with query_type: {cls.get_query_type().value} must be list.")
+
+        if len(set(data.keys()) - {"labels", "properties"}) > 0:
+            keys = ", ".join(key for key in data.keys() if key not in ["labels", "properties"])
+            raise OutOfSchemaRequest(
+                reason=f"Request with query_type: {cls.get_query_type().value} must contain only 'labels' and 'properties' keys in data, request contains {keys}."
+            )
+
+
+class Neo4jDegreeDistributionRunner(Neo4jQueryRunner):
+    SAMPLE_SIZE: typing.ClassVar[int] = 5000
+    TOP_SUPERNODES: typing.ClassVar[int] = 5
+    DIRECTIONS: typing.ClassVar[typing.Tuple[str, ...]] = ("out", "in")
+
+    labels: typing.List[str]
+    rel_type: str
+
+    @classmethod
+    def get_query_type(cls) -> QueryTypes:
+        return QueryTypes.NEO4J_DEGREE_DISTRIBUTION
+
+    @classmethod
+    def configure(cls, *, sample_size: int) -> None:
+        if sample_size <= 0:
+            raise ValueError(f"sample_size must be positive, not {sample_size}")
+
+        cls.SAMPLE_SIZE = sample_size
+
+    def build_queries(self) -> typing.List[str]:
+        sample_query = SamplingUtils.build_sample_query(labels=self.labels, sample_size=self.SAMPLE_SIZE)
+        aggregations = ",\n                 ".join(
+            f"avg({direction}_degree) AS {direction}_avg, percentileDisc({direction}_degree, 0.5) AS {direction}_p50, "
+            f"percentileDisc({direction}_degree, 0.99) AS {direction}_p99, max({direction}_degree) AS {direction}_max"
+            for direction in self.DIRECTIONS
+        )
+        return [
+            f"""
+            {sample_query}
+            WITH population, n, COUNT {{ (n)-[:{self.rel_type}]->() }} AS out_degree, COUNT {{ (n)<-[:{self.rel_type}]-() }} AS in_degree
+            ORDER BY out_degree + in_degree DESC
+            WITH population, count(n) AS total,
+                 {aggregations},
+                 collect({{element_id: elementId(n), labels: labels(n), out_degree: out_degree, in_degree: in_degree}})[0..{self.TOP_SUPERNODES}] AS supernodes
+            RETURN *
+            """,
+            f"""
+            MATCH (n:{":".join(self.labels)})
+            WITH n, COUNT {{ (n)-[:{self.rel_type}]->() }} AS out_degree, COUNT {{ (n)<-[:{self.rel_type}]-() }} AS in_degree
+            WHERE out_degree + in_degree > 0
+            RETURN elementId(n) AS element_id, labels(n) AS labels, out_degree, in_degree
+            ORDER BY out_degree + in_degree DESC
+            LIMIT {self.TOP_SUPERNODES}
+            """,
+        ]
+
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        distributions = self._raise_on_failure(result=results[0])
+
+        if not distributions or not distributions[0]["total"]:
+            return json.dumps({"sampled_nodes": 0})
+
+        distribution = distributions[0]
+        response: typing.Dict[str, typing.Any] = {"sampled_nodes": distribution["total"], "population": distribution["population"]}
+        for direction in self.DIRECTIONS:
+            response[f"{direction}_degree"] = {
+                "avg": round(distribution[f"{direction}_avg"], 2),
+                "p50": distribution[f"{direction}_p50"],
+                "p99": distribution[f"{direction}_p99"],
+                "max": distribution[f"{direction}_max"],
+            }
+
+        if isinstance(results[1], DbQueryFailed):
+            response["top_supernodes"] = [supernode for supernode in distribution["supernodes"] if supernode["out_degree"] or supernode["in_degree"]]
+            response["top_supernodes_source"] = "sample"
+
+        else:
+            response["top_supernodes"] = results[1]
+            response["top_supernodes_source"] = "population"
+
+        return json.dumps(response)
+
+    def get_cache_key(self) -> typing.Optional[typing.Hashable]:
+        return self.get_query_type(), self._normalize_names(names=self.labels), self._normalize_name(name=self.rel_type), self.SAMPLE_SIZE
+
+    @classmethod
+    def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
+        if "labels" not in data.keys():
+            raise OutOfSchemaRequest(reason=f"Request with query_type: {cls.get_query_type().value} must contain 'labels' key in data.")
+
+        if not isinstance(data["labels"], list):
+            raise OutOfSchemaRequest(reason=f"Value of key 'labels' in data of request with query_type: {cls.get_query_type().value} must be list.")
+
+        if "rel_type" not in data.keys():
+            raise OutOfSchemaRequest(reason=f"Request with query_type: {cls.get_query_type().value} must contain 'rel_type' key in data.")
+
+        if not data["rel_type"]:
+            raise OutOfSchemaRequest(reason=f"In request type {cls.get_query_type().value} 'rel_type' value must not be empty.")
+
+        if not isinstance(data["rel_type"], str):
+            raise OutOfSchemaRequest(reason=f"Value of key 'rel_type' in data of request with query_type: {cls.get_query_type().value} must be str.")
+
+        if len(data.keys()) > 2:
+            keys = ", ".join(key for key in data.keys() if key not in ["labels", "rel_type"])
+            raise OutOfSchemaRequest(
+                reason=f"Request with query_type: {cls.get_query_type().value} must contain only 'labels' and 'rel_type' keys in data, request contains {keys}."
+            )
+
+
+class Neo4jSchemaDetailsRunner(Neo4jQueryRunner):
+    MAX_NAMES: typing.ClassVar[int] = 500
+
+    labels: typing.List[str] = []
+    rel_types: typing.List[str] = []
+
+    @classmethod
+    def get_query_type(cls) -> QueryTypes:
+        return QueryTypes.NEO4J_SCHEMA_DETAILS
+
+    def build_queries(self) -> typing.List[str]:
+        return Neo4jOpeningQueryRunner.build_schema_queries()
+
+    def get_parsed_response(self, *, db_context: DbContext) -> str:
+        return self._build_details(schema=Neo4jOpeningQueryRunner.load_schema(db_context=db_context))
+
+    async def get_parsed_response_async(self, *, db_context: DbContext) -> str:
+        return self._build_details(schema=await Neo4jOpeningQueryRunner.load_schema_async(db_context=db_context))
+
+    def _parse_results(self, *, results: typing.List[typing.Any]) -> str:
+        return self._build_details(schema=Neo4jOpeningQueryRunner._parse_schema(results=results))
+
+    def _build_details(self, *, schema: typing.Mapping[str, typing.Any]) -> str:
+        known_labels = Neo4jSchemaPruner.get_labels(schema=schema)
+        known_rel_types = Neo4jSchemaPruner.get_rel_types(schema=schema)
+        if not self.labels and not self.rel_types:
+            return json.dumps(
+                {
+                    "labels": sorted(known_labels)[: self.MAX_NAMES],
+                    "relationship_types": sorted(known_rel_types)[: self.MAX_NAMES],
+                    "truncated": len(known_labels) > self.MAX_NAMES or len(known_rel_types) > self.MAX_NAMES,
+                }
+            )
+
+        labels = set(self._normalize_names(names=self.labels))
+        rel_types = set(self._normalize_names(names=self.rel_types))
+        details = Neo4jSchemaPruner.select(schema=schema, labels=labels, rel_types=rel_types)
+        unknown = sorted((labels - known_labels) | (rel_types - known_rel_types))
+        if unknown:
+            details["unknown"] = unknown
+
+        return json.dumps(details)
+
+    @classmethod
+    def validate_request(cls, data: typing.Mapping[str, typing.Any]) -> None:
+        for key in ("labels", "rel_types"):
+            if key in data.keys() and not isinstance(data[key], list):
+                raise OutOfSchemaRequest(reason=f"Value of key '{key}' in data of request with query_type: {cls.get_query_type().value} must be list.")
+
+        if len(set(data.keys()) - {"labels", "rel_types"}) > 0:
+            keys = ", ".join(key for key in data.keys() if key not in ["labels", "rel_types"])
+            raise OutOfSchemaRequest(
+                reason=f"Request with query_type: {cls.get_query_type().value} must contain only 'labels' and 'rel_types' keys in data, request contains {keys}."
+            )
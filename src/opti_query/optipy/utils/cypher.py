@@ -0,0 +1,220 @@
+import itertools
+import re
+import typing
+
+from pydantic import BaseModel
+
+
+class RelationshipPattern(BaseModel):
+    from_node_labels: typing.List[str]
+    to_node_labels: typing.List[str]
+    rel_type: str
+
+
+class CypherPatterns(BaseModel):
+    labels: typing.List[str]
+    relationships: typing.List[RelationshipPattern]
+    properties_by_label: typing.Dict[str, typing.List[str]]
+
+
+class CypherUtils:
+    QUOTE_CHARS = ("'", '"', "`")
+    CODE = "CODE"
+    LITERAL = "LITERAL"
+    COMMENT = "COMMENT"
+
+    NAME = r"(?:`[^`]+`|[A-Za-z_]\w*)"
+    NODE_PATTERN = re.compile(rf"\(\s*(?P<var>[A-Za-z_]\w*)?\s*(?P<labels>(?::\s*!?{NAME}\s*(?:[&|]\s*!?{NAME}\s*)*)*)(?P<props>\{{[^}}]*\}})?\s*\)")
+    REL_GAP_PATTERN = re.compile(
+        rf"^\s*(?P<left><)?-\s*(?:\[\s*(?:[A-Za-z_]\w*)?\s*(?::\s*(?P<types>!?{NAME}(?:\s*[|:&]\s*:?!?{NAME})*))?[^\]]*\])?\s*-(?P<right>>)?\s*$"
+    )
+    NEGATED_NAME_PATTERN = re.compile(rf"!\s*{NAME}")
+    LABEL_OR_PATTERN = re.compile(r"\|(?=(?:[^`]*`[^`]*`)*[^`]*$)")
+    PROPERTY_ACCESS_PATTERN = re.compile(r"\b(?P<var>[A-Za-z_]\w*)\.(?P<prop>[A-Za-z_]\w*)\b")
+    MAP_KEY_PATTERN = re.compile(r"(?P<prop>[A-Za-z_]\w*)\s*:")
+    RETURN_PATTERN = re.compile(r"\bRETURN\b", re.IGNORECASE)
+    ORDER_BY_PATTERN = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+
+    @classmethod
+    def iter_chars(cls, *, text: str) -> typing.Generator[typing.Tuple[str, str], None, None]:
+        quote: typing.Optional[str] = None
+        comment: typing.Optional[str] = None
+        index = 0
+        while index < len(text):
+            char = text[index]
+            next_char = text[index + 1] if index + 1 < len(text) else ""
+            if comment == "//":
+                if char == "\n":
+                    comment = None
+                    yield char, cls.CODE
+
+                else:
+                    yield char, cls.COMMENT
+
+                index += 1
+                continue
+
+            if comment == "/*":
+                if char == "*" and next_char == "/":
+                    comment = None
+                    yield char, cls.COMMENT
+                    yield next_char, cls.COMMENT
+                    index += 2
+                    continue
+
+                yield char, cls.COMMENT
+                index += 1
+                continue
+
+            if quote is not None:
+                if char == "\\" and quote != "`" and next_char:
+                    yield char, cls.LITERAL
+                    yield next_char, cls.LITERAL
+                    index += 2
+                    continue
+
+                if char == quote:
+                    quote = None
+
+                yield char, cls.LITERAL
+                index += 1
+                continue
+
+            if char in cls.QUOTE_CHARS:
+                quote = char
+                yield char, cls.LITERAL
+
+            elif char == "/" and next_char in ("/", "*"):
+                comment = char + next_char
+                yield char, cls.COMMENT
+                yield next_char, cls.COMMENT
+                index += 1
+
+            else:
+                yield char, cls.CODE
+
+            index += 1
+
+    @classmethod
+    def strip_literals(cls, *, query: str) -> str:
+        stripped: typing.List[str] = []
+        previous_kind = cls.CODE
+        keep_literal = False
+        for char, kind in cls.iter_chars(text=query):
+            if kind == cls.CODE:
+                stripped.append(char)
+
+            elif kind == cls.LITERAL:
+                if previous_kind != cls.LITERAL:
+                    keep_literal = char == "`"
+                    if not keep_literal:
+                        stripped.append("''")
+
+                if keep_literal:
+                    stripped.append(char)
+
+            elif previous_kind != cls.COMMENT:
+                stripped.append(" ")
+
+            previous_kind = kind
+
+        return "".join(stripped)
+
+    @classmethod
+    def is_ordered(cls, *, query: str) -> bool:
+        text = re.sub(r"`[^`]*`", "``", cls.strip_literals(query=query))
+        returns = list(cls.RETURN_PATTERN.finditer(text))
+        if not returns:
+            return False
+
+        return cls.ORDER_BY_PATTERN.search(text, returns[-1].end()) is not None
+
+    @classmethod
+    def extract_patterns(cls, *, query: str) -> CypherPatterns:
+        text = cls.strip_literals(query=query)
+        labels_by_var: typing.Dict[str, typing.List[str]] = {}
+        labels: typing.List[str] = []
+        properties_by_label: typing.Dict[str, typing.List[str]] = {}
+        node_matches = list(cls.NODE_PATTERN.finditer(text))
+        alternatives_by_var: typing.Dict[str, typing.List[typing.List[str]]] = {}
+        node_alternatives: typing.List[typing.List[typing.List[str]]] = []
+
+        for match in node_matches:
+            alternatives = cls._split_label_alternatives(expression=match.group("labels") or "")
+            match_labels = list(dict.fromkeys(label for alternative in alternatives for label in alternative))
+            var = match.group("var")
+            if var:
+                for label in match_labels:
+                    labels_by_var.setdefault(var, [])
+                    if label not in labels_by_var[var]:
+                        labels_by_var[var].append(label)
+
+                if match.group("labels"):
+                    alternatives_by_var[var] = cls._combine_alternatives(first=alternatives_by_var.get(var, [[]]), second=alternatives)
+
+            for label in match_labels:
+                if label not in labels:
+                    labels.append(label)
+
+            if match.group("props"):
+                for prop_match in cls.MAP_KEY_PATTERN.finditer(match.group("props")):
+                    for label in match_labels:
+                        cls._add_property(properties_by_label=properties_by_label, label=label, prop=prop_match.group("prop"))
+
+            node_alternatives.append(alternatives)
+
+        node_alternatives = [
+            alternatives_by_var.get(match.group("var"), alternatives) if match.group("var") else alternatives
+            for match, alternatives in zip(node_matches, node_alternatives)
+        ]
+
+        relationships: typing.List[RelationshipPattern] = []
+        for index in range(len(node_matches) - 1):
+            gap = text[node_matches[index].end() : node_matches[index + 1].start()]
+            rel_match = cls.REL_GAP_PATTERN.match(gap)
+            if rel_match is None or not rel_match.group("types"):
+                continue
+
+            from_alternatives, to_alternatives = node_alternatives[index], node_alternatives[index + 1]
+            if rel_match.group("left") and not rel_match.group("right"):
+                from_alternatives, to_alternatives = to_alternatives, from_alternatives
+
+            for rel_type in cls._split_labels(expression=":" + rel_match.group("types")):
+                for from_labels, to_labels in itertools.product(from_alternatives, to_alternatives):
+                    relationship = RelationshipPattern(from_node_labels=from_labels, to_node_labels=to_labels, rel_type=rel_type)
+                    if relationship not in relationships:
+                        relationships.append(relationship)
+
+        for match in cls.PROPERTY_ACCESS_PATTERN.finditer(text):
+            for label in labels_by_var.get(match.group("var"), []):
+                cls._add_property(properties_by_label=properties_by_label, label=label, prop=match.group("prop"))
+
+        return CypherPatterns(labels=labels, relationships=relationships, properties_by_label=properties_by_label)
+
+    @classmethod
+    def _split_labels(cls, *, expression: str) -> typing.List[str]:
+        return [label.strip("`") for label in re.findall(cls.NAME, cls.NEGATED_NAME_PATTERN.sub(" ", expression))]
+
+    @classmethod
+    def _split_label_alternatives(cls, *, expression: str) -> typing.List[typing.List[str]]:
+        # (n:A|B:C) matches A or B:C, so each alternative is a label set the node must have. Negated labels (!A) only exclude nodes.
+        if not expression.strip():
+            return [[]]
+
+        return [cls._split_labels(expression=alternative) for alternative in cls.LABEL_OR_PATTERN.split(expression)]
+
+    @classmethod
+    def _combine_alternatives(cls, *, first: typing.List[typing.List[str]], second: typing.List[typing.List[str]]) -> typing.List[typing.List[str]]:
+        combined: typing.List[typing.List[str]] = []
+        for left, right in itertools.product(first, second):
+            labels = list(dict.fromkeys([*left, *right]))
+            if labels not in combined:
+                combined.append(labels)
+
+        return combined
+
+    @classmethod
+    def _add_property(cls, *, properties_by_label: typing.Dict[str, typing.List[str]], label: str, prop: str) -> None:
+        properties_by_label.setdefault(label, [])
+        if prop not in properties_by_label[label]:
+            properties_by_label[label].append(prop)
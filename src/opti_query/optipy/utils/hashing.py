@@ -0,0 +1,42 @@
+import hashlib
+import json
+import typing
+
+from pydantic import BaseModel
+
+
+class ResultDigest(BaseModel):
+    columns: typing.List[str] = []
+    rows: int = 0
+    ordered_hash: str = ""
+    multiset_hash: str = ""
+    truncated: bool = False
+    timed_out: bool = False
+    unavailable: bool = False
+    error: typing.Optional[str] = None
+
+
+class ResultHasher:
+    MULTISET_MODULUS = 2**256
+
+    def __init__(self, *, canonicalize: typing.Callable[[typing.Any], typing.Any]) -> None:
+        self._canonicalize = canonicalize
+        self._ordered = hashlib.sha256()
+        self._multiset = 0
+        self.rows = 0
+
+    def add(self, *, values: typing.Sequence[typing.Any]) -> None:
+        row = json.dumps([self._canonicalize(value) for value in values], sort_keys=True, separators=(",", ":"), default=str)
+        row_hash = hashlib.sha256(row.encode()).digest()
+        self._ordered.update(row_hash)
+        self._multiset = (self._multiset + int.from_bytes(row_hash, "big")) % self.MULTISET_MODULUS
+        self.rows += 1
+
+    def get_digest(self, *, columns: typing.List[str], truncated: bool = False) -> ResultDigest:
+        return ResultDigest(
+            columns=columns,
+            rows=self.rows,
+            ordered_hash=self._ordered.hexdigest(),
+            multiset_hash=f"{self._multiset:064x}",
+            truncated=truncated,
+        )
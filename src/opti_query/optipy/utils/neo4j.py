@@ -1,17 +1,144 @@
-from contextlib import contextmanager
+import asyncio
+import atexit
+import threading
+import typing
+from contextlib import contextmanager, asynccontextmanager
 
-from neo4j import GraphDatabase, READ_ACCESS
+from neo4j import GraphDatabase, AsyncGraphDatabase, READ_ACCESS, Driver, AsyncDriver
+from neo4j.exceptions import Neo4jError
+from pydantic import BaseModel
 
 from ..definitions import DbContext
 
 
+class Neo4jPoolSettings(BaseModel):
+    max_connection_pool_size: int = 50
+    connection_acquisition_timeout: float = 60.0
+    max_connection_lifetime: float = 3600.0
+    liveness_check_timeout: typing.Optional[float] = 30.0
+    verify_connectivity: bool = True
+
+
 class Neo4jUtils:
+    _DRIVERS: typing.Dict[DbContext, Driver] = {}
+    _DRIVERS_LOCK = threading.Lock()
+    _ASYNC_DRIVERS: typing.Dict[typing.Tuple[DbContext, asyncio.AbstractEventLoop], AsyncDriver] = {}
+    _POOL_SETTINGS = Neo4jPoolSettings()
+
+    @classmethod
+    def configure_pool(cls, *, settings: Neo4jPoolSettings) -> None:
+        if settings == cls._POOL_SETTINGS:
+            return
+
+        cls._drop_closed_loops()
+        if cls._ASYNC_DRIVERS:
+            raise RuntimeError("Pool settings cannot change while async drivers are open, close them with close_all_async first")
+
+        with cls._DRIVERS_LOCK:
+            drivers = list(cls._DRIVERS.values())
+            cls._DRIVERS.clear()
+            cls._POOL_SETTINGS = settings
+
+        for driver in drivers:
+            driver.close()
+
+    @classmethod
+    def get_driver(cls, *, db_context: DbContext) -> Driver:
+        driver = cls._DRIVERS.get(db_context)
+        if driver is not None:
+            return driver
+
+        with cls._DRIVERS_LOCK:
+            if db_context not in cls._DRIVERS:
+                settings = cls._POOL_SETTINGS
+                driver = GraphDatabase.driver(db_context.host, **cls._get_driver_kwargs(db_context=db_context))
+                if settings.verify_connectivity:
+                    try:
+                        driver.verify_connectivity()
+
+                    except Exception:
+                        driver.close()
+                        raise
+
+                cls._DRIVERS[db_context] = driver
+
+            return cls._DRIVERS[db_context]
+
+    @classmethod
+    async def get_async_driver(cls, *, db_context: DbContext) -> AsyncDriver:
+        cls._drop_closed_loops()
+        key = (db_context, asyncio.get_running_loop())
+        driver = cls._ASYNC_DRIVERS.get(key)
+        if driver is not None:
+            return driver
+
+        driver = AsyncGraphDatabase.driver(db_context.host, **cls._get_driver_kwargs(db_context=db_context))
+        cls._ASYNC_DRIVERS[key] = driver
+        if cls._POOL_SETTINGS.verify_connectivity:
+            try:
+                await driver.verify_connectivity()
+
+            except Exception:
+                cls._ASYNC_DRIVERS.pop(key, None)
+                await driver.close()
+                raise
+
+        return driver
+
+    @classmethod
+    def _get_driver_kwargs(cls, *, db_context: DbContext) -> typing.Dict[str, typing.Any]:
+        settings = cls._POOL_SETTINGS
+        return {
+            "auth": (db_context.username, db_context.password),
+            "max_connection_pool_size": settings.max_connection_pool_size,
+            "connection_acquisition_timeout": settings.connection_acquisition_timeout,
+            "max_connection_lifetime": settings.max_connection_lifetime,
+            "liveness_check_timeout": settings.liveness_check_timeout,
+        }
+
+    @classmethod
+    def close_driver(cls, *, db_context: DbContext) -> None:
+        with cls._DRIVERS_LOCK:
+            driver = cls._DRIVERS.pop(db_context, None)
+
+        if driver is not None:
+            driver.close()
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._DRIVERS_LOCK:
+            drivers = list(cls._DRIVERS.values())
+            cls._DRIVERS.clear()
+
+        for driver in drivers:
+            driver.close()
+
+        async_drivers = list(cls._ASYNC_DRIVERS.items())
+        cls._ASYNC_DRIVERS.clear()
+        for (_, loop), driver in async_drivers:
+            if not loop.is_closed() and not loop.is_running():
+                loop.run_until_complete(driver.close())
+
+    @classmethod
+    def _drop_closed_loops(cls) -> None:
+        # A driver bound to a closed event loop can no longer be closed or reused, only forgotten.
+        for key in [key for key in cls._ASYNC_DRIVERS if key[1].is_closed()]:
+            cls._ASYNC_DRIVERS.pop(key, None)
+
+    @classmethod
+    async def close_all_async(cls) -> None:
+        loop = asyncio.get_running_loop()
+        keys = [key for key in cls._ASYNC_DRIVERS if key[1] is loop]
+        for key in keys:
+            driver = cls._ASYNC_DRIVERS.pop(key)
+            await driver.close()
+
     @classmethod
     @contextmanager
-    def acquire_tx(cls, *, db_context: DbContext):
-        driver = GraphDatabase.driver(db_context.host, auth=(db_context.username, db_context.password))
+    def acquire_tx(cls, *, db_context: DbContext, timeout: typing.Optional[float] = None):
+        driver = cls.get_driver(db_context=db_context)
         with driver.session(default_access_mode=READ_ACCESS, database=db_context.database) as session:
-            tx = session.begin_transaction()
+            tx = session.begin_transaction(timeout=timeout)
 
             try:
                 yield tx
@@ -21,3 +148,23 @@ class Neo4jUtils:
 
             finally:
                 tx.close()
+
+    @classmethod
+    @asynccontextmanager
+    async def acquire_async_tx(cls, *, db_context: DbContext, timeout: typing.Optional[float] = None):
+        driver = await cls.get_async_driver(db_context=db_context)
+        async with driver.session(default_access_mode=READ_ACCESS, database=db_context.database) as session:
+            tx = await session.begin_transaction(timeout=timeout)
+
+            try:
+                yield tx
+
+            finally:
+                await tx.close()
+
+    @classmethod
+    def is_timeout_error(cls, *, error: BaseException) -> bool:
+        return isinstance(error, Neo4jError) and "TransactionTimedOut" in (error.code or "")
+
+
+atexit.register(Neo4jUtils.close_all)
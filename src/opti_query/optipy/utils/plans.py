@@ -0,0 +1,139 @@
+import hashlib
+import json
+import typing
+
+from pydantic import BaseModel
+
+
+class PlanOperator(BaseModel):
+    depth: int
+    operator: str
+    estimated_rows: float
+    details: typing.Optional[str] = None
+    identifiers: typing.List[str] = []
+
+
+class PlanSummary(BaseModel):
+    fingerprint: str
+    planner: typing.Optional[str] = None
+    runtime: typing.Optional[str] = None
+    estimated_result_rows: float
+    total_estimated_rows: float
+    scans: typing.List[str]
+    seeks: typing.List[str]
+    index_usage: typing.List[str]
+    cartesian_products: int
+    eager_operators: int
+    operators: typing.List[PlanOperator]
+
+
+class ProfileTotals(BaseModel):
+    db_hits: int
+    page_cache_hits: int
+    page_cache_misses: int
+    rows: int
+
+
+class PlanAnalyzer:
+    MAX_DETAILS_LENGTH = 200
+    SCAN_SUFFIX = "Scan"
+    SEEK_MARKER = "Seek"
+    INDEX_MARKER = "Index"
+    CARTESIAN_PRODUCT = "CartesianProduct"
+    EAGER = "Eager"
+    DEFAULT_COST_WEIGHT = 1.0
+    COST_WEIGHTS = {
+        "AllNodesScan": 2.0,
+        "NodeByLabelScan": 1.0,
+        "DirectedRelationshipTypeScan": 1.0,
+        "UndirectedRelationshipTypeScan": 1.0,
+        "NodeIndexScan": 0.5,
+        "NodeIndexContainsScan": 0.6,
+        "NodeIndexEndsWithScan": 0.6,
+        "NodeIndexSeekByRange": 0.2,
+        "NodeIndexSeek": 0.1,
+        "NodeUniqueIndexSeek": 0.05,
+        "NodeByIdSeek": 0.05,
+        "NodeByElementIdSeek": 0.05,
+        "Expand(Into)": 1.5,
+        "VarLengthExpand(All)": 2.0,
+        "VarLengthExpand(Into)": 2.0,
+        "Sort": 1.5,
+        "Eager": 2.0,
+        "CartesianProduct": 3.0,
+    }
+
+    @classmethod
+    def summarize(cls, *, plan: typing.Mapping[str, typing.Any]) -> PlanSummary:
+        operators = list(cls.iter_operators(plan=plan))
+        args = plan.get("args", {})
+        return PlanSummary(
+            fingerprint=cls.fingerprint(plan=plan),
+            planner=args.get("planner"),
+            runtime=args.get("runtime"),
+            estimated_result_rows=cls.get_estimated_rows(plan=plan),
+            total_estimated_rows=round(sum(operator.estimated_rows for operator in operators), 2),
+            scans=[cls._describe(operator=operator) for operator in operators if operator.operator.endswith(cls.SCAN_SUFFIX)],
+            seeks=[cls._describe(operator=operator) for operator in operators if cls.SEEK_MARKER in operator.operator],
+            index_usage=[cls._describe(operator=operator) for operator in operators if cls.INDEX_MARKER in operator.operator],
+            cartesian_products=sum(1 for operator in operators if operator.operator == cls.CARTESIAN_PRODUCT),
+            eager_operators=sum(1 for operator in operators if operator.operator == cls.EAGER),
+            operators=operators,
+        )
+
+    @classmethod
+    def iter_operators(cls, *, plan: typing.Mapping[str, typing.Any], depth: int = 0) -> typing.Generator[PlanOperator, None, None]:
+        details = plan.get("args", {}).get("Details")
+        if details is not None and len(details) > cls.MAX_DETAILS_LENGTH:
+            details = details[: cls.MAX_DETAILS_LENGTH] + "…"
+
+        yield PlanOperator(
+            depth=depth,
+            operator=cls.get_operator_type(plan=plan),
+            estimated_rows=round(cls.get_estimated_rows(plan=plan), 2),
+            details=details,
+            identifiers=sorted(plan.get("identifiers", [])),
+        )
+        for child in plan.get("children", []):
+            yield from cls.iter_operators(plan=child, depth=depth + 1)
+
+    @classmethod
+    def estimate_cost(cls, *, plan: typing.Mapping[str, typing.Any]) -> float:
+        cost = 0.0
+        for operator in cls.iter_operators(plan=plan):
+            cost += cls.COST_WEIGHTS.get(operator.operator, cls.DEFAULT_COST_WEIGHT) * max(operator.estimated_rows, 1.0)
+
+        return round(cost, 2)
+
+    @classmethod
+    def get_profile_totals(cls, *, profile: typing.Mapping[str, typing.Any]) -> ProfileTotals:
+        profiles = [profile]
+        totals = ProfileTotals(db_hits=0, page_cache_hits=0, page_cache_misses=0, rows=int(profile.get("rows", 0)))
+        while profiles:
+            current = profiles.pop()
+            totals.db_hits += int(current.get("dbHits", 0))
+            totals.page_cache_hits += int(current.get("pageCacheHits", 0))
+            totals.page_cache_misses += int(current.get("pageCacheMisses", 0))
+            profiles.extend(current.get("children", []))
+
+        return totals
+
+    @classmethod
+    def fingerprint(cls, *, plan: typing.Mapping[str, typing.Any]) -> str:
+        return hashlib.sha256(json.dumps(cls._get_shape(plan=plan)).encode()).hexdigest()[:16]
+
+    @classmethod
+    def get_operator_type(cls, *, plan: typing.Mapping[str, typing.Any]) -> str:
+        return plan.get("operatorType", "").split("@", 1)[0]
+
+    @classmethod
+    def get_estimated_rows(cls, *, plan: typing.Mapping[str, typing.Any]) -> float:
+        return float(plan.get("args", {}).get("EstimatedRows", 0.0))
+
+    @classmethod
+    def _get_shape(cls, *, plan: typing.Mapping[str, typing.Any]) -> typing.List[typing.Any]:
+        return [cls.get_operator_type(plan=plan), plan.get("args", {}).get("Details"), [cls._get_shape(plan=child) for child in plan.get("children", [])]]
+
+    @classmethod
+    def _describe(cls, *, operator: PlanOperator) -> str:
+        return f"{operator.operator}({operator.details})" if operator.details else operator.operator
@@ -0,0 +1,104 @@
+import math
+import typing
+
+
+class SamplingUtils:
+    Z_95 = 1.96
+
+    @classmethod
+    def build_sample_query(cls, *, labels: typing.List[str], sample_size: int, node_var: str = "n") -> str:
+        pattern = ":".join(labels)
+        return f"""
+            CALL {{ MATCH (node:{pattern}) RETURN count(node) AS population }}
+            MATCH ({node_var}:{pattern})
+            WHERE population <= {sample_size} OR rand() < toFloat({sample_size}) / population
+            WITH population, {node_var} LIMIT {sample_size}
+            """
+
+    @classmethod
+    def wilson_interval(cls, *, successes: int, total: int, population: typing.Optional[int] = None, z: float = Z_95) -> typing.Tuple[float, float]:
+        if total <= 0:
+            return 0.0, 1.0
+
+        ratio = successes / total
+        if population is not None and total >= population:
+            return ratio, ratio
+
+        denominator = 1 + z**2 / total
+        center = (ratio + z**2 / (2 * total)) / denominator
+        margin = z * math.sqrt(ratio * (1 - ratio) / total + z**2 / (4 * total**2)) / denominator
+        if population is not None and population > 1:
+            margin *= math.sqrt((population - total) / (population - 1))
+
+        return max(0.0, center - margin), min(1.0, center + margin)
+
+    @classmethod
+    def mean_interval(
+        cls,
+        *,
+        total: int,
+        value_sum: float,
+        value_square_sum: float,
+        population: typing.Optional[int] = None,
+        z: float = Z_95,
+    ) -> typing.Tuple[float, float, float]:
+        if total <= 0:
+            return 0.0, 0.0, math.inf
+
+        mean = value_sum / total
+        if population is not None and total >= population:
+            return mean, mean, mean
+
+        variance = max(0.0, value_square_sum / total - mean**2) * total / max(total - 1, 1)
+        margin = z * math.sqrt(variance / total)
+        if population is not None and population > 1:
+            margin *= math.sqrt((population - total) / (population - 1))
+
+        return mean, max(0.0, mean - margin), mean + margin
+
+    @classmethod
+    def percentile(cls, *, values: typing.Sequence[float], ratio: float) -> typing.Optional[float]:
+        if not values:
+            return None
+
+        ordered = sorted(values)
+        position = (len(ordered) - 1) * ratio
+        lower = math.floor(position)
+        upper = math.ceil(position)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    @classmethod
+    def mann_whitney_p_value(cls, *, first: typing.Sequence[float], second: typing.Sequence[float]) -> float:
+        first_size, second_size = len(first), len(second)
+        if not first_size or not second_size:
+            return 1.0
+
+        ranked = sorted([(value, 0) for value in first] + [(value, 1) for value in second])
+        ranks = [0.0] * len(ranked)
+        tie_correction = 0.0
+        start = 0
+        while start < len(ranked):
+            end = start
+            while end + 1 < len(ranked) and ranked[end + 1][0] == ranked[start][0]:
+                end += 1
+
+            for index in range(start, end + 1):
+                ranks[index] = (start + end) / 2 + 1
+
+            ties = end - start + 1
+            tie_correction += ties**3 - ties
+            start = end + 1
+
+        first_rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+        u_statistic = first_rank_sum - first_size * (first_size + 1) / 2
+        total = first_size + second_size
+        variance = first_size * second_size / 12 * (total + 1 - tie_correction / (total * (total - 1)))
+        if variance <= 0:
+            return 1.0
+
+        z = (abs(u_statistic - first_size * second_size / 2) - 0.5) / math.sqrt(variance)
+        return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+    @classmethod
+    def format_percentage(cls, *, ratio: float) -> str:
+        return f"{round(ratio * 100, 2)}%"
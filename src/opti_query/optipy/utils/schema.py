@@ -0,0 +1,82 @@
+import re
+import typing
+
+from .cypher import CypherUtils
+
+
+class Neo4jSchemaPruner:
+    MIN_SCHEMA_SIZE = 50
+    REL_PATTERN = re.compile(r"^\(:?(?P<from_label>[^)]*)\)-\[:(?P<rel_type>[^\]]+)\]->\(:?(?P<to_label>[^)]*)\)$")
+
+    @classmethod
+    def prune(cls, *, schema: typing.Mapping[str, typing.Any], query: str) -> typing.Mapping[str, typing.Any]:
+        labels = cls.get_labels(schema=schema)
+        rel_types = cls.get_rel_types(schema=schema)
+        if len(labels) + len(rel_types) < cls.MIN_SCHEMA_SIZE:
+            return schema
+
+        patterns = CypherUtils.extract_patterns(query=query)
+        query_labels = set(patterns.labels)
+        query_rel_types = {relationship.rel_type for relationship in patterns.relationships}
+        if not query_labels and not query_rel_types:
+            return schema
+
+        kept_rel_types = set(query_rel_types)
+        kept_labels = set(query_labels)
+        for from_label, rel_type, to_label in cls._iter_rel_patterns(schema=schema):
+            if from_label in query_labels or to_label in query_labels:
+                kept_rel_types.add(rel_type)
+
+            if rel_type in query_rel_types:
+                kept_labels.update(label for label in (from_label, to_label) if label)
+
+        query_properties = {prop for props in patterns.properties_by_label.values() for prop in props}
+        kept_labels.update(index["label"] for index in schema["indexes"] if index["property"] in query_properties and index["label"] in labels)
+
+        pruned = dict(cls.select(schema=schema, labels=kept_labels, rel_types=kept_rel_types))
+        pruned["omitted"] = {
+            "labels": len(labels - kept_labels),
+            "relationship_types": len(rel_types - kept_rel_types),
+            "indexes": len(schema["indexes"]) - len(pruned["indexes"]),
+            "constraints": len(schema["constraints"]) - len(pruned["constraints"]),
+        }
+        return pruned
+
+    @classmethod
+    def select(cls, *, schema: typing.Mapping[str, typing.Any], labels: typing.Set[str], rel_types: typing.Set[str]) -> typing.Dict[str, typing.Any]:
+        names = labels | rel_types
+        relationship_count = []
+        for count in schema["relationship_count"]:
+            for key in count:
+                from_label, rel_type, to_label = cls._parse_rel_key(key=key)
+                if rel_type in rel_types and {from_label, to_label} - {""} <= labels:
+                    relationship_count.append(count)
+
+        return {
+            "node_count": [count for count in schema["node_count"] if set(count) <= labels],
+            "relationship_count": relationship_count,
+            "indexes": [index for index in schema["indexes"] if index["label"] in names],
+            "constraints": [constraint for constraint in schema["constraints"] if constraint["label"] in names],
+        }
+
+    @classmethod
+    def get_labels(cls, *, schema: typing.Mapping[str, typing.Any]) -> typing.Set[str]:
+        return {name for count in schema["node_count"] for name in count}
+
+    @classmethod
+    def get_rel_types(cls, *, schema: typing.Mapping[str, typing.Any]) -> typing.Set[str]:
+        return {rel_type for _, rel_type, _ in cls._iter_rel_patterns(schema=schema)}
+
+    @classmethod
+    def _iter_rel_patterns(cls, *, schema: typing.Mapping[str, typing.Any]) -> typing.Generator[typing.Tuple[str, str, str], None, None]:
+        for count in schema["relationship_count"]:
+            for key in count:
+                yield cls._parse_rel_key(key=key)
+
+    @classmethod
+    def _parse_rel_key(cls, *, key: str) -> typing.Tuple[str, str, str]:
+        match = cls.REL_PATTERN.match(key)
+        if match is None:
+            return "", key, ""
+
+        return match.group("from_label"), match.group("rel_type"), match.group("to_label")
@@ -0,0 +1,108 @@
+import json
+import typing
+from pathlib import Path
+
+from .definitions import WorkloadResult, WorkloadStatus
+from .utils.cypher import CypherUtils
+
+
+class WorkloadReader:
+    @classmethod
+    def read_queries(cls, *, path: Path) -> typing.List[str]:
+        text = path.read_text()
+        if path.suffix == ".jsonl":
+            queries = []
+            for line_number, line in enumerate(text.splitlines(), start=1):
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                query = record.get("query") if isinstance(record, dict) else record
+                if not isinstance(query, str):
+                    raise ValueError(f"Workload file {path} line {line_number} must be a query string or an object with a 'query' string, not {line.strip()[:100]}")
+
+                queries.append(query)
+
+            return [query.strip() for query in queries if cls.normalize(query=query)]
+
+        return cls.split_statements(text=text)
+
+    @classmethod
+    def read_parameters(cls, *, path: Path) -> typing.List[typing.Dict[str, typing.Any]]:
+        text = path.read_text()
+        if path.suffix == ".jsonl":
+            parameter_sets = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+        else:
+            parameter_sets = json.loads(text)
+            if isinstance(parameter_sets, dict):
+                parameter_sets = [parameter_sets]
+
+        if not all(isinstance(parameters, dict) for parameters in parameter_sets):
+            raise ValueError(f"Parameters file {path} must contain JSON objects mapping parameter names to values")
+
+        return parameter_sets
+
+    @classmethod
+    def read_completed_queries(cls, *, path: Path) -> typing.Set[str]:
+        if not path.exists():
+            return set()
+
+        completed = set()
+        for line in path.read_text().splitlines():
+            if not line.strip():
+                continue
+
+            try:
+                result = WorkloadResult.model_validate_json(line)
+
+            except ValueError:
+                continue
+
+            if result.status == WorkloadStatus.OK:
+                completed.add(cls.normalize(query=result.query))
+
+        return completed
+
+    @classmethod
+    def deduplicate(cls, *, queries: typing.Iterable[str]) -> typing.List[str]:
+        seen: typing.Set[str] = set()
+        unique_queries = []
+        for query in queries:
+            normalized = cls.normalize(query=query)
+            if normalized not in seen:
+                seen.add(normalized)
+                unique_queries.append(query)
+
+        return unique_queries
+
+    @classmethod
+    def split_statements(cls, *, text: str) -> typing.List[str]:
+        statements = []
+        current: typing.List[str] = []
+        for char, kind in CypherUtils.iter_chars(text=text):
+            if char == ";" and kind == CypherUtils.CODE:
+                statements.append("".join(current))
+                current = []
+
+            else:
+                current.append(char)
+
+        statements.append("".join(current))
+        return [statement.strip() for statement in statements if cls.normalize(query=statement)]
+
+    @classmethod
+    def normalize(cls, *, query: str) -> str:
+        normalized: typing.List[str] = []
+        for char, kind in CypherUtils.iter_chars(text=query):
+            if kind == CypherUtils.COMMENT:
+                continue
+
+            if kind == CypherUtils.CODE and (char.isspace() or char == ";"):
+                if normalized and normalized[-1] != " ":
+                    normalized.append(" ")
+
+            else:
+                normalized.append(char)
+
+        return "".join(normalized).strip()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from ..src.opti_query.optipy.caching import AnswerCache, SchemaCache, SchemaCacheSettings
+from ..src.opti_query.optipy.definitions import DbTypes, LlmTypes, WorkloadStatus
+from ..src.opti_query.optipy.hanlder import AsyncOptiQueryHandler
+from ..src.opti_query.optipy.llm_clients import AsyncChatGPTClient
+from ..src.opti_query.optipy.prefetch import IQueryPrefetcher, PrefetchSettings
+from ..src.opti_query.optipy.utils import neo4j as neo4j_utils
+from ..src.opti_query.optipy.utils.neo4j import Neo4jPoolSettings, Neo4jUtils
+
+
+class _FakeAsyncResult:
+    def __init__(self, *, rows):
+        self._rows = rows
+
+    async def data(self):
+        return self._rows
+
+
+class _FakeAsyncTx:
+    def __init__(self, *, driver):
+        self._driver = driver
+
+    async def run(self, query):
+        self._driver.queries.append(query)
+        await asyncio.sleep(0)
+        if "FAILING" in query:
+            raise RuntimeError("database is down")
+
+        return _FakeAsyncResult(rows=self._driver.answer(query=query))
+
+    async def close(self):
+        pass
+
+
+class _FakeAsyncSession:
+    def __init__(self, *, driver):
+        self._driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def begin_transaction(self, timeout=None):
+        return _FakeAsyncTx(driver=self._driver)
+
+
+class _FakeAsyncDriver:
+    def __init__(self):
+        self.queries = []
+        self.closed = False
+
+    def session(self, **kwargs):
+        return _FakeAsyncSession(driver=self)
+
+    async def verify_connectivity(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    @classmethod
+    def answer(cls, *, query: str):
+        if "apoc.meta.stats" in query:
+            return [{"labels": {"Person": 10}, "relTypes": {}}]
+
+        if "collect(name + ':' + state)" in query:
+            return [{"indexes": []}]
+
+        if "collect(name)" in query:
+            return [{"constraints": []}]
+
+        if "label_counts" in query:
+            return [{"label_counts": [10]}]
+
+        return []
+
+
+class TestAsyncOptiQueryHandler(unittest.TestCase):
+    def setUp(self):
+        AnswerCache.clear()
+        SchemaCache.clear()
+        SchemaCache.configure(settings=SchemaCacheSettings(persist=False))
+        IQueryPrefetcher.configure(settings=PrefetchSettings(enabled=False))
+        Neo4jUtils.configure_pool(settings=Neo4jPoolSettings(verify_connectivity=False))
+        self.drivers = []
+        self.active = 0
+        self.max_active = 0
+        driver_patch = mock.patch.object(neo4j_utils.AsyncGraphDatabase, "driver", side_effect=self._create_driver)
+        llm_patch = mock.patch.object(AsyncChatGPTClient, "_send_text", new=self._build_fake_send_text())
+        driver_patch.start()
+        llm_patch.start()
+        self.addCleanup(driver_patch.stop)
+        self.addCleanup(llm_patch.stop)
+
+    def tearDown(self):
+        AnswerCache.clear()
+        SchemaCache.clear()
+        SchemaCache.configure(settings=SchemaCacheSettings())
+        IQueryPrefetcher.configure(settings=PrefetchSettings())
+        Neo4jUtils._ASYNC_DRIVERS.clear()
+        Neo4jUtils._POOL_SETTINGS = Neo4jPoolSettings()
+
+    def _create_driver(self, *args, **kwargs) -> _FakeAsyncDriver:
+        self.drivers.append(_FakeAsyncDriver())
+        return self.drivers[-1]
+
+    def _build_fake_send_text(self):
+        test = self
+
+        async def send_text(client, *, msg: str) -> str:
+            client._build_prompt(msg=msg)
+            test.active += 1
+            test.max_active = max(test.max_active, test.active)
+            try:
+                await asyncio.sleep(0.01)
+                if not hasattr(client, "_fake_query"):
+                    client._fake_query = json.loads(msg)["query"]
+                    if "LLM_DOWN" in client._fake_query:
+                        raise RuntimeError("llm is down")
+
+                    labels = ["FAILING"] if "DB_DOWN" in client._fake_query else ["Person", "Actor"]
+                    reply = {"query_type": "NEO4J_COUNT_NODES_WITH_LABELS", "data": {"labels": labels}}
+
+                else:
+                    optimized = {"query": f"{client._fake_query} LIMIT 10", "explanation": f"count answer was {msg}"}
+                    reply = {"query_type": "OPTIMIZE_FINISHED", "data": {"optimized_queries_and_explains": [optimized], "suggestions": []}}
+
+            finally:
+                test.active -= 1
+
+            text = json.dumps(reply)
+            client._record_assistant_message(text=text)
+            return text
+
+        return send_text
+
+    @classmethod
+    def _get_kwargs(cls) -> dict:
+        return {
+            "db_type": DbTypes.NEO4J,
+            "host": "bolt://localhost:7687",
+            "username": "neo4j",
+            "password": "pass",
+            "database": "neo4j",
+            "llm_type": LlmTypes.CHATGPT,
+            "model_name": "gpt-4o-mini",
+            "rank_candidates": False,
+            "api_key": "test",
+        }
+
+    def test_optimize_query_runs_the_async_conversation(self):
+        optimization = asyncio.run(AsyncOptiQueryHandler.optimize_query(query="MATCH (p:Person) RETURN p", **self._get_kwargs()))
+
+        self.assertEqual(optimization.optimized_queries_and_explains[0].query, "MATCH (p:Person) RETURN p LIMIT 10")
+        self.assertEqual(len(optimization.session_report.turns), 2)
+        self.assertTrue(any("label_counts" in query for query in self.drivers[0].queries))
+
+    def test_optimize_query_propagates_llm_errors(self):
+        with self.assertRaisesRegex(RuntimeError, "llm is down"):
+            asyncio.run(AsyncOptiQueryHandler.optimize_query(query="MATCH (n:LLM_DOWN) RETURN n", **self._get_kwargs()))
+
+    def test_db_errors_are_sent_back_to_the_llm(self):
+        optimization = asyncio.run(AsyncOptiQueryHandler.optimize_query(query="MATCH (n:DB_DOWN) RETURN n", **self._get_kwargs()))
+
+        self.assertIn("Please try again", optimization.optimized_queries_and_explains[0].explanation)
+        self.assertIn("database is down", optimization.optimized_queries_and_explains[0].explanation)
+        self.assertEqual(AnswerCache.get_stats().size, 0)
+
+    def test_optimize_queries_limits_concurrency_and_reuses_the_driver(self):
+        queries = [f"MATCH (p:Person) WHERE p.id = {index} RETURN p" for index in range(6)]
+
+        async def optimize():
+            try:
+                return await AsyncOptiQueryHandler.optimize_queries(queries=queries, max_concurrency=2, **self._get_kwargs())
+
+            finally:
+                await AsyncOptiQueryHandler.close()
+
+        results = asyncio.run(optimize())
+
+        self.assertEqual([result.query for result in results], queries)
+        self.assertTrue(all(result.status == WorkloadStatus.OK for result in results))
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual(len(self.drivers), 1)
+        self.assertTrue(self.drivers[0].closed)
+
+    def test_optimize_queries_isolates_failures(self):
+        queries = ["MATCH (p:Person) RETURN p", "MATCH (n:LLM_DOWN) RETURN n", "MATCH (p:Person) RETURN p.name"]
+        results = asyncio.run(AsyncOptiQueryHandler.optimize_queries(queries=queries, max_concurrency=3, **self._get_kwargs()))
+
+        self.assertEqual([result.status for result in results], [WorkloadStatus.OK, WorkloadStatus.ERROR, WorkloadStatus.OK])
+        self.assertEqual(results[1].error, "RuntimeError: llm is down")
+        self.assertIsNone(results[1].optimization)
@@ -0,0 +1,183 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..src.opti_query.optipy.caching import AnswerCache, AnswerCacheSettings, SchemaCache, SchemaCacheSettings
+from ..src.opti_query.optipy.definitions import DbContext
+from ..src.opti_query.optipy.exceptions import DbQueryFailed
+from ..src.opti_query.optipy.queries import Neo4jLabelCountQueryRunner, Neo4jRelBetweenLabelsCountQueryRunner, Neo4jOpeningQueryRunner
+from ..src.opti_query.optipy.utils.schema import Neo4jSchemaPruner
+
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        AnswerCache.configure(settings=AnswerCacheSettings(max_size=2))
+        AnswerCache.clear()
+        self.db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+
+    def tearDown(self):
+        AnswerCache.configure(settings=AnswerCacheSettings())
+        AnswerCache.clear()
+
+    def test_get_or_compute_hit(self):
+        calls = []
+        for _ in range(2):
+            AnswerCache.get_or_compute(db_context=self.db_context, key="key", compute=lambda: calls.append(1) or "42")
+
+        self.assertEqual(len(calls), 1)
+        stats = AnswerCache.get_stats()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+    def test_none_key_is_not_cached(self):
+        calls = []
+        for _ in range(2):
+            AnswerCache.get_or_compute(db_context=self.db_context, key=None, compute=lambda: calls.append(1) or "42")
+
+        self.assertEqual(len(calls), 2)
+
+    def test_failed_compute_is_recomputed(self):
+        def fail():
+            raise DbQueryFailed(reason="Please try again")
+
+        with self.assertRaises(DbQueryFailed):
+            AnswerCache.get_or_compute(db_context=self.db_context, key="key", compute=fail)
+
+        self.assertEqual(AnswerCache.get_or_compute(db_context=self.db_context, key="key", compute=lambda: "42"), "42")
+        self.assertEqual(AnswerCache.get_stats().size, 1)
+
+    def test_lru_eviction(self):
+        for key in ["a", "b", "a", "c"]:
+            AnswerCache.get_or_compute(db_context=self.db_context, key=key, compute=lambda: key)
+
+        stats = AnswerCache.get_stats()
+        self.assertEqual(stats.evictions, 1)
+        self.assertEqual(AnswerCache.get_or_compute(db_context=self.db_context, key="a", compute=lambda: "recomputed"), "a")
+        self.assertEqual(AnswerCache.get_or_compute(db_context=self.db_context, key="b", compute=lambda: "recomputed"), "recomputed")
+
+    def test_database_identity_is_part_of_key(self):
+        other_db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="other")
+        AnswerCache.get_or_compute(db_context=self.db_context, key="key", compute=lambda: "1")
+        self.assertEqual(AnswerCache.get_or_compute(db_context=other_db_context, key="key", compute=lambda: "2"), "2")
+
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        SchemaCache.configure(settings=SchemaCacheSettings(cache_dir=Path(self.cache_dir.name)))
+        SchemaCache.clear()
+        self.db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+        self.fingerprints = []
+        self.loads = []
+
+    def tearDown(self):
+        SchemaCache.configure(settings=SchemaCacheSettings())
+        SchemaCache.clear()
+        self.cache_dir.cleanup()
+
+    def _get_or_load(self, *, fingerprint: str = "v1") -> dict:
+        return SchemaCache.get_or_load(
+            db_context=self.db_context,
+            fingerprint=lambda: self.fingerprints.append(fingerprint) or fingerprint,
+            loader=lambda: self.loads.append(fingerprint) or {"version": fingerprint},
+        )
+
+    def test_recently_validated_snapshot_skips_fingerprint(self):
+        self._get_or_load()
+        self.assertEqual(self._get_or_load(fingerprint="v2"), {"version": "v1"})
+        self.assertEqual(self.fingerprints, ["v1"])
+
+    def test_revalidation_reloads_only_on_changed_fingerprint(self):
+        SchemaCache.configure(settings=SchemaCacheSettings(revalidate_after_seconds=0, cache_dir=Path(self.cache_dir.name)))
+        self._get_or_load()
+        self.assertEqual(self._get_or_load(), {"version": "v1"})
+        self.assertEqual(self._get_or_load(fingerprint="v2"), {"version": "v2"})
+        self.assertEqual(self.fingerprints, ["v1", "v1", "v2"])
+        self.assertEqual(self.loads, ["v1", "v2"])
+
+    def test_expired_snapshot_is_reloaded(self):
+        SchemaCache.configure(settings=SchemaCacheSettings(ttl_seconds=0, cache_dir=Path(self.cache_dir.name)))
+        self._get_or_load()
+        self._get_or_load()
+        self.assertEqual(self.loads, ["v1", "v1"])
+
+    def test_snapshot_round_trips_through_disk(self):
+        self._get_or_load()
+        SchemaCache.clear()
+        self.assertEqual(self._get_or_load(), {"version": "v1"})
+        self.assertEqual(self.loads, ["v1"])
+        self.assertEqual(self.fingerprints, ["v1", "v1"])
+
+        SchemaCache.invalidate(db_context=self.db_context)
+        self.assertEqual(list(Path(self.cache_dir.name).iterdir()), [])
+        self._get_or_load()
+        self.assertEqual(self.loads, ["v1", "v1"])
+
+    def test_fingerprint_changes_with_counts(self):
+        indexes = [{"indexes": ["person_name:ONLINE"]}]
+        constraints = [{"constraints": []}]
+        stats = {"nodeCount": 20, "relCount": 0, "labels": {"Person": 20}, "relTypesCount": {}}
+        grown = {**stats, "nodeCount": 21, "labels": {"Person": 21}}
+
+        first = Neo4jOpeningQueryRunner._parse_fingerprint(results=[[stats], indexes, constraints])
+        second = Neo4jOpeningQueryRunner._parse_fingerprint(results=[[grown], indexes, constraints])
+        self.assertNotEqual(first, second)
+
+
+class TestQueryRunnerCacheKey(unittest.TestCase):
+    def test_label_order_is_canonical(self):
+        first = Neo4jLabelCountQueryRunner(labels=["Person", "Employee"])
+        second = Neo4jLabelCountQueryRunner(labels=[":Employee", "`Person`"])
+        self.assertEqual(first.get_cache_key(), second.get_cache_key())
+
+    def test_rel_direction_is_kept(self):
+        outgoing = Neo4jRelBetweenLabelsCountQueryRunner(from_node_labels=["A"], to_node_labels=["B"], rel_type="KNOWS")
+        incoming = Neo4jRelBetweenLabelsCountQueryRunner(from_node_labels=["B"], to_node_labels=["A"], rel_type=":KNOWS")
+        self.assertNotEqual(outgoing.get_cache_key(), incoming.get_cache_key())
+
+
+class TestOpeningCooccurrence(unittest.TestCase):
+    SCHEMA = {
+        "node_count": [{"Actor": 10}, {"Movie": 5}, {"Person": 20}],
+        "relationship_count": [],
+        "indexes": [{"label": "Person", "property": "name"}, {"label": "ACTED_IN", "property": "role"}],
+        "constraints": [],
+    }
+
+    def test_labels_include_query_and_indexed_labels(self):
+        runner = Neo4jOpeningQueryRunner(query="MATCH (a:Actor)-[:ACTED_IN]->(m:Movie) RETURN m")
+        self.assertEqual(runner._get_cooccurrence_labels(schema=self.SCHEMA), ["Actor", "Movie", "Person"])
+
+    def test_exact_matrix_proves_subsets(self):
+        cooccurrence = json.loads(Neo4jOpeningQueryRunner._parse_cooccurrence(labels=["Actor", "Person"], exact=True, results=[[{"matrix": [[10, 10], [10, 20]]}]]))
+        self.assertEqual(cooccurrence["subsets"], [{"label": "Actor", "subset_of": "Person"}])
+        self.assertEqual(cooccurrence["overlaps"]["Person"], {"Actor": "50.0%"})
+
+
+class TestNeo4jSchemaPruner(unittest.TestCase):
+    def setUp(self):
+        Neo4jSchemaPruner.MIN_SCHEMA_SIZE = 0
+
+    def tearDown(self):
+        Neo4jSchemaPruner.MIN_SCHEMA_SIZE = 50
+
+    def test_prune_keeps_query_labels_and_one_hop(self):
+        schema = {
+            "node_count": [{"Person": 20}, {"Movie": 5}, {"Studio": 3}, {"Invoice": 100}],
+            "relationship_count": [
+                {"()-[:ACTED_IN]->()": 30},
+                {"(:Person)-[:ACTED_IN]->()": 30},
+                {"()-[:ACTED_IN]->(:Movie)": 30},
+                {"()-[:PAID]->(:Invoice)": 8},
+                {"(:Movie)-[:MADE_BY]->()": 5},
+                {"()-[:MADE_BY]->(:Studio)": 5},
+            ],
+            "indexes": [{"label": "Invoice", "property": "id"}, {"label": "Person", "property": "name"}],
+            "constraints": [],
+        }
+        pruned = Neo4jSchemaPruner.prune(schema=schema, query="MATCH (p:Person)-[:ACTED_IN]->(m) WHERE p.name = 'x' RETURN m")
+
+        self.assertEqual(Neo4jSchemaPruner.get_labels(schema=pruned), {"Person", "Movie"})
+        self.assertEqual(Neo4jSchemaPruner.get_rel_types(schema=pruned), {"ACTED_IN"})
+        self.assertEqual(pruned["indexes"], [{"label": "Person", "property": "name"}])
+        self.assertEqual(pruned["omitted"]["labels"], 2)
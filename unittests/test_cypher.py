@@ -0,0 +1,42 @@
+import unittest
+
+from ..src.opti_query.optipy.utils.cypher import CypherUtils, RelationshipPattern
+
+
+class TestCypherPatterns(unittest.TestCase):
+    def test_plain_labels(self):
+        patterns = CypherUtils.extract_patterns(query="MATCH (p:Person:Actor)-[:ACTED_IN]->(m:Movie) WHERE p.name = 'x' RETURN m")
+
+        self.assertEqual(patterns.labels, ["Person", "Actor", "Movie"])
+        self.assertEqual(patterns.relationships, [RelationshipPattern(from_node_labels=["Person", "Actor"], to_node_labels=["Movie"], rel_type="ACTED_IN")])
+        self.assertEqual(patterns.properties_by_label, {"Person": ["name"], "Actor": ["name"]})
+
+    def test_label_disjunction_is_split_into_alternatives(self):
+        patterns = CypherUtils.extract_patterns(query="MATCH (n:Person|Company)-[:OWNS]->(a:`Asset|Legacy`) RETURN n.name")
+
+        self.assertEqual(patterns.labels, ["Person", "Company", "Asset|Legacy"])
+        self.assertEqual(
+            patterns.relationships,
+            [
+                RelationshipPattern(from_node_labels=["Person"], to_node_labels=["Asset|Legacy"], rel_type="OWNS"),
+                RelationshipPattern(from_node_labels=["Company"], to_node_labels=["Asset|Legacy"], rel_type="OWNS"),
+            ],
+        )
+        self.assertEqual(patterns.properties_by_label, {"Person": ["name"], "Company": ["name"]})
+
+    def test_negated_labels_and_types_are_dropped(self):
+        patterns = CypherUtils.extract_patterns(query="MATCH (n:Person&!Archived)-[:!BLOCKED|FOLLOWS]->(m:!Bot) RETURN m")
+
+        self.assertEqual(patterns.labels, ["Person"])
+        self.assertEqual(patterns.relationships, [RelationshipPattern(from_node_labels=["Person"], to_node_labels=[], rel_type="FOLLOWS")])
+
+    def test_repeated_variable_combines_alternatives(self):
+        patterns = CypherUtils.extract_patterns(query="MATCH (n:A|B) MATCH (n:C)-[:R]->(m) RETURN n")
+
+        self.assertEqual(
+            patterns.relationships,
+            [
+                RelationshipPattern(from_node_labels=["A", "C"], to_node_labels=[], rel_type="R"),
+                RelationshipPattern(from_node_labels=["B", "C"], to_node_labels=[], rel_type="R"),
+            ],
+        )
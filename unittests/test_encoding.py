@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from ..src.opti_query.optipy.definitions import ANSWER_ENCODING_PLACEHOLDER, DB_TYPE_TO_SYSTEM_INSTRUCTIONS, DbTypes
+from ..src.opti_query.optipy.encoding import CompactResponseEncoder, JsonResponseEncoder, ResponseEncodings
+from ..src.opti_query.optipy.llm_clients import ChatGPTClient
+from ..src.opti_query.optipy.llm_clients.base import BaseLLMClient
+
+
+class TestCompactResponseEncoder(unittest.TestCase):
+    def setUp(self):
+        self.encoder = CompactResponseEncoder()
+
+    def test_single_key_lists_are_merged(self):
+        encoded = json.loads(self.encoder.encode(text=json.dumps({"node_count": [{"Person": 10}, {"Movie": 5}]})))
+        self.assertEqual(encoded, {"node_count": {"Person": 10, "Movie": 5}})
+
+    def test_same_shaped_objects_become_columns(self):
+        indexes = [{"label": "Person", "property": "name"}, {"label": "Movie", "property": "title"}]
+        encoded = json.loads(self.encoder.encode(text=json.dumps({"indexes": indexes})))
+        self.assertEqual(encoded["indexes"], {"columns": ["label", "property"], "rows": [["Person", "name"], ["Movie", "title"]]})
+
+    def test_plan_table_borders_are_dropped(self):
+        plan = "+----------+\n| Operator    |   Details |\n+----------+\n| NodeByLabelScan    | n:Person |\n+----------+"
+        self.assertEqual(self.encoder.encode(text=plan), "| Operator | Details |\n| NodeByLabelScan | n:Person |")
+
+    def test_query_text_is_not_compacted(self):
+        query = "MATCH (n:Person)\nWHERE n.name = 'a  b'\n// +--+\nRETURN n"
+        encoded = json.loads(self.encoder.encode(text=json.dumps({"query": query, "plan": "+--+\n| Operator    |\n+--+"})))
+        self.assertEqual(encoded, {"query": query, "plan": "| Operator |"})
+
+    def test_plain_answers_are_unchanged(self):
+        self.assertEqual(self.encoder.encode(text="42"), "42")
+        self.assertEqual(JsonResponseEncoder().encode(text='{"a": [1]}'), '{"a": [1]}')
+
+
+class TestAnswerEncodingPrompt(unittest.TestCase):
+    def tearDown(self):
+        BaseLLMClient.configure_encoding(encoding=ResponseEncodings.COMPACT)
+
+    def _build_system_instruction(self) -> str:
+        client = ChatGPTClient(system_instruction=DB_TYPE_TO_SYSTEM_INSTRUCTIONS[DbTypes.NEO4J], model_name="gpt-4o-mini", api_key="test")
+        return client._system_instruction
+
+    def test_compact_encoding_is_described(self):
+        system_instruction = self._build_system_instruction()
+
+        self.assertIn(CompactResponseEncoder.get_prompt_description(), system_instruction)
+        self.assertNotIn(ANSWER_ENCODING_PLACEHOLDER, system_instruction)
+
+    def test_json_encoding_does_not_describe_compaction(self):
+        BaseLLMClient.configure_encoding(encoding=ResponseEncodings.JSON)
+        system_instruction = self._build_system_instruction()
+
+        self.assertIn(JsonResponseEncoder.get_prompt_description(), system_instruction)
+        self.assertNotIn('"columns"', system_instruction)
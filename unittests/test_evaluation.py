@@ -0,0 +1,164 @@
+import time
+import unittest
+from unittest import mock
+
+from neo4j.exceptions import ServiceUnavailable
+
+from ..src.opti_query.optipy.definitions import DbContext, DbTypes, LlmTypes, OptimizationResponse, OptimizedQuery, VerificationStatus
+from ..src.opti_query.optipy.evaluation import (
+    BenchmarkSettings,
+    IQueryBenchmarker,
+    IQueryVerifier,
+    LoadTestSettings,
+    Neo4jQueryBenchmarker,
+    Neo4jQueryLoadTester,
+    Neo4jQueryVerifier,
+    VerificationSettings,
+)
+from ..src.opti_query.optipy.hanlder import OptiQueryHandler
+from ..src.opti_query.optipy.llm_clients import ChatGPTClient
+from ..src.opti_query.optipy.utils.cypher import CypherUtils
+from ..src.opti_query.optipy.utils.hashing import ResultDigest, ResultHasher
+from ..src.opti_query.optipy.utils.neo4j import Neo4jUtils
+from ..src.opti_query.optipy.utils.plans import ProfileTotals
+
+
+class TestResultHasher(unittest.TestCase):
+    def _digest(self, rows) -> ResultDigest:
+        hasher = ResultHasher(canonicalize=Neo4jQueryVerifier._canonicalize)
+        for row in rows:
+            hasher.add(values=row)
+
+        return hasher.get_digest(columns=["name", "tags"])
+
+    def test_multiset_hash_ignores_order(self):
+        first = self._digest([["a", [1, 2]], ["b", []], ["a", [1, 2]]])
+        second = self._digest([["b", []], ["a", [1, 2]], ["a", [1, 2]]])
+
+        self.assertEqual(first.multiset_hash, second.multiset_hash)
+        self.assertNotEqual(first.ordered_hash, second.ordered_hash)
+
+    def test_multiset_hash_counts_duplicates(self):
+        first = self._digest([["a", []], ["a", []], ["b", []]])
+        second = self._digest([["a", []], ["b", []], ["b", []]])
+
+        self.assertNotEqual(first.multiset_hash, second.multiset_hash)
+
+
+class TestQueryVerifier(unittest.TestCase):
+    def test_compare(self):
+        digest = ResultDigest(columns=["n"], rows=3, ordered_hash="1", multiset_hash="x")
+        reordered = digest.model_copy(update={"ordered_hash": "2"})
+
+        self.assertEqual(Neo4jQueryVerifier.compare(original=digest, candidate=reordered, ordered=False)[0], VerificationStatus.VERIFIED)
+        self.assertEqual(Neo4jQueryVerifier.compare(original=digest, candidate=reordered, ordered=True)[0], VerificationStatus.INCONCLUSIVE)
+        self.assertEqual(Neo4jQueryVerifier.compare(original=digest, candidate=digest.model_copy(update={"rows": 2}), ordered=False)[0], VerificationStatus.MISMATCHED)
+        self.assertEqual(
+            Neo4jQueryVerifier.compare(original=digest, candidate=digest.model_copy(update={"truncated": True}), ordered=False)[0], VerificationStatus.INCONCLUSIVE
+        )
+        self.assertEqual(Neo4jQueryVerifier.compare(original=digest, candidate=ResultDigest(error="SyntaxError"), ordered=False)[0], VerificationStatus.MISMATCHED)
+        self.assertEqual(
+            Neo4jQueryVerifier.compare(original=digest, candidate=ResultDigest(error="timeout", timed_out=True), ordered=False)[0], VerificationStatus.INCONCLUSIVE
+        )
+        self.assertEqual(
+            Neo4jQueryVerifier.compare(original=digest, candidate=ResultDigest(error="ServiceUnavailable", unavailable=True), ordered=False)[0],
+            VerificationStatus.INCONCLUSIVE,
+        )
+        self.assertEqual(
+            Neo4jQueryVerifier.compare(original=digest, candidate=digest.model_copy(update={"columns": ["m"]}), ordered=False)[0], VerificationStatus.MISMATCHED
+        )
+
+    def test_digest_marks_driver_errors_unavailable(self):
+        db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+        with mock.patch.object(Neo4jUtils, "acquire_tx", side_effect=ServiceUnavailable("connection lost")):
+            digest = Neo4jQueryVerifier.digest(db_context=db_context, query="MATCH (n) RETURN n")
+
+        self.assertTrue(digest.unavailable)
+        self.assertIn("ServiceUnavailable", digest.error)
+
+    def test_digest_runs_with_parameters(self):
+        db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+        with mock.patch.object(Neo4jUtils, "acquire_tx") as acquire_tx:
+            tx = acquire_tx.return_value.__enter__.return_value
+            tx.run.return_value.__iter__.return_value = iter([])
+            tx.run.return_value.keys.return_value = ["n"]
+            Neo4jQueryVerifier.digest(db_context=db_context, query="MATCH (n {id: $id}) RETURN n", parameters={"id": 1})
+
+        tx.run.assert_called_once_with("MATCH (n {id: $id}) RETURN n", {"id": 1})
+
+    def test_is_ordered(self):
+        self.assertTrue(CypherUtils.is_ordered(query="MATCH (n) RETURN n.name ORDER BY n.name LIMIT 5"))
+        self.assertFalse(CypherUtils.is_ordered(query="MATCH (n) WITH n ORDER BY n.name RETURN count(n)"))
+        self.assertFalse(CypherUtils.is_ordered(query="MATCH (n) RETURN n.name AS `order by`"))
+
+
+class TestQueryBenchmarker(unittest.TestCase):
+    def setUp(self):
+        self.db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+        self.optimization = OptimizationResponse(optimized_queries_and_explains=[OptimizedQuery(query="candidate", explanation="faster")], suggestions=[])
+
+    def tearDown(self):
+        IQueryBenchmarker.configure(settings=BenchmarkSettings())
+        IQueryVerifier.configure(settings=VerificationSettings())
+
+    def test_benchmark_profiles_with_parameters(self):
+        IQueryBenchmarker.configure(settings=BenchmarkSettings(warmup_runs=1, repetitions=2))
+        with mock.patch.object(
+            Neo4jQueryBenchmarker, "profile", return_value=(1.0, ProfileTotals(db_hits=10, page_cache_hits=5, page_cache_misses=0, rows=1))
+        ) as profile:
+            optimization = Neo4jQueryBenchmarker.benchmark(db_context=self.db_context, query="original", optimization=self.optimization, parameters={"id": 1})
+
+        self.assertEqual(profile.call_count, 6)
+        self.assertTrue(all(call.kwargs["parameters"] == {"id": 1} for call in profile.call_args_list))
+        self.assertEqual(optimization.original_benchmark.runs, 2)
+
+    def test_optimize_query_applies_evaluation_settings(self):
+        benchmark_settings = BenchmarkSettings(warmup_runs=0, repetitions=3, timeout_seconds=5)
+        verification_settings = VerificationSettings(max_rows=10, timeout_seconds=5)
+        verify = mock.patch.object(Neo4jQueryVerifier, "verify", return_value=self.optimization).start()
+        benchmark = mock.patch.object(Neo4jQueryBenchmarker, "benchmark", return_value=self.optimization).start()
+        mock.patch.object(ChatGPTClient, "get_optimization", return_value=self.optimization).start()
+        self.addCleanup(mock.patch.stopall)
+        OptiQueryHandler.optimize_query(
+            db_type=DbTypes.NEO4J,
+            host="bolt://localhost:7687",
+            username="neo4j",
+            password="pass",
+            query="original",
+            database="neo4j",
+            llm_type=LlmTypes.CHATGPT,
+            model_name="gpt-4o-mini",
+            rank_candidates=False,
+            verify=True,
+            benchmark=True,
+            parameters={"id": 1},
+            benchmark_settings=benchmark_settings,
+            verification_settings=verification_settings,
+            api_key="test",
+        )
+
+        self.assertEqual(IQueryBenchmarker._SETTINGS, benchmark_settings)
+        self.assertEqual(IQueryVerifier._SETTINGS, verification_settings)
+        self.assertEqual(verify.call_args.kwargs["parameters"], {"id": 1})
+        self.assertEqual(benchmark.call_args.kwargs["parameters"], {"id": 1})
+
+
+class TestQueryLoadTester(unittest.TestCase):
+    def test_run(self):
+        def execute(*, db_context, query, parameters, timeout):
+            time.sleep(0.002)
+            if query == "candidate" and parameters["id"] == 1:
+                raise ValueError("boom")
+
+        settings = LoadTestSettings(concurrency=4, duration_seconds=0.2, warmup_seconds=0.05)
+        db_context = DbContext(host="bolt://localhost", username="neo4j", password="", database="neo4j")
+        with mock.patch.object(Neo4jQueryLoadTester, "execute", side_effect=execute):
+            report = Neo4jQueryLoadTester.run(
+                db_context=db_context, query="original", candidate_queries=["candidate"], settings=settings, parameter_sets=[{"id": 0}, {"id": 1}]
+            )
+
+        self.assertEqual(report.original.errors, 0)
+        self.assertGreater(report.original.throughput_per_second, 0)
+        self.assertGreaterEqual(report.original.p99_ms, report.original.p50_ms)
+        self.assertAlmostEqual(report.candidates[0].error_rate, 0.5, delta=0.1)
+        self.assertEqual(report.candidates[0].first_error, "ValueError: boom")
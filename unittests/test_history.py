@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from ..src.opti_query.optipy.llm_clients.base import BaseLLMClient
+from ..src.opti_query.optipy.llm_clients.history import ConversationHistory, HistorySettings
+
+
+class TestConversationHistory(unittest.TestCase):
+    def _build_history(self, *, max_prompt_tokens: int) -> ConversationHistory:
+        history = ConversationHistory(
+            system_instruction="system",
+            settings=HistorySettings(max_prompt_tokens=max_prompt_tokens, keep_recent_exchanges=2),
+            parse_reply=lambda text: BaseLLMClient._parse_llm_text(text=text),
+        )
+        history.add_user(content="opening schema")
+        for index in range(6):
+            history.add_assistant(content=json.dumps({"query_type": "NEO4J_LABEL_COUNT_QUERY", "data": {"labels": [f"L{index}"]}}))
+            history.add_user(content=json.dumps({"count": index * 100, "padding": "x" * 2000}))
+
+        return history
+
+    def test_within_budget_keeps_everything(self):
+        history = self._build_history(max_prompt_tokens=100000)
+        messages = history.get_messages()
+
+        self.assertEqual(len(messages), 13)
+        self.assertEqual(history.compacted_exchanges, 0)
+        self.assertEqual(messages[0].content, "opening schema")
+
+    def test_compaction_keeps_opening_and_recent_exchanges(self):
+        history = self._build_history(max_prompt_tokens=2000)
+        messages = history.get_messages()
+
+        self.assertEqual(history.compacted_exchanges, 4)
+        self.assertEqual(len(messages), 5)
+        self.assertTrue(messages[0].content.startswith("opening schema"))
+        self.assertIn(ConversationHistory.LEDGER_HEADER, messages[0].content)
+        self.assertEqual([message.role for message in messages], ["user", "assistant", "user", "assistant", "user"])
+        self.assertIn('"labels":["L4"]', messages[1].content.replace(" ", ""))
+
+    def test_ledger_records_question_and_answer(self):
+        history = self._build_history(max_prompt_tokens=2000)
+        history.get_messages()
+        facts = history.get_facts()
+
+        self.assertEqual(len(facts), 4)
+        self.assertTrue(facts[0].startswith('{"query_type":"NEO4J_LABEL_COUNT_QUERY","data":{"labels":["L0"]}} => {"count": 0'))
+        self.assertTrue(facts[0].endswith("…"))
+        self.assertLessEqual(history.get_prompt_tokens(), 2000)
@@ -0,0 +1,330 @@
+import asyncio
+import json
+import time
+import typing
+import unittest
+from types import SimpleNamespace
+
+from ..src.opti_query.optipy.definitions import DB_TYPE_TO_SYSTEM_INSTRUCTIONS, DbContext, DbTypes, MultiQuestionRequest
+from ..src.opti_query.optipy.exceptions import DbQueryFailed, OutOfSchemaRequest
+from ..src.opti_query.optipy.llm_clients import AsyncChatGPTClient, ChatGPTClient, GeminiClient
+from ..src.opti_query.optipy.llm_clients.base import BaseLLMClient
+from ..src.opti_query.optipy.llm_clients.prompt_cache import PromptCacheSettings
+from ..src.opti_query.optipy.llm_clients.schema import ResponseSchemaBuilder
+from ..src.opti_query.optipy.llm_clients.streaming import JsonStreamScanner
+
+
+class TestChatGPTPromptCache(unittest.TestCase):
+    def _build_client(self) -> ChatGPTClient:
+        client = ChatGPTClient(system_instruction=DB_TYPE_TO_SYSTEM_INSTRUCTIONS[DbTypes.NEO4J], model_name="gpt-4o-mini", api_key="test")
+        client._on_session_start(db_type=DbTypes.NEO4J)
+        client._start_session_report()
+        client._start_history()
+        return client
+
+    def test_requests_share_a_stable_prefix(self):
+        first = self._build_client()
+        second = self._build_client()
+        first_kwargs = first._build_completion_kwargs(messages=first._build_prompt(msg="opening"))
+        second_kwargs = second._build_completion_kwargs(messages=second._build_prompt(msg="opening"))
+
+        self.assertEqual(first_kwargs["prompt_cache_key"], second_kwargs["prompt_cache_key"])
+        self.assertEqual(first_kwargs["messages"], second_kwargs["messages"])
+        self.assertEqual(first_kwargs["messages"][0]["role"], "system")
+
+    def test_records_cached_tokens(self):
+        client = self._build_client()
+        client._encode_message(msg="opening")
+        client._build_prompt(msg="opening")
+        usage = SimpleNamespace(prompt_tokens=5000, prompt_tokens_details=SimpleNamespace(cached_tokens=4096))
+        client._read_chunk(chunk=SimpleNamespace(choices=[], usage=usage), scanner=JsonStreamScanner())
+        report = client.get_session_report()
+
+        self.assertEqual(report.cached_prompt_tokens, 4096)
+        self.assertEqual(report.uncached_prompt_tokens, 904)
+
+
+class _FakeStream:
+    def __init__(self, *, deltas):
+        self.consumed = 0
+        self.closed = False
+        self._deltas = deltas
+
+    def __iter__(self):
+        for delta in self._deltas:
+            self.consumed += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))], usage=None)
+
+    def close(self):
+        self.closed = True
+
+
+class TestChatGPTStreaming(unittest.TestCase):
+    def test_stops_after_first_object(self):
+        client = ChatGPTClient(system_instruction="system", model_name="gpt-4o-mini", api_key="test")
+        client._on_session_start(db_type=DbTypes.NEO4J)
+        client._start_session_report()
+        client._start_history()
+        stream = _FakeStream(deltas=['{"query_type": ', '"NEO4J_EXPLAIN_QUERY", "data": {"query": "MATCH (n) RETURN n"}}', "\n\nLet me know", " if you need more."])
+        requests = []
+        client._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: requests.append(kwargs) or stream)))
+
+        client._encode_message(msg="opening")
+        text = client._send_text(msg="opening")
+
+        self.assertEqual(text, '{"query_type": "NEO4J_EXPLAIN_QUERY", "data": {"query": "MATCH (n) RETURN n"}}')
+        self.assertTrue(requests[0]["stream"])
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.consumed, 2)
+        self.assertEqual(client.get_session_report().turns[0].early_stops, 1)
+        self.assertIsNone(client.get_session_report().turns[0].provider_prompt_tokens)
+        self.assertEqual(client.get_session_report().unknown_usage_turns, 1)
+        self.assertEqual(client._parse_llm_text(text=text)["query_type"], "NEO4J_EXPLAIN_QUERY")
+
+
+class TestJsonStreamScanner(unittest.TestCase):
+    def test_detects_first_object_across_chunks(self):
+        scanner = JsonStreamScanner()
+        chunks = ['```json\n{"query_type": "NEO4J_EXPLAIN', '_QUERY", "data": {"query": "RETURN \\"}\\" AS x", ', '"list": [1, {"a": 2}]}}', "\n```\nHope this helps {!}"]
+        results = [scanner.feed(chunk=chunk) for chunk in chunks]
+
+        self.assertEqual(results[:2], [None, None])
+        self.assertEqual(results[2], '{"query_type": "NEO4J_EXPLAIN_QUERY", "data": {"query": "RETURN \\"}\\" AS x", "list": [1, {"a": 2}]}}')
+        self.assertEqual(scanner.get_text(), results[2])
+
+    def test_incomplete_object_returns_raw_text(self):
+        scanner = JsonStreamScanner()
+        scanner.feed(chunk='no json {"a": ')
+
+        self.assertIsNone(scanner.result)
+        self.assertEqual(scanner.get_text(), 'no json {"a": ')
+
+
+class _FakeGeminiStream:
+    def __init__(self, *, chunks):
+        self.cancelled = False
+        self._chunks = chunks
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _FakeGeminiResponse:
+    def __init__(self, *, chunks):
+        self._iterator = _FakeGeminiStream(chunks=[SimpleNamespace(text=chunk) for chunk in chunks])
+        # The SDK keeps the usage of the chunks read so far, which undercounts a stopped stream.
+        self.usage_metadata = SimpleNamespace(prompt_token_count=100, cached_content_token_count=0)
+
+    def __iter__(self):
+        return iter(self._iterator)
+
+
+class _FakeChatSession:
+    def __init__(self, *, replies):
+        self._replies = replies
+        self.history = []
+        self.responses = []
+
+    def rewind(self):
+        return None, None
+
+    def send_message(self, msg, *, stream):
+        self.responses.append(_FakeGeminiResponse(chunks=self._replies.pop(0)))
+        return self.responses[-1]
+
+
+class TestGeminiChatSession(unittest.TestCase):
+    def setUp(self):
+        BaseLLMClient.configure_prompt_cache(settings=PromptCacheSettings(enabled=False))
+
+    def tearDown(self):
+        BaseLLMClient.configure_prompt_cache(settings=PromptCacheSettings())
+
+    def test_session_is_reused_across_turns(self):
+        client = GeminiClient(system_instruction="system", model_name="gemini-test", api_key="test")
+        client._on_session_start(db_type=DbTypes.NEO4J)
+        client._start_session_report()
+        client._start_history()
+        session = _FakeChatSession(replies=[['{"a": ', "1} trailing"], ['{"b": 2}']])
+        start_chat_calls = []
+        client._model = SimpleNamespace(start_chat=lambda history: start_chat_calls.append(history) or session)
+
+        client._encode_message(msg="opening")
+        self.assertEqual(client._send_text(msg="opening"), '{"a": 1}')
+        client._encode_message(msg="answer")
+        self.assertEqual(client._send_text(msg="answer"), '{"b": 2}')
+
+        self.assertEqual(start_chat_calls, [[]])
+        self.assertEqual([content.parts[0].text for content in session.history], ["opening", '{"a": 1}', "answer", '{"b": 2}'])
+        self.assertGreaterEqual(client.get_session_report().turns[0].llm_seconds, 0.0)
+        self.assertIsNotNone(client.get_session_report().turns[1].first_chunk_seconds)
+        self.assertTrue(all(response._iterator.cancelled for response in session.responses))
+        self.assertEqual(client.get_session_report().unknown_usage_turns, 2)
+        self.assertIsNone(client.get_session_report().turns[0].provider_prompt_tokens)
+
+    def test_session_is_rebuilt_when_the_stream_cannot_be_stopped(self):
+        client = GeminiClient(system_instruction="system", model_name="gemini-test", api_key="test")
+        client._on_session_start(db_type=DbTypes.NEO4J)
+        client._start_session_report()
+        client._start_history()
+        sessions = [_FakeChatSession(replies=[['{"a": 1} trailing']]), _FakeChatSession(replies=[['{"b": 2}']])]
+        for session in sessions:
+            # Simulate an SDK release that no longer keeps the transport stream in response._iterator.
+            session.send_message = lambda msg, *, stream, session=session: iter([SimpleNamespace(text=chunk) for chunk in session._replies.pop(0)])
+
+        start_chat_calls = []
+        client._model = SimpleNamespace(start_chat=lambda history: start_chat_calls.append(history) or sessions[len(start_chat_calls) - 1])
+
+        client._encode_message(msg="opening")
+        self.assertEqual(client._send_text(msg="opening"), '{"a": 1}')
+        client._encode_message(msg="answer")
+        self.assertEqual(client._send_text(msg="answer"), '{"b": 2}')
+
+        self.assertEqual(len(start_chat_calls), 2)
+        self.assertEqual([content["parts"][0] for content in start_chat_calls[1]], ["opening", '{"a": 1}'])
+        self.assertEqual(client.get_session_report().turns[0].early_stops, 1)
+
+
+def _build_count_question(*, label: str) -> dict:
+    return {"query_type": "NEO4J_COUNT_NODES_WITH_LABELS", "data": {"labels": [label]}}
+
+
+class TestMultiQuestion(unittest.TestCase):
+    def setUp(self):
+        self.db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+        self.active = 0
+        self.max_active = 0
+
+    def _answer(self, *, query_runner) -> str:
+        label = query_runner.labels[0]
+        if label == "FAILING":
+            raise DbQueryFailed(reason="database is down")
+
+        return json.dumps({"label": label})
+
+    def _build_sync_client(self) -> ChatGPTClient:
+        client = ChatGPTClient(system_instruction="system", model_name="gpt-4o-mini", api_key="test")
+
+        def run_db_request(*, query_runner, db_context):
+            # The first question finishes last, so answers must follow the question order, not completion order.
+            time.sleep(0.05 if query_runner.labels[0] == "Slow" else 0)
+            return self._answer(query_runner=query_runner)
+
+        client._run_db_request = run_db_request
+        return client
+
+    def _build_async_client(self) -> AsyncChatGPTClient:
+        client = AsyncChatGPTClient(system_instruction="system", model_name="gpt-4o-mini", api_key="test")
+
+        async def run_db_request(*, query_runner, db_context):
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                await asyncio.sleep(0.05 if query_runner.labels[0] == "Slow" else 0.01)
+                return self._answer(query_runner=query_runner)
+
+            finally:
+                self.active -= 1
+
+        client._run_db_request = run_db_request
+        return client
+
+    def test_answers_keep_question_order(self):
+        questions = [_build_count_question(label="Slow"), _build_count_question(label="Person"), _build_count_question(label="Movie")]
+        answer = json.loads(self._build_sync_client()._answer_questions(questions=questions, db_context=self.db_context))
+
+        self.assertEqual([item["question"] for item in answer], questions)
+        self.assertEqual([item["answer"] for item in answer], [{"label": "Slow"}, {"label": "Person"}, {"label": "Movie"}])
+
+    def test_failed_question_does_not_fail_the_others(self):
+        questions = [_build_count_question(label="Person"), _build_count_question(label="FAILING"), {"query_type": "UNKNOWN", "data": {}}]
+        answer = json.loads(self._build_sync_client()._answer_questions(questions=questions, db_context=self.db_context))
+
+        self.assertEqual(answer[0]["answer"], {"label": "Person"})
+        self.assertEqual(answer[1]["answer"], "database is down")
+        self.assertEqual(answer[2]["answer"], "UNKNOWN is not a valid query type.")
+
+    def test_questions_must_be_a_non_empty_list_of_at_most_ten(self):
+        with self.assertRaises(OutOfSchemaRequest) as empty:
+            BaseLLMClient._build_llm_request(msg_from_llm={"query_type": "MULTI_QUESTION", "data": {"questions": []}})
+
+        questions = [_build_count_question(label=f"Label{index}") for index in range(MultiQuestionRequest.MAX_QUESTIONS + 1)]
+        with self.assertRaises(OutOfSchemaRequest) as too_many:
+            BaseLLMClient._build_llm_request(msg_from_llm={"query_type": "MULTI_QUESTION", "data": {"questions": questions}})
+
+        self.assertIn("must be a non empty list", empty.exception.reason)
+        self.assertIn("at most 10 questions", too_many.exception.reason)
+
+        request = BaseLLMClient._build_llm_request(msg_from_llm={"query_type": "MULTI_QUESTION", "data": {"questions": questions[:-1]}})
+        self.assertIsInstance(request, MultiQuestionRequest)
+
+    def test_async_questions_are_gathered_in_order_with_bounded_concurrency(self):
+        questions = [_build_count_question(label="Slow")] + [_build_count_question(label=f"Label{index}") for index in range(8)]
+        questions.append(_build_count_question(label="FAILING"))
+        client = self._build_async_client()
+        answer = json.loads(asyncio.run(client._answer_questions(questions=questions, db_context=self.db_context)))
+
+        self.assertEqual([item["question"] for item in answer], questions)
+        self.assertEqual(answer[0]["answer"], {"label": "Slow"})
+        self.assertEqual(answer[-1]["answer"], "database is down")
+        self.assertEqual(self.max_active, client.MAX_PARALLEL_QUESTIONS)
+
+
+def _collect_schema_keys(*, schema: typing.Any) -> typing.Set[str]:
+    if isinstance(schema, list):
+        return set().union(*(_collect_schema_keys(schema=item) for item in schema))
+
+    if not isinstance(schema, dict):
+        return set()
+
+    keys = set()
+    for key, value in schema.items():
+        # Keys under "properties" are field names, not schema keywords.
+        if key == "properties":
+            keys.add(key)
+            keys |= set().union(*(_collect_schema_keys(schema=prop) for prop in value.values()))
+
+        else:
+            keys.add(key)
+            keys |= _collect_schema_keys(schema=value)
+
+    return keys
+
+
+class TestResponseSchemaBuilder(unittest.TestCase):
+    def test_json_schema_lists_every_request_without_defaults(self):
+        schema = ResponseSchemaBuilder.build_json_schema(db_type=DbTypes.NEO4J)
+        data_schemas = schema["properties"]["data"]["anyOf"]
+        schema_details = data_schemas[schema["properties"]["query_type"]["enum"].index("NEO4J_SCHEMA_DETAILS")]
+
+        self.assertEqual(schema["properties"]["query_type"]["enum"][-2:], ["MULTI_QUESTION", "OPTIMIZE_FINISHED"])
+        self.assertEqual(len(data_schemas), len(schema["properties"]["query_type"]["enum"]))
+        self.assertEqual(schema_details["properties"]["labels"], {"items": {"type": "string"}, "type": "array"})
+        self.assertNotIn("default", _collect_schema_keys(schema=schema))
+        self.assertNotIn("title", _collect_schema_keys(schema=schema))
+
+    def test_flat_schema_uses_only_gemini_keys(self):
+        schema = ResponseSchemaBuilder.build_flat_schema(db_type=DbTypes.NEO4J)
+        data = schema["properties"]["data"]
+        question_data = data["properties"]["questions"]["items"]["properties"]["data"]
+
+        self.assertLessEqual(_collect_schema_keys(schema=schema), set(ResponseSchemaBuilder.FLAT_SCHEMA_KEYS))
+        self.assertEqual(schema["required"], ["query_type", "data"])
+        self.assertIn("required", data)
+        self.assertIn("required", question_data)
+        self.assertEqual(data["properties"]["optimized_queries_and_explains"]["items"]["required"], ["query", "explanation"])
+        self.assertEqual(data["properties"]["properties"], {"items": {"type": "string"}, "type": "array", "nullable": True})
+
+    def test_merged_data_requires_keys_shared_by_every_request(self):
+        merged = ResponseSchemaBuilder._merge_object_schemas(
+            schemas=[
+                {"type": "object", "properties": {"labels": {"type": "array"}, "rel_type": {"type": "string"}}, "required": ["labels", "rel_type"]},
+                {"type": "object", "properties": {"labels": {"type": "array"}}, "required": ["labels"]},
+            ]
+        )
+
+        self.assertEqual(merged["required"], ["labels"])
+        self.assertEqual(set(merged["properties"]), {"labels", "rel_type"})
@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from ..src.opti_query.optipy.definitions import DbContext
+from ..src.opti_query.optipy.utils import neo4j as neo4j_utils
+from ..src.opti_query.optipy.utils.neo4j import Neo4jPoolSettings, Neo4jUtils
+
+
+class TestNeo4jDrivers(unittest.TestCase):
+    def setUp(self):
+        self.db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+        Neo4jUtils.configure_pool(settings=Neo4jPoolSettings(verify_connectivity=False))
+
+    def tearDown(self):
+        Neo4jUtils._DRIVERS.clear()
+        Neo4jUtils._ASYNC_DRIVERS.clear()
+        Neo4jUtils._POOL_SETTINGS = Neo4jPoolSettings()
+
+    def test_driver_is_reused(self):
+        with mock.patch.object(neo4j_utils.GraphDatabase, "driver") as driver_factory:
+            first = Neo4jUtils.get_driver(db_context=self.db_context)
+            second = Neo4jUtils.get_driver(db_context=self.db_context)
+
+        self.assertIs(first, second)
+        self.assertEqual(driver_factory.call_count, 1)
+
+    def test_pool_settings_are_passed_to_driver(self):
+        Neo4jUtils.configure_pool(settings=Neo4jPoolSettings(max_connection_pool_size=7, connection_acquisition_timeout=5.0, verify_connectivity=False))
+        with mock.patch.object(neo4j_utils.GraphDatabase, "driver") as driver_factory:
+            Neo4jUtils.get_driver(db_context=self.db_context)
+
+        kwargs = driver_factory.call_args.kwargs
+        self.assertEqual(kwargs["auth"], ("neo4j", "pass"))
+        self.assertEqual(kwargs["max_connection_pool_size"], 7)
+        self.assertEqual(kwargs["connection_acquisition_timeout"], 5.0)
+
+    def test_new_pool_settings_replace_cached_drivers(self):
+        with mock.patch.object(neo4j_utils.GraphDatabase, "driver", side_effect=lambda *args, **kwargs: mock.Mock()) as driver_factory:
+            old_driver = Neo4jUtils.get_driver(db_context=self.db_context)
+            Neo4jUtils.configure_pool(settings=Neo4jPoolSettings(max_connection_pool_size=7, verify_connectivity=False))
+            new_driver = Neo4jUtils.get_driver(db_context=self.db_context)
+
+        old_driver.close.assert_called_once()
+        self.assertIsNot(old_driver, new_driver)
+        self.assertEqual(driver_factory.call_args.kwargs["max_connection_pool_size"], 7)
+
+    def test_async_driver_is_reused_per_loop(self):
+        async def get_drivers():
+            return await Neo4jUtils.get_async_driver(db_context=self.db_context), await Neo4jUtils.get_async_driver(db_context=self.db_context)
+
+        with mock.patch.object(neo4j_utils.AsyncGraphDatabase, "driver", side_effect=lambda *args, **kwargs: mock.AsyncMock()) as driver_factory:
+            first, second = asyncio.run(get_drivers())
+            asyncio.run(get_drivers())
+
+        self.assertIs(first, second)
+        self.assertEqual(driver_factory.call_count, 2)
+        self.assertEqual(len(Neo4jUtils._ASYNC_DRIVERS), 1)
+
+    def test_open_async_drivers_block_pool_changes_and_close_at_exit(self):
+        loop = asyncio.new_event_loop()
+        try:
+            with mock.patch.object(neo4j_utils.AsyncGraphDatabase, "driver", return_value=mock.AsyncMock()):
+                driver = loop.run_until_complete(Neo4jUtils.get_async_driver(db_context=self.db_context))
+
+            with self.assertRaises(RuntimeError):
+                Neo4jUtils.configure_pool(settings=Neo4jPoolSettings(max_connection_pool_size=7))
+
+            Neo4jUtils.close_all()
+
+        finally:
+            loop.close()
+
+        driver.close.assert_awaited_once()
+        self.assertEqual(Neo4jUtils._ASYNC_DRIVERS, {})
@@ -0,0 +1,100 @@
+import unittest
+
+from ..src.opti_query.optipy.definitions import OptimizationResponse, OptimizedQuery, QueryBenchmark
+from ..src.opti_query.optipy.evaluation import Neo4jQueryRanker, Neo4jQueryBenchmarker
+from ..src.opti_query.optipy.utils.plans import PlanAnalyzer
+
+
+class TestPlanAnalyzer(unittest.TestCase):
+    PLAN = {
+        "operatorType": "ProduceResults@neo4j",
+        "identifiers": ["m", "p"],
+        "args": {"EstimatedRows": 10.0, "planner": "COST", "runtime": "PIPELINED", "Details": "p, m"},
+        "children": [
+            {
+                "operatorType": "CartesianProduct@neo4j",
+                "identifiers": ["m", "p"],
+                "args": {"EstimatedRows": 10.0},
+                "children": [
+                    {
+                        "operatorType": "NodeIndexSeek@neo4j",
+                        "identifiers": ["p"],
+                        "args": {"EstimatedRows": 1.0, "Details": "RANGE INDEX p:Person(name) WHERE name = $name"},
+                        "children": [],
+                    },
+                    {"operatorType": "NodeByLabelScan@neo4j", "identifiers": ["m"], "args": {"EstimatedRows": 10.0, "Details": "m:Movie"}, "children": []},
+                ],
+            }
+        ],
+    }
+
+    def test_summarize(self):
+        summary = PlanAnalyzer.summarize(plan=self.PLAN)
+
+        self.assertEqual(summary.estimated_result_rows, 10.0)
+        self.assertEqual(summary.total_estimated_rows, 31.0)
+        self.assertEqual(summary.scans, ["NodeByLabelScan(m:Movie)"])
+        self.assertEqual(summary.seeks, ["NodeIndexSeek(RANGE INDEX p:Person(name) WHERE name = $name)"])
+        self.assertEqual(summary.index_usage, summary.seeks)
+        self.assertEqual(summary.cartesian_products, 1)
+        self.assertEqual([operator.depth for operator in summary.operators], [0, 1, 2, 2])
+
+    def test_profile_totals(self):
+        profile = {
+            "dbHits": 2,
+            "rows": 3,
+            "pageCacheHits": 5,
+            "pageCacheMisses": 0,
+            "children": [{"dbHits": 40, "rows": 40, "pageCacheHits": 7, "pageCacheMisses": 1, "children": []}],
+        }
+        totals = PlanAnalyzer.get_profile_totals(profile=profile)
+
+        self.assertEqual((totals.db_hits, totals.page_cache_hits, totals.page_cache_misses, totals.rows), (42, 12, 1, 3))
+
+    def test_fingerprint_ignores_estimates(self):
+        changed = {**self.PLAN, "args": {**self.PLAN["args"], "EstimatedRows": 99.0}}
+        self.assertEqual(PlanAnalyzer.fingerprint(plan=self.PLAN), PlanAnalyzer.fingerprint(plan=changed))
+        self.assertNotEqual(PlanAnalyzer.fingerprint(plan=self.PLAN), PlanAnalyzer.fingerprint(plan=self.PLAN["children"][0]))
+
+    def test_estimate_cost_prefers_seeks(self):
+        self.assertEqual(PlanAnalyzer.estimate_cost(plan=self.PLAN), 10.0 + 3.0 * 10.0 + 0.1 * 1.0 + 10.0)
+        seek_only = {**self.PLAN, "children": [self.PLAN["children"][0]["children"][0]]}
+        self.assertLess(PlanAnalyzer.estimate_cost(plan=seek_only), PlanAnalyzer.estimate_cost(plan=self.PLAN))
+
+
+class TestQueryRanker(unittest.TestCase):
+    def test_apply_costs(self):
+        optimization = OptimizationResponse(
+            optimized_queries_and_explains=[
+                OptimizedQuery(query="slow", explanation=""),
+                OptimizedQuery(query="broken", explanation=""),
+                OptimizedQuery(query="fast", explanation=""),
+            ],
+            suggestions=[],
+        )
+
+        ranked = Neo4jQueryRanker._apply_costs(optimization=optimization, costs=[100.0, 150.0, ValueError("bad"), 20.0])
+
+        self.assertEqual(ranked.original_estimated_cost, 100.0)
+        self.assertEqual([candidate.query for candidate in ranked.optimized_queries_and_explains], ["fast", "slow", "broken"])
+        self.assertEqual([candidate.slower_than_original for candidate in ranked.optimized_queries_and_explains], [False, True, None])
+        self.assertEqual(ranked.optimized_queries_and_explains[2].evaluation_error, "ValueError: bad")
+
+
+class TestQueryBenchmarker(unittest.TestCase):
+    def test_apply_benchmarks(self):
+        optimization = OptimizationResponse(
+            optimized_queries_and_explains=[OptimizedQuery(query="fast", explanation=""), OptimizedQuery(query="same", explanation="")],
+            suggestions=[],
+        )
+        original = QueryBenchmark(latencies_ms=[float(value) for value in range(100, 110)])
+        fast = QueryBenchmark(latencies_ms=[float(value) for value in range(10, 20)])
+        same = QueryBenchmark(latencies_ms=[float(value) for value in range(101, 111)])
+
+        result = Neo4jQueryBenchmarker._apply_benchmarks(optimization=optimization, benchmarks=[original, fast, same])
+
+        self.assertEqual(result.original_benchmark.p50_ms, 104.5)
+        self.assertTrue(result.optimized_queries_and_explains[0].significantly_faster)
+        self.assertLess(result.optimized_queries_and_explains[0].benchmark_p_value, 0.001)
+        self.assertFalse(result.optimized_queries_and_explains[1].significantly_faster)
+        self.assertEqual(result.benchmark_winner, "fast")
@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+
+from ..src.opti_query.optipy.caching import AnswerCache
+from ..src.opti_query.optipy.definitions import DbContext
+from ..src.opti_query.optipy.prefetch import Neo4jQueryPrefetcher
+from ..src.opti_query.optipy.queries import Neo4jLabelCountQueryRunner, Neo4jPropertiesForLabelsRunner, Neo4jRelBetweenLabelsCountQueryRunner
+
+
+class TestNeo4jQueryPrefetcher(unittest.TestCase):
+    QUERY = "MATCH (p:Person {name: 'x'})-[:ACTED_IN]->(m:Movie) WHERE m.title = $title RETURN p"
+    OPENING_RESPONSE = {
+        "node_count": [{"Person": 10}, {"Movie": 5}],
+        "relationship_count": [{"()-[:ACTED_IN]->()": 20}, {"(:Person)-[:ACTED_IN]->()": 20}, {"()-[:ACTED_IN]->(:Movie)": 20}],
+        "indexes": [{"label": "Film", "property": "title"}],
+    }
+
+    def setUp(self):
+        AnswerCache.clear()
+        self.db_context = DbContext(host="bolt://localhost:7687", username="neo4j", password="pass", database="neo4j")
+
+    def tearDown(self):
+        AnswerCache.clear()
+
+    def test_build_query_runners(self):
+        prefetcher = Neo4jQueryPrefetcher(db_context=self.db_context)
+        keys = [runner.get_cache_key() for runner in prefetcher.build_query_runners(query=self.QUERY, opening_response=self.OPENING_RESPONSE)]
+
+        self.assertIn(Neo4jLabelCountQueryRunner(labels=["Person"]).get_cache_key(), keys)
+        self.assertIn(Neo4jLabelCountQueryRunner(labels=["Person", "Movie"]).get_cache_key(), keys)
+        self.assertIn(Neo4jLabelCountQueryRunner(labels=["Movie", "Film"]).get_cache_key(), keys)
+        self.assertIn(Neo4jRelBetweenLabelsCountQueryRunner(from_node_labels=["Person"], to_node_labels=["Movie"], rel_type="ACTED_IN").get_cache_key(), keys)
+        self.assertIn(Neo4jPropertiesForLabelsRunner(labels=["Movie"]).get_cache_key(), keys)
+
+    def test_unknown_rel_type_is_skipped(self):
+        prefetcher = Neo4jQueryPrefetcher(db_context=self.db_context)
+        query = "MATCH (p:Person)-[:DIRECTED]->(m:Movie) RETURN p"
+        keys = [runner.get_cache_key() for runner in prefetcher.build_query_runners(query=query, opening_response=self.OPENING_RESPONSE)]
+
+        self.assertNotIn(Neo4jRelBetweenLabelsCountQueryRunner(from_node_labels=["Person"], to_node_labels=["Movie"], rel_type="DIRECTED").get_cache_key(), keys)
+
+    def test_metrics(self):
+        prefetcher = Neo4jQueryPrefetcher(db_context=self.db_context)
+        with (
+            mock.patch.object(Neo4jLabelCountQueryRunner, "get_parsed_response", return_value="1"),
+            mock.patch.object(Neo4jRelBetweenLabelsCountQueryRunner, "get_parsed_response", return_value="1"),
+            mock.patch.object(Neo4jPropertiesForLabelsRunner, "get_parsed_response", return_value="{}"),
+        ):
+            prefetcher.start(query=self.QUERY, opening_response=self.OPENING_RESPONSE)
+            for future in prefetcher._futures:
+                future.result()
+
+        prefetcher.record_request(key=Neo4jLabelCountQueryRunner(labels=["Person"]).get_cache_key())
+        prefetcher.record_request(key=Neo4jLabelCountQueryRunner(labels=["Unknown"]).get_cache_key())
+
+        metrics = prefetcher.get_metrics()
+        self.assertEqual((metrics.requested, metrics.used), (2, 1))
+        self.assertEqual(metrics.hit_rate, 0.5)
+        self.assertTrue(AnswerCache.contains(db_context=self.db_context, key=Neo4jLabelCountQueryRunner(labels=["Person"]).get_cache_key()))
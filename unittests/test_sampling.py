@@ -0,0 +1,199 @@
+import json
+import re
+import typing
+import unittest
+
+from ..src.opti_query.optipy.queries import Neo4jPropertySelectivityRunner, Neo4jLabelCountQueryRunner, Neo4jRelBetweenLabelsCountQueryRunner
+from ..src.opti_query.optipy.exceptions import DbQueryFailed
+from ..src.opti_query.optipy.queries.neo4j import Neo4jCountQueryRunner, Neo4jCountSettings, Neo4jDegreeDistributionRunner
+from ..src.opti_query.optipy.utils.sampling import SamplingUtils
+
+
+class TestSamplingUtils(unittest.TestCase):
+    def test_wilson_interval_contains_ratio(self):
+        low, high = SamplingUtils.wilson_interval(successes=30, total=100)
+        self.assertLess(low, 0.3)
+        self.assertGreater(high, 0.3)
+        self.assertAlmostEqual(low, 0.2189, places=3)
+        self.assertAlmostEqual(high, 0.3958, places=3)
+
+    def test_wilson_interval_full_population_is_exact(self):
+        self.assertEqual(SamplingUtils.wilson_interval(successes=3, total=4, population=4), (0.75, 0.75))
+
+    def test_wilson_interval_empty_sample(self):
+        self.assertEqual(SamplingUtils.wilson_interval(successes=0, total=0), (0.0, 1.0))
+
+    def test_build_sample_query_uses_label_intersection_population(self):
+        query = SamplingUtils.build_sample_query(labels=["Person", "Director"], sample_size=100)
+        self.assertIn("MATCH (node:Person:Director) RETURN count(node) AS population", query)
+        self.assertIn("MATCH (n:Person:Director)", query)
+        self.assertNotIn("min(", query)
+        self.assertIn("LIMIT 100", query)
+
+    def test_small_label_intersection_is_sampled_exactly(self):
+        # 1000 Person and 800 Director nodes, only 10 of them carry both labels.
+        nodes = [{"Person"}] * 990 + [{"Director"}] * 790 + [{"Person", "Director"}] * 10
+        query = SamplingUtils.build_sample_query(labels=["Person", "Director"], sample_size=100)
+        population_labels = set(re.search(r"MATCH \(node:([^)]+)\) RETURN count\(node\) AS population", query).group(1).split(":"))
+        sampled_labels = set(re.search(r"MATCH \(n:([^)]+)\)", query).group(1).split(":"))
+        population = sum(1 for node_labels in nodes if population_labels <= node_labels)
+        matched = sum(1 for node_labels in nodes if sampled_labels <= node_labels)
+
+        self.assertEqual(population, 10)
+        self.assertEqual(matched, population)
+        self.assertEqual(SamplingUtils.wilson_interval(successes=4, total=matched, population=population), (0.4, 0.4))
+
+
+class TestNeo4jPropertySelectivityRunner(unittest.TestCase):
+    def test_parse_results(self):
+        runner = Neo4jPropertySelectivityRunner(labels=["Person"], properties=["age", "nickname"])
+        profiles = [
+            {
+                "population": 1000,
+                "total": 100,
+                "key": "age",
+                "present": 80,
+                "distinct_values": 40,
+                "singletons": 20,
+                "most_common": [{"value": 30, "frequency": 8}],
+                "bounds": [1, 50, 99],
+            }
+        ]
+        stats = json.loads(runner._parse_results(results=[profiles]))
+
+        self.assertEqual(stats["age"]["existence_rate"], "80.0%")
+        self.assertEqual(stats["age"]["most_common_values"], [{"value": 30, "percentage": "10.0%"}])
+        self.assertEqual(stats["age"]["histogram"]["bounds"], [1, 50, 99])
+        self.assertEqual(stats["nickname"], {"existence_rate": "0.0%"})
+
+    def test_histogram_shares_the_sample(self):
+        queries = Neo4jPropertySelectivityRunner(labels=["Person"], properties=["age"]).build_queries()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(queries[0].count("rand()"), 1)
+
+    def test_histogram_buckets_are_part_of_cache_key(self):
+        runner = Neo4jPropertySelectivityRunner(labels=["Person"], properties=["age"])
+        key = runner.get_cache_key()
+        histogram_buckets = Neo4jPropertySelectivityRunner.HISTOGRAM_BUCKETS
+        try:
+            Neo4jPropertySelectivityRunner.configure(sample_size=Neo4jPropertySelectivityRunner.SAMPLE_SIZE, histogram_buckets=histogram_buckets + 1)
+            self.assertNotEqual(runner.get_cache_key(), key)
+
+        finally:
+            Neo4jPropertySelectivityRunner.configure(sample_size=Neo4jPropertySelectivityRunner.SAMPLE_SIZE, histogram_buckets=histogram_buckets)
+
+    def test_estimate_distinct(self):
+        profile = {"population": 10000, "total": 100, "present": 100, "distinct_values": 60, "singletons": 50}
+        self.assertEqual(Neo4jPropertySelectivityRunner._estimate_distinct(profile=profile), 510)
+
+        profile = dict(profile, population=100)
+        self.assertEqual(Neo4jPropertySelectivityRunner._estimate_distinct(profile=profile), 60)
+
+
+class TestNeo4jDegreeDistributionRunner(unittest.TestCase):
+    DISTRIBUTION = {
+        "population": 120000,
+        "total": 5000,
+        "out_avg": 3.214,
+        "out_p50": 2,
+        "out_p99": 40,
+        "out_max": 310,
+        "in_avg": 0.4,
+        "in_p50": 0,
+        "in_p99": 6,
+        "in_max": 18,
+        "supernodes": [
+            {"element_id": "4:x:1", "labels": ["Person"], "out_degree": 310, "in_degree": 2},
+            {"element_id": "4:x:2", "labels": ["Person"], "out_degree": 0, "in_degree": 0},
+        ],
+    }
+
+    def test_top_supernodes_are_queried_over_the_whole_label(self):
+        runner = Neo4jDegreeDistributionRunner(labels=["Person", "Actor"], rel_type="KNOWS")
+        top_query = runner.build_queries()[1]
+
+        self.assertIn("MATCH (n:Person:Actor)", top_query)
+        self.assertIn(f"LIMIT {runner.TOP_SUPERNODES}", top_query)
+        self.assertNotIn("rand()", top_query)
+
+    def test_parse_results_uses_population_supernodes(self):
+        runner = Neo4jDegreeDistributionRunner(labels=["Person"], rel_type="KNOWS")
+        supernodes = [{"element_id": "4:x:9", "labels": ["Person"], "out_degree": 90000, "in_degree": 1}]
+        response = json.loads(runner._parse_results(results=[[self.DISTRIBUTION], supernodes]))
+
+        self.assertEqual(response["sampled_nodes"], 5000)
+        self.assertEqual(response["population"], 120000)
+        self.assertEqual(response["out_degree"], {"avg": 3.21, "p50": 2, "p99": 40, "max": 310})
+        self.assertEqual(response["top_supernodes"], supernodes)
+        self.assertEqual(response["top_supernodes_source"], "population")
+
+    def test_failed_supernode_scan_falls_back_to_sample_maxima(self):
+        runner = Neo4jDegreeDistributionRunner(labels=["Person"], rel_type="KNOWS")
+        response = json.loads(runner._parse_results(results=[[self.DISTRIBUTION], DbQueryFailed(reason="timeout")]))
+
+        self.assertEqual(response["top_supernodes"], self.DISTRIBUTION["supernodes"][:1])
+        self.assertEqual(response["top_supernodes_source"], "sample")
+
+    def test_empty_sample(self):
+        runner = Neo4jDegreeDistributionRunner(labels=["Person"], rel_type="KNOWS")
+        self.assertEqual(json.loads(runner._parse_results(results=[[], []])), {"sampled_nodes": 0})
+
+
+class TestNeo4jCountQueryRunner(unittest.TestCase):
+    def tearDown(self):
+        Neo4jCountQueryRunner.configure_counts(settings=Neo4jCountSettings())
+
+    @classmethod
+    def _run_plan(cls, *, runner: Neo4jCountQueryRunner, answers: typing.List[typing.Any]) -> str:
+        plan = runner._plan_count()
+        next(plan)
+        for answer in answers:
+            try:
+                plan.send(answer)
+
+            except StopIteration as e:
+                return e.value
+
+        raise AssertionError("plan did not finish")
+
+    def test_estimate_settings_are_part_of_cache_key(self):
+        runner = Neo4jLabelCountQueryRunner(labels=["Person", "Movie"])
+        exact_key = runner.get_cache_key()
+        Neo4jCountQueryRunner.configure_counts(settings=Neo4jCountSettings(estimate=True))
+        estimate_key = runner.get_cache_key()
+        Neo4jCountQueryRunner.configure_counts(settings=Neo4jCountSettings(estimate=True, relative_error=0.01, time_budget_seconds=30.0))
+
+        self.assertEqual(len({exact_key, estimate_key, runner.get_cache_key()}), 3)
+
+    def test_single_label_uses_count_store(self):
+        runner = Neo4jLabelCountQueryRunner(labels=["Person"])
+        self.assertEqual(self._run_plan(runner=runner, answers=[[{"label_counts": [42]}]]), "42")
+
+    def test_relationship_count_store_shortcut(self):
+        runner = Neo4jRelBetweenLabelsCountQueryRunner(from_node_labels=["Person"], to_node_labels=["Movie"], rel_type="ACTED_IN")
+        counts = {"total": 10, "from_counts": [10], "to_counts": [7], "from_node_counts": [5], "to_node_counts": [3]}
+        self.assertEqual(self._run_plan(runner=runner, answers=[[counts]]), "7")
+
+    def test_estimate_after_exact_timeout(self):
+        Neo4jCountQueryRunner.configure_counts(settings=Neo4jCountSettings(estimate=True, relative_error=0.5))
+        runner = Neo4jLabelCountQueryRunner(labels=["Person", "Actor"])
+        sample = {"sampled": 1000, "value_sum": 500, "value_square_sum": 500}
+        estimate = json.loads(self._run_plan(runner=runner, answers=[[{"label_counts": [100000, 20000]}], None, [sample]]))
+
+        self.assertEqual(estimate["estimate"], 10000)
+        self.assertEqual(estimate["upper_bound"], 20000)
+        self.assertLess(estimate["ci95"][0], 10000)
+        self.assertGreater(estimate["ci95"][1], 10000)
+        self.assertNotIn("reason", estimate)
+
+    def test_estimate_without_finished_sample_keeps_the_shape(self):
+        Neo4jCountQueryRunner.configure_counts(settings=Neo4jCountSettings(estimate=True))
+        runner = Neo4jLabelCountQueryRunner(labels=["Person", "Actor"])
+        estimate = json.loads(self._run_plan(runner=runner, answers=[[{"label_counts": [100000, 20000]}], None, None]))
+
+        self.assertIsNone(estimate["estimate"])
+        self.assertEqual(estimate["ci95"], [0, 20000])
+        self.assertEqual(estimate["upper_bound"], 20000)
+        self.assertEqual(estimate["sampled_nodes"], 0)
+        self.assertIn("seconds", estimate["reason"])
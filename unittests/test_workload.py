@@ -0,0 +1,32 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..src.opti_query.optipy.workload import WorkloadReader
+
+
+class TestWorkloadReader(unittest.TestCase):
+    def test_read_queries_skips_comment_only_statements(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "workload.cypher"
+            path.write_text("MATCH (n) RETURN n;\n// first\n;\nMATCH (m) RETURN m; // end\n")
+            self.assertEqual(WorkloadReader.read_queries(path=path), ["MATCH (n) RETURN n", "MATCH (m) RETURN m"])
+
+    def test_read_queries_rejects_non_string_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "workload.jsonl"
+            path.write_text(json.dumps("MATCH (n) RETURN n") + "\n" + json.dumps({"query": 1}) + "\n")
+            with self.assertRaisesRegex(ValueError, "line 2"):
+                WorkloadReader.read_queries(path=path)
+
+    def test_read_parameters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "params.jsonl"
+            path.write_text(json.dumps({"id": 1}) + "\n\n" + json.dumps({"id": 2}) + "\n")
+            self.assertEqual(WorkloadReader.read_parameters(path=path), [{"id": 1}, {"id": 2}])
+
+            path = Path(directory) / "params.json"
+            path.write_text(json.dumps([1, 2]))
+            with self.assertRaises(ValueError):
+                WorkloadReader.read_parameters(path=path)